@@ -5,6 +5,7 @@ from src.database.connection import init_db
 from src.ui.theme import apply_theme
 from src.ui.auth import render_auth_page
 from src.ui.chat_page import render_chat_page
+from src.ui.runstats import count_run
 
 load_dotenv()
 
@@ -19,6 +20,7 @@ def init_session_state():
 
 
 def main():
+    count_run()
     init_db()
 
     st.set_page_config(
@@ -0,0 +1,77 @@
+"""Alert rule evaluation: one vectorized pass vs a per-rule Python loop.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_alerts
+"""
+import random
+import time
+
+import numpy as np
+
+from src.alerts.engine import KINDS, RuleSet, evaluate
+
+RULE_COUNTS = (1_000, 10_000, 100_000)
+COINS = 2_000
+USERS = 20_000
+REPEATS = 7
+
+
+def synthetic_rules(n, seed=0):
+    rng = random.Random(seed)
+    kinds = list(KINDS)
+    rows = []
+    for i in range(n):
+        kind = rng.choice(kinds)
+        threshold = rng.uniform(0, 200) if kind.startswith("price") else rng.uniform(-10, 10)
+        rows.append((i, rng.randrange(USERS), f"coin-{rng.randrange(COINS)}", kind, threshold, True))
+    return rows
+
+
+def synthetic_prices(seed=1):
+    rng = random.Random(seed)
+    return [
+        {"id": f"coin-{i}", "price": rng.uniform(0, 200), "change": rng.uniform(-10, 10)}
+        for i in range(COINS)
+    ]
+
+
+def loop_evaluate(rows, prices):
+    by_id = {coin["id"]: coin for coin in prices}
+    fired = []
+    for rule_id, _, coin_id, kind, threshold, armed in rows:
+        coin = by_id.get(coin_id)
+        if coin is None:
+            continue
+        value = coin["price"] if kind.startswith("price") else coin["change"]
+        holds = value > threshold if kind.endswith("above") else value < threshold
+        if holds and armed:
+            fired.append(rule_id)
+    return fired
+
+
+def best_of(fn):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+def main():
+    prices = synthetic_prices()
+    print(f"{COINS} coins; best of {REPEATS}")
+    print(f"{'rules':>8} {'load (ms)':>10} {'quotes (ms)':>12} {'evaluate (ms)':>14} {'python loop (ms)':>17} {'fired':>7}")
+    for n in RULE_COUNTS:
+        rows = synthetic_rules(n)
+        load_ms, rules = best_of(lambda: RuleSet.from_rows(rows))
+        quotes_ms, quotes = best_of(lambda: rules.quote_matrix(prices))
+        eval_ms, (fired, _, _) = best_of(lambda: evaluate(rules, quotes))
+        loop_ms, loop_fired = best_of(lambda: loop_evaluate(rows, prices))
+        assert sorted(rules.rule_ids[fired].tolist()) == sorted(loop_fired)
+        print(f"{n:>8} {load_ms:>10.2f} {quotes_ms:>12.2f} {eval_ms:>14.3f} {loop_ms:>17.2f} {int(np.sum(fired)):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Bulk chat import/export throughput against a real database.
+
+Creates a throwaway user, imports synthetic history through the COPY path,
+exports it to JSONL and Parquet, then deletes the user. Run from the
+repository root with the usual DB_* settings:
+
+    python -m benchmarks.bench_chat_transfer [messages]
+"""
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import uuid
+
+from src.chat_store.transfer import export_chats, import_chats
+from src.database.connection import get_db_connection, init_db
+
+DEFAULT_MESSAGES = 1_000_000
+MESSAGES_PER_SESSION = 20
+
+
+def synthetic_export(path, messages, seed=0):
+    rng = random.Random(seed)
+    prices = [
+        {"id": "bitcoin", "name": "Bitcoin", "symbol": "BTC", "price": 64250.5, "change": -1.25},
+        {"id": "ethereum", "name": "Ethereum", "symbol": "ETH", "price": 3120.75, "change": 0.8},
+    ]
+    news = [
+        {"id": i, "title": f"Headline number {i} about the market", "source": "Example",
+         "url": f"https://example.com/{i}", "sentiment": rng.randint(-3, 3),
+         "currencies": ["BTC"], "score": 0.1}
+        for i in range(6)
+    ]
+    with open(path, "w", encoding="utf-8") as out:
+        for i in range(messages):
+            session = i // MESSAGES_PER_SESSION
+            record = {
+                "session_id": session,
+                "session_name": f"Session {session}",
+                "session_created_at": "2025-01-01T00:00:00+00:00",
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": "How is bitcoin doing today? " * rng.randint(1, 20),
+                "prices": prices if i % 2 else None,
+                "news": news if i % 2 else None,
+                "created_at": f"2025-01-01T00:00:{i % 60:02d}.{i % 1_000_000:06d}+00:00",
+            }
+            out.write(json.dumps(record) + "\n")
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def timed(label, messages, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} {elapsed:>8.1f} s {messages / elapsed:>12,.0f} msg/s {peak_rss_mb():>10.0f} MB peak RSS")
+    return result
+
+
+def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MESSAGES
+    init_db()
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO users (username, password) VALUES (%s, '-') RETURNING id",
+        (f"bench-{uuid.uuid4().hex[:8]}",),
+    )
+    user_id = cur.fetchone()[0]
+    conn.commit()
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "source.jsonl")
+            synthetic_export(source, messages)
+            print(f"{messages:,} messages, {os.path.getsize(source) / 1e6:,.0f} MB of JSONL")
+
+            timed("import jsonl", messages, lambda: import_chats(user_id, source))
+            timed("export jsonl", messages, lambda: export_chats(user_id, os.path.join(tmp, "out.jsonl")))
+            try:
+                timed("export parquet", messages, lambda: export_chats(user_id, os.path.join(tmp, "out.parquet"), "parquet"))
+            except RuntimeError as e:
+                print(f"export parquet   skipped: {e}")
+    finally:
+        cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        conn.commit()
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
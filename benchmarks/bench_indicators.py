@@ -0,0 +1,62 @@
+"""Indicator engine throughput on synthetic hourly closes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_indicators
+"""
+import time
+
+import numpy as np
+
+from src.market.indicators import IndicatorEngine, correlation_matrix
+
+HOUR_MS = 3_600_000
+CANDLES = 30 * 24
+COIN_COUNTS = (10, 100, 1000)
+REPEATS = 5
+
+
+def synthetic_closes(coins, candles, seed=0):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.01, size=(coins, candles))
+    closes = 100 * np.exp(np.cumsum(returns, axis=1))
+    ts = np.arange(candles, dtype=np.int64) * HOUR_MS
+    return ts, closes
+
+
+def best_of(fn, repeats=REPEATS):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    print(f"{'coins':>6} {'cold (ms)':>10} {'+1 candle (ms)':>15} {'cached (ms)':>12} {'corr (ms)':>10}")
+    for coins in COIN_COUNTS:
+        ts, closes = synthetic_closes(coins, CANDLES + 1)
+        coin_ids = [f"coin-{i}" for i in range(coins)]
+
+        cold = best_of(lambda: IndicatorEngine().update(coin_ids, ts[:-1], closes[:, :-1]))
+
+        def incremental():
+            engine = IndicatorEngine()
+            engine.update(coin_ids, ts[:-1], closes[:, :-1])
+            start = time.perf_counter()
+            engine.update(coin_ids, ts, closes)
+            return time.perf_counter() - start
+
+        step = min(incremental() for _ in range(REPEATS)) * 1000
+
+        warm = IndicatorEngine()
+        warm.update(coin_ids, ts, closes)
+        cached = best_of(lambda: warm.update(coin_ids, ts, closes))
+        corr = best_of(lambda: correlation_matrix(closes))
+
+        print(f"{coins:>6} {cold:>10.2f} {step:>15.2f} {cached:>12.2f} {corr:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
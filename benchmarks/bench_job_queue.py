@@ -0,0 +1,101 @@
+"""Analysis throughput through ``analysis_jobs`` as worker processes are added.
+
+Model and network calls are the same sleeps as in ``bench_service``, so
+the numbers reflect the queue and the workers, not the providers. Needs
+the database (``DB_*`` settings). Run from the repository root:
+
+    python -m benchmarks.bench_job_queue
+"""
+import multiprocessing
+import time
+
+from benchmarks import bench_service  # noqa: F401  (sets limits before src is imported)
+from src.database.connection import get_db_connection, init_db
+from src.jobs.store import enqueue_analysis, job_payload
+from src.jobs.worker import run_worker
+
+PROCESS_COUNTS = (1, 2, 4)
+THREADS = 4
+JOBS = 96
+QUESTION_PREFIX = "bench-queue:"
+
+
+def _worker(threads, stop, ready):
+    bench_service.patch()
+    from src.ai.analyzer import get_shared_analyzer
+
+    # Build the analyzer before timing starts; run_worker reuses it.
+    get_shared_analyzer()
+    ready.put(True)
+    run_worker(threads, stop)
+
+
+def _execute(sql, params=(), fetch=False):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, params)
+        result = cur.fetchall() if fetch else None
+        conn.commit()
+        return result
+    finally:
+        cur.close()
+        conn.close()
+
+
+def run(processes):
+    _execute("DELETE FROM analysis_jobs WHERE question LIKE %s", (QUESTION_PREFIX + "%",))
+    context = multiprocessing.get_context("spawn")
+    stop, ready = context.Event(), context.Queue()
+    workers = [context.Process(target=_worker, args=(THREADS, stop, ready)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for _ in workers:
+        ready.get(timeout=60)
+
+    started = time.monotonic()
+    payload = job_payload([])
+    for i in range(JOBS):
+        enqueue_analysis(None, f"{QUESTION_PREFIX} How are bitcoin and ethereum doing? ({i})", payload)
+    while True:
+        (done,), = _execute(
+            "SELECT count(*) FROM analysis_jobs WHERE question LIKE %s AND status IN ('done', 'failed')",
+            (QUESTION_PREFIX + "%",),
+            fetch=True,
+        )
+        if done >= JOBS:
+            break
+        time.sleep(0.02)
+    elapsed = time.monotonic() - started
+
+    (failed, waited), = _execute(
+        """
+        SELECT count(*) FILTER (WHERE status = 'failed'),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY extract(epoch FROM finished_at - created_at))
+        FROM analysis_jobs WHERE question LIKE %s
+        """,
+        (QUESTION_PREFIX + "%",),
+        fetch=True,
+    )
+    stop.set()
+    for worker in workers:
+        worker.join(timeout=15)
+        if worker.is_alive():
+            worker.terminate()
+    _execute("DELETE FROM analysis_jobs WHERE question LIKE %s", (QUESTION_PREFIX + "%",))
+    return JOBS / elapsed, waited, failed
+
+
+def main():
+    init_db()
+    print(f"{JOBS} jobs, {THREADS} claim loops per process")
+    print(f"{'processes':>10} {'jobs/s':>8} {'p50 enqueue->done (s)':>22} {'failed':>7}")
+    base = None
+    for processes in PROCESS_COUNTS:
+        rate, waited, failed = run(processes)
+        base = base or rate
+        print(f"{processes:>10} {rate:>8.2f} {waited:>22.2f} {failed:>7}   ({rate / base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Model calls per question: one model for everything vs per-task profiles.
+
+Uses ``FakeChatModel``, which sleeps for time-to-first-token plus output
+tokens over throughput, so the numbers show what routing and the output
+caps change, not network noise. Run from the repository root:
+
+    python -m benchmarks.bench_model_routing
+"""
+import time
+
+from langchain_core.messages import HumanMessage
+
+from src.ai.models import (
+    ANSWER,
+    CHAT_NAME,
+    COINS,
+    FAKE_NATURAL_TOKENS,
+    FOLLOWUPS,
+    PROFILES,
+    STRONG_MODEL,
+    FakeChatModel,
+    ModelProfile,
+)
+
+# Sleeps run at this fraction of real time; results are scaled back up.
+TIME_SCALE = 0.1
+QUESTIONS = 5
+# Assumed output price per million tokens, for the cost column only.
+OUTPUT_PRICE = {"gemini-2.5-flash": 2.50, "gemini-2.5-flash-lite": 0.40}
+# A model that over-explains the small tasks instead of answering tersely.
+RAMBLING_TOKENS = {**FAKE_NATURAL_TOKENS, COINS: 150, FOLLOWUPS: 400, CHAT_NAME: 80}
+
+PROMPTS = {
+    COINS: "Find the most relevant cryptocurrency CoinGecko IDs for: bitcoin and solana",
+    ANSWER: "Analyze bitcoin and solana prices together with the latest news.",
+    FOLLOWUPS: "Generate 3-4 short, relevant follow-up questions.",
+    CHAT_NAME: "Generate a short, descriptive chat session name.",
+}
+
+# Before routing: every task on the analysis model with no output cap.
+SINGLE = {task: ModelProfile(task, STRONG_MODEL, 0.7, 8192, PROFILES[task].priority) for task in PROFILES}
+
+
+def run(profiles, natural_tokens):
+    models = {task: FakeChatModel(profile, time_scale=TIME_SCALE, natural_tokens=natural_tokens)
+              for task, profile in profiles.items()}
+    seconds = {task: 0.0 for task in models}
+    for _ in range(QUESTIONS):
+        for task, model in models.items():
+            start = time.perf_counter()
+            model.invoke([HumanMessage(content=PROMPTS[task])])
+            seconds[task] += (time.perf_counter() - start) / TIME_SCALE
+    critical = (seconds[COINS] + seconds[ANSWER]) / QUESTIONS
+    background = (seconds[FOLLOWUPS] + seconds[CHAT_NAME]) / QUESTIONS
+    tokens = sum(model.output_tokens for model in models.values()) / QUESTIONS
+    cost = sum(
+        model.output_tokens * OUTPUT_PRICE[model.profile.model] for model in models.values()
+    ) / QUESTIONS / 1000
+    return critical, background, tokens, cost
+
+
+def main():
+    print(f"{QUESTIONS} questions each; per question, times in seconds, cost in USD per 1k questions")
+    print(f"{'':>22} {'coins+answer':>13} {'follow-ups+name':>16} {'out tokens':>11} {'cost':>7}")
+    for label, natural in (("terse", FAKE_NATURAL_TOKENS), ("rambling", RAMBLING_TOKENS)):
+        for name, profiles in (("single model", SINGLE), ("routed", PROFILES)):
+            critical, background, tokens, cost = run(profiles, natural)
+            print(f"{label + ', ' + name:>22} {critical:>13.2f} {background:>16.2f} {tokens:>11.0f} {cost:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""News for the prompt: relevance-ranked from the index vs first in fetch order.
+
+Builds a synthetic headline corpus where every article has a coin and a
+topic, then asks topic questions about one coin. Precision is the share
+of prompt articles on that coin and topic. Run from the repository root:
+
+    python -m benchmarks.bench_news_retrieval
+"""
+import random
+import time
+
+import numpy as np
+
+from src.news.retrieval import NewsIndex
+
+SIZES = (2_000, 20_000)
+QUERIES = 200
+PROMPT_ARTICLES = 4
+# What get_news hands over per question: the newest articles tagged with the coin.
+FETCHED = 10
+COINS = [
+    ("Bitcoin", "BTC"), ("Ethereum", "ETH"), ("Solana", "SOL"), ("Cardano", "ADA"),
+    ("Polkadot", "DOT"), ("Avalanche", "AVAX"), ("Chainlink", "LINK"), ("Litecoin", "LTC"),
+    ("Dogecoin", "DOGE"), ("Ripple", "XRP"), ("Near Protocol", "NEAR"), ("Cosmos", "ATOM"),
+]
+TOPICS = {
+    "etf": ["spot ETF filing", "ETF approval decision", "ETF inflows", "asset manager ETF"],
+    "hack": ["exploit drains bridge", "hacker steals funds", "security breach", "protocol exploit"],
+    "staking": ["staking yields", "validator rewards", "staking withdrawals", "liquid staking"],
+    "regulation": ["SEC lawsuit", "regulators tighten rules", "court ruling", "regulatory crackdown"],
+    "upgrade": ["network upgrade", "hard fork scheduled", "mainnet upgrade", "testnet launch"],
+    "whales": ["whale accumulation", "whales move coins", "large holders buy", "whale wallets"],
+}
+QUESTION_WORDS = {
+    "etf": "Will an ETF approval push {name} higher?",
+    "hack": "How bad is the {name} exploit for holders?",
+    "staking": "Is {name} staking still worth it?",
+    "regulation": "What does the SEC lawsuit mean for {name}?",
+    "upgrade": "When is the next {name} network upgrade?",
+    "whales": "Are whales accumulating {name}?",
+}
+FILLER = ["as markets wait", "analysts say", "report shows", "traders react", "amid volatility", ""]
+
+
+def corpus(n, seed=0):
+    rng = random.Random(seed)
+    now = time.time()
+    articles, times = [], []
+    for i in range(n):
+        name, symbol = rng.choice(COINS)
+        topic = rng.choice(list(TOPICS))
+        title = f"{name} {rng.choice(TOPICS[topic])} {rng.choice(FILLER)} #{i}".strip()
+        articles.append({"id": i, "title": title, "currencies": [symbol], "topic": topic, "coin": symbol})
+        times.append(now - rng.uniform(0, 72) * 3600)
+    return articles, times
+
+
+def precision(chosen, symbol, topic):
+    return sum(a["coin"] == symbol and a["topic"] == topic for a in chosen) / max(len(chosen), 1)
+
+
+def main():
+    rng = random.Random(1)
+    print(f"{QUERIES} questions; precision is the share of prompt articles on the asked coin and topic")
+    print(f"{'articles':>9} {'build (ms)':>11} {'add 10 (ms)':>12} {'search (ms)':>12} "
+          f"{'first 6':>8} {'ranked':>7} {'articles/prompt':>16}")
+    for n in SIZES:
+        articles, times = corpus(n)
+        index = NewsIndex(max_articles=n * 2)
+        start = time.perf_counter()
+        index.add(articles[:-1000], times[:-1000])
+        build_ms = (time.perf_counter() - start) * 1000
+
+        by_coin = {}
+        for article, when in sorted(zip(articles, times), key=lambda pair: -pair[1]):
+            by_coin.setdefault(article["coin"], []).append(article)
+
+        add_ms, search_ms, baseline, ranked, sizes = [], [], [], [], []
+        tail = iter(range(n - 1000, n, 10))
+        for _ in range(QUERIES):
+            name, symbol = rng.choice(COINS)
+            topic = rng.choice(list(TOPICS))
+            question = QUESTION_WORDS[topic].format(name=name)
+            fetched = by_coin[symbol][:FETCHED]
+            baseline.append(precision(fetched[:6], symbol, topic))
+
+            # New articles keep arriving between questions.
+            first = next(tail, None)
+            start = time.perf_counter()
+            index.add(fetched)
+            if first is not None:
+                index.add(articles[first:first + 10], times[first:first + 10])
+            add_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            chosen = [a for a, _ in index.search(f"{question} {name}", [symbol], PROMPT_ARTICLES)]
+            search_ms.append((time.perf_counter() - start) * 1000)
+            ranked.append(precision(chosen, symbol, topic))
+            sizes.append(len(chosen))
+
+        print(f"{n:>9} {build_ms:>11.1f} {np.median(add_ms):>12.2f} {np.median(search_ms):>12.2f} "
+              f"{np.mean(baseline):>8.2f} {np.mean(ranked):>7.2f} {np.mean(sizes):>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Headline sentiment scoring throughput.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sentiment
+"""
+import random
+import time
+
+from src.news.sentiment import LEXICON, SentimentScorer
+
+FILLER = (
+    "bitcoin ethereum solana price market traders analysts says after week "
+    "report network token exchange etf sec fed data new"
+).split()
+TITLE_COUNTS = (100, 1000, 10000)
+REPEATS = 5
+
+
+def synthetic_titles(n, seed=0):
+    rng = random.Random(seed)
+    words = FILLER + list(LEXICON) + ["not", "no"]
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(6, 16))).capitalize() for _ in range(n)]
+
+
+def main():
+    print(f"{'titles':>7} {'batch (ms)':>11} {'cached (ms)':>12}")
+    for n in TITLE_COUNTS:
+        titles = synthetic_titles(n)
+        articles = [{"id": i, "title": t} for i, t in enumerate(titles)]
+
+        best = float("inf")
+        for _ in range(REPEATS):
+            scorer = SentimentScorer()
+            start = time.perf_counter()
+            scorer.score_articles(articles)
+            best = min(best, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        scorer.score_articles(articles)
+        cached = time.perf_counter() - start
+
+        print(f"{n:>7} {best * 1000:>11.2f} {cached * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
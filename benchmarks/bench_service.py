@@ -0,0 +1,157 @@
+"""Analyze throughput: Streamlit-style per-session analyzers vs the shared service.
+
+Network calls and the model are replaced by sleeps of typical latency so
+the numbers only reflect how the work is organised. Run from the
+repository root:
+
+    python -m benchmarks.bench_service
+"""
+import asyncio
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Let the gateway pass everything through; we measure our own overhead.
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "1000000")
+os.environ.setdefault("LLM_BURST", "100000")
+os.environ.setdefault("LLM_CONCURRENCY", "64")
+# Every bench request comes from one client; don't throttle it as one user.
+os.environ.setdefault("ANALYZE_CONCURRENCY", "1000")
+os.environ.setdefault("USER_MAX_ACTIVE", "1000000")
+os.environ.setdefault("USER_ANALYZE_PER_MINUTE", "1000000")
+os.environ.setdefault("USER_ANALYZE_BURST", "1000000")
+
+import aiohttp  # noqa: E402
+from aiohttp import web  # noqa: E402
+
+from src.ai import analyzer as analyzer_module  # noqa: E402
+from src.ai.analyzer import CryptoAnalyzer  # noqa: E402
+from src.market.history import get_market_history  # noqa: E402
+from src.service.api import create_app  # noqa: E402
+
+COIN_LIST_SECONDS = 0.6  # /coins/list is several MB
+COINS = 15_000
+DATA_SECONDS = 0.08
+MODEL_SECONDS = 0.25
+REQUESTS = 64
+CONCURRENCY = 8
+PORT = 8765
+
+
+class _Reply:
+    def __init__(self, content):
+        self.content = content
+
+
+class SleepyModel:
+    def invoke(self, messages, timeout=None):
+        time.sleep(MODEL_SECONDS)
+        return _Reply("bitcoin,ethereum")
+
+
+def _load_all_coins(self):
+    time.sleep(COIN_LIST_SECONDS)
+    return {f"coin-{i}": {"symbol": f"C{i}", "name": f"Coin {i}"} for i in range(COINS)}
+
+
+def _get_prices(self, coin_ids):
+    time.sleep(DATA_SECONDS)
+    return [
+        {"id": c, "name": c.title(), "symbol": c[:3].upper(), "price": 100.0, "change": 1.0}
+        for c in coin_ids.split(",")
+    ]
+
+
+def _get_news(self, coin_ids, limit=10):
+    time.sleep(DATA_SECONDS)
+    return [
+        {"id": i, "title": f"Headline {i}", "source": "Bench", "url": "#", "sentiment": 0,
+         "currencies": ["BTC"], "score": 0.0}
+        for i in range(limit)
+    ]
+
+
+def _setup_ai(self):
+    # One model for every task, so runs stay comparable.
+    self.ai = SleepyModel()
+    self.models = {}
+
+
+def patch():
+    CryptoAnalyzer.load_all_coins = _load_all_coins
+    CryptoAnalyzer.setup_ai = _setup_ai
+    CryptoAnalyzer.get_prices = _get_prices
+    CryptoAnalyzer.get_news = _get_news
+    get_market_history().refresh_many = lambda coin_ids: None
+    # Every request is a new question; don't let the stage caches help.
+    analyzer_module._price_cache.max_entries = 0
+    analyzer_module._news_cache.max_entries = 0
+
+
+def question(i):
+    return f"How are bitcoin and ethereum doing? ({i})"
+
+
+def report(label, latencies, elapsed):
+    p50 = statistics.median(latencies)
+    p95 = sorted(latencies)[int(0.95 * (len(latencies) - 1))]
+    print(f"{label:<34} {len(latencies) / elapsed:>8.2f} req/s {p50:>8.2f} s p50 {p95:>8.2f} s p95")
+
+
+def streamlit_path(new_session):
+    """One script thread per session; a new session builds its own analyzer."""
+    warm = CryptoAnalyzer() if not new_session else None
+
+    def one(i):
+        start = time.perf_counter()
+        analyzer = CryptoAnalyzer() if new_session else warm
+        analyzer.analyze(question(i), [])
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        latencies = list(pool.map(one, range(REQUESTS)))
+    return latencies, time.perf_counter() - start
+
+
+async def _service_run():
+    runner = web.AppRunner(create_app(CryptoAnalyzer()))
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", PORT).start()
+    try:
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+        async with aiohttp.ClientSession() as session:
+
+            async def one(i):
+                async with semaphore:
+                    start = time.perf_counter()
+                    async with session.post(
+                        f"http://127.0.0.1:{PORT}/analyze", json={"question": question(i)}
+                    ) as response:
+                        await response.json()
+                    return time.perf_counter() - start
+
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*(one(i) for i in range(REQUESTS)))
+            return latencies, time.perf_counter() - start
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    patch()
+    print(
+        f"{REQUESTS} questions, {CONCURRENCY} concurrent; model {MODEL_SECONDS}s/call, "
+        f"data {DATA_SECONDS}s/call, coin list {COIN_LIST_SECONDS}s"
+    )
+    report("streamlit, new session each", *streamlit_path(new_session=True))
+    report("streamlit, warm sessions", *streamlit_path(new_session=False))
+    report("service, shared analyzer (HTTP)", *asyncio.run(_service_run()))
+    print(f"threads alive at the end: {threading.active_count()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Per-session memory of chat state: message dicts vs compact records.
+
+Each simulated session holds 100 messages (50 questions, 50 answers with
+3 quotes and 10 articles). Articles come from a shared pool, as they do
+when many users ask about the same coins; quotes are unique per answer.
+"Before" also builds a coin list per session, as each session used to
+own a ``CryptoAnalyzer``. Run from the repository root:
+
+    python -m benchmarks.bench_session_memory
+"""
+import gc
+import json
+import random
+import tracemalloc
+
+from src.chat_store.records import ChatMessage, interned_counts
+
+SESSIONS = 20
+MESSAGES = 100
+COINS = 15_000
+ARTICLE_POOL = 60
+NEWS_PER_ANSWER = 10
+QUOTES_PER_ANSWER = 3
+
+
+def coin_list():
+    # Shape of CryptoAnalyzer.load_all_coins, built from a fresh JSON payload.
+    payload = json.dumps([{"id": f"coin-{i}", "symbol": f"c{i}", "name": f"Coin {i}"} for i in range(COINS)])
+    return {c["id"]: {"symbol": c["symbol"].upper(), "name": c["name"]} for c in json.loads(payload)}
+
+
+ARTICLES = [
+    {
+        "id": i,
+        "title": f"Bitcoin and ether move as traders weigh ETF flows, headline number {i}",
+        "source": random.Random(i).choice(["CoinDesk", "Cointelegraph", "The Block", "Decrypt"]),
+        "url": f"https://news.example.com/2024/crypto/markets/article-{i}",
+        "sentiment": i % 5 - 2,
+        "currencies": ["BTC", "ETH"],
+        "score": round((i % 7 - 3) / 10, 3),
+    }
+    for i in range(ARTICLE_POOL)
+]
+
+
+def session_messages(seed):
+    """Messages as they arrive from the analyzer or the database: fresh dicts."""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(MESSAGES // 2):
+        messages.append({"role": "user", "content": f"How are bitcoin and ethereum doing today? ({i})"})
+        prices = [
+            {"id": c, "name": c.title(), "symbol": c[:3].upper(),
+             "price": round(rng.uniform(10, 70_000), 2), "change": round(rng.uniform(-5, 5), 2)}
+            for c in ("bitcoin", "ethereum", "solana")[:QUOTES_PER_ANSWER]
+        ]
+        news = json.loads(json.dumps(rng.sample(ARTICLES, NEWS_PER_ANSWER)))
+        answer = f"Bitcoin is trading near its weekly range while ether follows. ({seed}, {i}) " * 8
+        messages.append({"role": "assistant", "content": answer, "prices": prices, "news": news})
+    return messages
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    state = build()
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return used, state
+
+
+def before():
+    return [{"coins": coin_list(), "messages": session_messages(s)} for s in range(SESSIONS)]
+
+
+def after():
+    return coin_list(), messages_only(True)
+
+
+def messages_only(records):
+    if records:
+        return [{"messages": [ChatMessage.from_dict(m) for m in session_messages(s)]} for s in range(SESSIONS)]
+    return [{"messages": session_messages(s)} for s in range(SESSIONS)]
+
+
+def main():
+    print(f"{SESSIONS} sessions x {MESSAGES} messages, {COINS} coins, {ARTICLE_POOL} distinct articles")
+    rows = [
+        ("messages: dicts", measure(lambda: messages_only(False))[0]),
+        ("messages: records", measure(lambda: messages_only(True))[0]),
+        ("session total, before", measure(before)[0]),
+        ("session total, after", measure(after)[0]),
+    ]
+    for label, used in rows:
+        print(f"{label:<24} {used / SESSIONS / 1024:>9.1f} KiB per session")
+    print(f"interned now: {interned_counts()}")
+
+
+if __name__ == "__main__":
+    main()
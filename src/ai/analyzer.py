@@ -1,13 +1,115 @@
+import contextvars
+import logging
 import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.ai.gateway import get_llm_gateway
+from src.ai.models import ANSWER, CHAT_NAME, COINS, FOLLOWUPS, PROFILES, build_models
+from src.market.history import get_market_history
+from src.market.indicators import (
+    correlation_matrix,
+    format_indicators,
+    get_indicator_engine,
+)
+from src.market.ticks import format_moves, get_tick_writer, moves_since
+from src.market.overview import (
+    format_overview,
+    get_market_overview,
+    is_overview_question,
+)
+from src.news.retrieval import rank_news
+from src.news.sentiment import get_sentiment_scorer, sentiment_label
+from src.news.store import get_stored_news, parse_time
+from src.resilience.breaker import get_breaker
+from src.resilience.deadline import (
+    ANALYZE_DEADLINE_SECONDS,
+    DeadlineExceeded,
+    deadline_scope,
+    remaining,
+    request_timeout,
+)
+from src.resilience.http import COINGECKO, CRYPTOPANIC, GEMINI, provider_get
+from src.resilience.stages import StaleCache, run_with_timeout
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Coins per question that get 7d/30d history summaries in the prompt.
+MAX_HISTORY_COINS = 5
+
+# Per-stage caps inside the analyze deadline. The answer stage gets whatever
+# is left, and earlier stages always leave it at least ANSWER_RESERVE_SECONDS.
+ANSWER_RESERVE_SECONDS = float(os.getenv("ANSWER_RESERVE_SECONDS", "12"))
+COINS_STAGE_SECONDS = 6
+DATA_STAGE_SECONDS = 8
+HISTORY_STAGE_SECONDS = 4
+FOLLOWUP_MIN_SECONDS = 2
+# Articles in the prompt, picked by relevance from everything fetched so far.
+NEWS_PROMPT_ARTICLES = 4
+LLM_TIMEOUT_SECONDS = 60
+
+# /simple/price takes every id in the query string; large id sets are split
+# so no request hits URL or response size limits.
+PRICE_CHUNK_IDS = int(os.getenv("PRICE_CHUNK_IDS", "50"))
+PRICE_CHUNK_CHARS = 1500
+# Chunk requests in flight at once; the CoinGecko rate limit still applies.
+PRICE_FETCH_WORKERS = 4
+
+_price_pool = ThreadPoolExecutor(max_workers=PRICE_FETCH_WORKERS, thread_name_prefix="prices")
+
+# Last good stage results, shared by every analyzer in the process.
+_price_cache = StaleCache()
+_news_cache = StaleCache()
+_overview_cache = StaleCache(max_entries=4)
+
+
+def history_messages(messages):
+    """LangChain history from ``{"role", "content"}`` chat messages."""
+    history = []
+    for msg in messages:
+        if msg["role"] == "user":
+            history.append(HumanMessage(content=msg["content"]))
+        elif msg["role"] == "assistant":
+            history.append(AIMessage(content=msg["content"]))
+    return history
+
+
+def price_chunks(coin_ids, max_ids=PRICE_CHUNK_IDS, max_chars=PRICE_CHUNK_CHARS):
+    """Split comma-separated ids into ordered, de-duplicated chunks.
+
+    Each chunk has at most ``max_ids`` ids and ``max_chars`` characters
+    once joined with commas.
+    """
+    chunks, chunk, length = [], [], 0
+    seen = set()
+    for coin_id in coin_ids.split(","):
+        coin_id = coin_id.strip()
+        if not coin_id or coin_id in seen:
+            continue
+        seen.add(coin_id)
+        if chunk and (len(chunk) >= max_ids or length + 1 + len(coin_id) > max_chars):
+            chunks.append(chunk)
+            chunk, length = [], 0
+        length += len(coin_id) + (1 if chunk else 0)
+        chunk.append(coin_id)
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _stage_timeout(cap):
+    try:
+        return request_timeout(cap, reserve=ANSWER_RESERVE_SECONDS)
+    except DeadlineExceeded:
+        return 0.0
+
 
 class CryptoAnalyzer:
     def __init__(self):
@@ -16,6 +118,9 @@ class CryptoAnalyzer:
 
         self.setup_ai()
         self.all_coins = self.load_all_coins()
+        self.history = get_market_history()
+        self.indicators = get_indicator_engine()
+        self.sentiment = get_sentiment_scorer()
 
         self.system_msg = SystemMessage(
             content="""You are a crypto market analyst. Analyze both prices and news together. 
@@ -27,20 +132,33 @@ class CryptoAnalyzer:
         )
 
     def setup_ai(self):
-        try:
-            self.ai = ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash",
-                google_api_key=self.gemini_key,
-                temperature=0.7,
-            )
-        except Exception:
-            self.ai = None
+        # One model per task (see src.ai.models); ``ai`` is the analysis model.
+        self.models = build_models(self.gemini_key)
+        self.ai = self.models[ANSWER]
+
+    def invoke_ai(self, messages, timeout=LLM_TIMEOUT_SECONDS, reserve=0.0, task=ANSWER):
+        """Call the ``task`` model through the shared gateway, behind the Gemini breaker and bounded by the current deadline"""
+        model = self.models.get(task) or self.ai
+        limit = request_timeout(timeout, reserve)
+        expires_at = time.monotonic() + limit
+
+        def call(messages):
+            # The client gives up with the caller, so a hung request can't
+            # keep its gateway worker after we've stopped waiting.
+            return model.invoke(messages, timeout=max(expires_at - time.monotonic(), 0.1))
+
+        return get_llm_gateway().invoke(
+            get_breaker(GEMINI).call,
+            call,
+            messages,
+            priority=PROFILES[task].priority,
+            timeout=limit,
+        )
 
     def load_all_coins(self):
         try:
             url = "https://api.coingecko.com/api/v3/coins/list"
-            response = requests.get(url, timeout=10)
-            coins = response.json()
+            coins = provider_get(COINGECKO, url)
 
             coin_data = {}
             for coin in coins:
@@ -70,7 +188,12 @@ class CryptoAnalyzer:
         Return just the IDs:"""
 
         try:
-            response = self.ai.invoke([HumanMessage(content=prompt)])
+            response = self.invoke_ai(
+                [HumanMessage(content=prompt)],
+                COINS_STAGE_SECONDS,
+                reserve=ANSWER_RESERVE_SECONDS,
+                task=COINS,
+            )
             coin_ids = response.content.strip().lower()
             return coin_ids
         except Exception:
@@ -88,25 +211,78 @@ class CryptoAnalyzer:
         Return each question on a new line, no numbering or bullets."""
 
         try:
-            response = self.ai.invoke([HumanMessage(content=prompt)])
+            response = self.invoke_ai([HumanMessage(content=prompt)], task=FOLLOWUPS)
             questions = [q.strip() for q in response.content.split("\n") if q.strip()]
             return questions[:4]
         except Exception:
             return []
 
+    def suggest_chat_name(self, messages):
+        """AI-generated chat name, or None if the model gave none"""
+        if not messages or len(messages) < 2:
+            return None
+
+        first_user_message = next((m["content"] for m in messages if m["role"] == "user"), "")
+        if not first_user_message:
+            return None
+
+        prompt = f"""Based on this cryptocurrency question: "{first_user_message}"
+
+Generate a short, descriptive chat session name (max 4-5 words) that captures the main topic.
+Examples:
+- "Bitcoin price analysis" -> "Bitcoin Market Analysis"
+- "Ethereum news and price" -> "Ethereum News Update" 
+- "NEAR protocol developments" -> "NEAR Protocol Review"
+- "General crypto market" -> "Market Overview"
+
+Return only the session name, no quotes or explanations:"""
+
+        try:
+            response = self.invoke_ai([HumanMessage(content=prompt)], task=CHAT_NAME)
+            name = response.content.strip()
+            name = re.sub(r'["\']', "", name)
+            if len(name) > 50:
+                name = name[:47] + "..."
+            return name or None
+        except Exception:
+            return None
+
     def get_prices(self, coin_ids):
+        """Prices for comma-separated ``coin_ids``, in the order asked.
+
+        Large id sets are fetched as concurrent chunks (see ``price_chunks``);
+        a failed chunk only drops its own coins.
+        """
+        chunks = price_chunks(coin_ids)
+        if len(chunks) <= 1:
+            fetched = [self.fetch_price_chunk(chunk) for chunk in chunks]
+        else:
+            # Chunk requests keep the caller's deadline.
+            futures = [
+                _price_pool.submit(contextvars.copy_context().run, self.fetch_price_chunk, chunk)
+                for chunk in chunks
+            ]
+            fetched = [future.result() for future in futures]
+
+        prices = []
+        for chunk, by_id in zip(chunks, fetched):
+            prices.extend(by_id[coin_id] for coin_id in chunk if coin_id in by_id)
+        get_tick_writer().record_prices(prices)
+        return prices
+
+    def fetch_price_chunk(self, coin_ids):
+        """Price dicts by id for one chunk of ids; empty if the request fails"""
         try:
             url = "https://api.coingecko.com/api/v3/simple/price"
             params = {
-                "ids": coin_ids,
+                "ids": ",".join(coin_ids),
                 "vs_currencies": "usd",
                 "include_24hr_change": "true",
             }
 
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
+            data = provider_get(COINGECKO, url, params=params)
 
-            prices = []
+            prices = {}
             for coin_id, info in data.items():
                 if "usd" in info:
                     coin_info = self.all_coins.get(coin_id, {})
@@ -115,29 +291,46 @@ class CryptoAnalyzer:
                     )
                     symbol = coin_info.get("symbol", coin_id.upper())
 
-                    prices.append(
-                        {
-                            "name": display_name,
-                            "symbol": symbol,
-                            "price": info["usd"],
-                            "change": info.get("usd_24h_change", 0),
-                        }
-                    )
+                    prices[coin_id] = {
+                        "id": coin_id,
+                        "name": display_name,
+                        "symbol": symbol,
+                        "price": info["usd"],
+                        "change": info.get("usd_24h_change", 0),
+                    }
 
             return prices
-        except Exception:
-            return []
+        except Exception as e:
+            logger.warning("Price chunk of %d ids failed: %r", len(coin_ids), e)
+            return {}
+
+    def get_symbols(self, coin_ids):
+        symbols = []
+        for coin_id in coin_ids.split(","):
+            coin_info = self.all_coins.get(coin_id.strip(), {})
+            symbol = coin_info.get("symbol", coin_id.strip()[:3].upper())
+            symbols.append(symbol)
+        return symbols
 
     def get_news(self, coin_ids, limit=10):
-        """Get news with multiple fallback strategies"""
+        """Get news from the local store, or straight from the API if it is unavailable"""
+        symbols = self.get_symbols(coin_ids)
         try:
-            # Get symbols for the coins
-            symbols = []
-            for coin_id in coin_ids.split(","):
-                coin_info = self.all_coins.get(coin_id.strip(), {})
-                symbol = coin_info.get("symbol", coin_id[:3].upper())
-                symbols.append(symbol)
+            articles = get_stored_news(symbols, self.news_key, limit)
+        except Exception:
+            articles = []
+
+        if not articles:
+            articles = self.fetch_news(symbols, limit)
+
+        scores = self.sentiment.score_articles(articles)
+        for article, score in zip(articles, scores):
+            article["score"] = round(score, 3)
+        return articles
 
+    def fetch_news(self, symbols, limit=10):
+        """Get news with multiple fallback strategies"""
+        try:
             symbols_str = ",".join(symbols)
 
             # Try multiple strategies to get news
@@ -164,8 +357,7 @@ class CryptoAnalyzer:
                         }
                     )
 
-                    response = requests.get(url, params=params, timeout=10)
-                    data = response.json()
+                    data = provider_get(CRYPTOPANIC, url, params=params)
 
                     for item in data.get("results", []):
                         if item["title"] not in [a["title"] for a in all_articles]:
@@ -175,6 +367,7 @@ class CryptoAnalyzer:
 
                             all_articles.append(
                                 {
+                                    "id": item.get("id"),
                                     "title": item.get("title", ""),
                                     "source": item.get("source", {}).get(
                                         "title", "Unknown"
@@ -185,6 +378,9 @@ class CryptoAnalyzer:
                                         c.get("code")
                                         for c in item.get("currencies", [])
                                     ],
+                                    "published_at": parse_time(
+                                        item.get("published_at") or item.get("created_at")
+                                    ),
                                 }
                             )
 
@@ -198,6 +394,68 @@ class CryptoAnalyzer:
         except Exception:
             return []
 
+    def format_market_info(self, prices):
+        """Format prices plus cached history and indicators for AI analysis"""
+        market_info = ""
+        if prices:
+            market_info += "**CURRENT PRICES:**\n"
+            for coin in prices:
+                trend = "🟢" if coin["change"] > 0 else "🔴"
+                market_info += (
+                    f"- {coin['name']} ({coin['symbol']}): "
+                    f"${coin['price']:,.2f} {trend} "
+                    f"{coin['change']:+.2f}%\n"
+                )
+        else:
+            market_info += "No price data available\n"
+
+        history_coins = {coin["id"]: coin["name"] for coin in prices[:MAX_HISTORY_COINS]}
+        try:
+            run_with_timeout(
+                self.history.refresh_many,
+                _stage_timeout(HISTORY_STAGE_SECONDS),
+                list(history_coins),
+            )
+        except Exception:
+            # Summaries below fall back to whatever history is cached.
+            pass
+        history_info = self.history.format_summaries(history_coins)
+        if history_info:
+            market_info += "\n**PRICE HISTORY (7d / 30d):**\n" + history_info
+
+        indicator_info = self.get_indicators(history_coins)
+        if indicator_info:
+            market_info += "\n**TECHNICAL INDICATORS (1h candles):**\n" + indicator_info
+
+        return market_info
+
+    def format_moves_since(self, last_seen, prices):
+        """How the coins in ``prices`` moved since the chat last quoted them, from stored ticks"""
+        seen = {coin["id"]: last_seen[coin["id"]] for coin in prices if coin["id"] in last_seen}
+        if not seen:
+            return ""
+        since = {coin_id: when for coin_id, (when, _) in seen.items()}
+        try:
+            moves = run_with_timeout(moves_since, _stage_timeout(HISTORY_STAGE_SECONDS), since)
+        except Exception:
+            # Without ticks the move is still then vs now.
+            moves = {}
+        return format_moves(seen, prices, moves)
+
+    def get_indicators(self, coin_names):
+        """Technical indicator lines for ``{coin_id: name}`` from cached history"""
+        coin_ids = list(coin_names)
+        if not coin_ids:
+            return ""
+
+        try:
+            ts, closes = self.history.close_matrix(coin_ids)
+            results = self.indicators.update(coin_ids, ts, closes)
+            corr = correlation_matrix(closes)
+            return format_indicators(results, coin_names, corr, coin_ids)
+        except Exception:
+            return ""
+
     def clean_text(self, text: str) -> str:
         # More comprehensive LaTeX and markdown removal
         text = re.sub(r"\$\$.*?\$\$", "", text, flags=re.DOTALL)
@@ -218,6 +476,15 @@ class CryptoAnalyzer:
 
         return text
 
+    def select_news(self, question, prices, news, limit=NEWS_PROMPT_ARTICLES):
+        """The fetched or previously seen articles most relevant to the question and its coins"""
+        coins = [(coin["name"], coin["symbol"]) for coin in prices]
+        try:
+            return rank_news(question, coins, news, limit)
+        except Exception as e:
+            logger.warning("News ranking failed: %r", e)
+            return news[:limit]
+
     def format_news_for_analysis(self, news):
         """Format news in a way that's useful for AI analysis"""
         if not news:
@@ -226,13 +493,7 @@ class CryptoAnalyzer:
         formatted_news = ""
         for i, item in enumerate(news[:6]):
             clean_title = self.clean_text(item["title"])
-            sentiment = (
-                "Positive"
-                if item["sentiment"] > 2
-                else "Negative"
-                if item["sentiment"] < -2
-                else "Neutral"
-            )
+            sentiment = sentiment_label(item)
             currencies = (
                 ", ".join(item["currencies"])
                 if item["currencies"]
@@ -247,29 +508,93 @@ class CryptoAnalyzer:
 
         return formatted_news
 
-    def analyze(self, question, history):
-        if not self.gemini_key or not self.ai:
+    def fallback_answer(self, market_info, news):
+        """Plain data summary for when the model can't answer in time"""
+        answer = (
+            "The AI analysis could not be completed in time, so here is the "
+            "latest market data and news instead.\n\n"
+            + self.clean_text(market_info)
+        )
+        if news:
+            answer += "\n\nRecent headlines:\n" + "\n".join(
+                f"- {self.clean_text(item['title'])} ({sentiment_label(item)})"
+                for item in news[:6]
+            )
+        return answer
+
+    def analyze(
+        self,
+        question,
+        history,
+        deadline_seconds=ANALYZE_DEADLINE_SECONDS,
+        include_related=True,
+        on_data=None,
+        last_seen=None,
+    ):
+        """Answer ``question``; returns ``(answer, prices, news, related_questions)``.
+
+        With ``include_related=False`` no follow-ups are generated, so the
+        caller can request them in the background with ``get_related_questions``.
+        ``on_data(prices, news)`` is called once market data is in, before
+        the model is asked. ``last_seen`` (``{coin_id: (when, price)}``, see
+        ``last_quotes``) adds how those coins moved since the chat last
+        discussed them.
+        """
+        if not self.ai:
             return "Please check your API key setup", [], [], []
 
+        with deadline_scope(deadline_seconds):
+            return self._analyze(question, history, include_related, on_data, last_seen)
+
+    def _analyze(self, question, history, include_related=True, on_data=None, last_seen=None):
         try:
-            coin_ids = self.find_coins(question)
-
-            prices = self.get_prices(coin_ids)
-            news = self.get_news(coin_ids)
-
-            # Format market data for AI
-            market_info = ""
-            if prices:
-                market_info += "**CURRENT PRICES:**\n"
-                for coin in prices:
-                    trend = "🟢" if coin["change"] > 0 else "🔴"
-                    market_info += (
-                        f"- {coin['name']} ({coin['symbol']}): "
-                        f"${coin['price']:,.2f} {trend} "
-                        f"{coin['change']:+.2f}%\n"
-                    )
+            overview = None
+            if is_overview_question(question):
+                overview, _ = _overview_cache.run(
+                    "overview", get_market_overview, _stage_timeout(DATA_STAGE_SECONDS)
+                )
+
+            if overview:
+                # The largest coins stand in for "the market" in prices and news.
+                prices = overview["leaders"]
+                coin_ids = ",".join(coin["id"] for coin in prices)
+                news, _ = _news_cache.run(
+                    coin_ids,
+                    lambda: self.get_news(coin_ids),
+                    _stage_timeout(DATA_STAGE_SECONDS),
+                    default=[],
+                )
+                market_info = format_overview(overview)
             else:
-                market_info += "No price data available\n"
+                coin_ids = self.find_coins(question)
+                # Prices and news are independent; fetch them side by side,
+                # both bounded by the same stage timeout.
+                stage_timeout = _stage_timeout(DATA_STAGE_SECONDS)
+                stage_ends = time.monotonic() + stage_timeout
+                news_future = _news_cache.start(coin_ids, lambda: self.get_news(coin_ids))
+                prices, _ = _price_cache.run(
+                    coin_ids,
+                    lambda: self.get_prices(coin_ids),
+                    stage_timeout,
+                    default=[],
+                )
+                news, _ = _news_cache.wait(
+                    coin_ids,
+                    news_future,
+                    max(stage_ends - time.monotonic(), 0.0),
+                    default=[],
+                )
+                market_info = self.format_market_info(prices)
+
+            if last_seen:
+                moves_info = self.format_moves_since(last_seen, prices)
+                if moves_info:
+                    market_info += "\n**SINCE THIS CHAT LAST DISCUSSED THEM:**\n" + moves_info + "\n"
+
+            news = self.select_news(question, prices, news)
+
+            if on_data is not None:
+                on_data(prices, news)
 
             # Format news for AI analysis
             news_analysis = self.format_news_for_analysis(news)
@@ -289,23 +614,41 @@ LATEST NEWS & SENTIMENT:
 ANALYSIS REQUEST:
 Please analyze BOTH the price data and news together. 
 - Connect news sentiment to price movements
+- For a market overview, use breadth, dominance and top movers rather than single coins
+- Relate the current move to the 7-day and 30-day trend when history is given
+- Use the technical indicators as supporting evidence, not as predictions
 - Identify potential catalysts from the news
 - Provide market insights based on both data sources
 - Suggest what to watch for based on current trends"""
 
-            from langchain_core.messages import HumanMessage as _HumanMessage
-
-            messages.append(_HumanMessage(content=prompt))
+            messages.append(HumanMessage(content=prompt))
 
-            response = self.ai.invoke(messages)
+            try:
+                response = self.invoke_ai(messages)
+                clean_response = self.clean_text(response.content)
+            except Exception:
+                return self.fallback_answer(market_info, news), prices, news, []
 
-            clean_response = self.clean_text(response.content)
-
-            # Generate related questions
-            coin_names = [coin["name"] for coin in prices]
-            related_questions = self.get_related_questions(question, coin_names)
+            # Generate related questions with whatever time is left
+            related_questions = []
+            if include_related and remaining(0) >= FOLLOWUP_MIN_SECONDS:
+                coin_names = [coin["name"] for coin in prices]
+                related_questions = self.get_related_questions(question, coin_names)
 
             return clean_response, prices, news, related_questions
 
         except Exception as e:
             return f"Error: {str(e)}", [], [], []
+
+
+_shared_analyzer = None
+_shared_analyzer_lock = threading.Lock()
+
+
+def get_shared_analyzer() -> CryptoAnalyzer:
+    """One analyzer per process, shared by every caller; it is thread-safe."""
+    global _shared_analyzer
+    with _shared_analyzer_lock:
+        if _shared_analyzer is None:
+            _shared_analyzer = CryptoAnalyzer()
+        return _shared_analyzer
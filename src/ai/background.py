@@ -0,0 +1,17 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads for model work nobody waits on: follow-up suggestions and chat names.
+AUX_WORKERS = int(os.getenv("AUX_LLM_WORKERS", "4"))
+
+_pool = ThreadPoolExecutor(max_workers=AUX_WORKERS, thread_name_prefix="llm-aux")
+
+
+def submit_auxiliary(fn, *args, **kwargs):
+    """Run ``fn`` off the script thread and return its Future.
+
+    It runs in an empty context, so the deadline of the analyze call that
+    spawned it does not follow it; the gateway still bounds its queue time.
+    """
+    return _pool.submit(contextvars.Context().run, fn, *args, **kwargs)
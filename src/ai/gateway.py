@@ -0,0 +1,203 @@
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from src.resilience.ratelimit import TokenBucket
+
+# Priority classes, most important first.
+ANALYSIS = 0
+FOLLOWUP = 1
+NAMING = 2
+PRIORITY_NAMES = {ANALYSIS: "analysis", FOLLOWUP: "followup", NAMING: "naming"}
+
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_BURST = int(os.getenv("LLM_BURST", "5"))
+# Low-priority work is refused outright when this many calls of equal or
+# higher priority are already waiting, and dropped if it waited this long.
+SHED_QUEUE_DEPTH = {FOLLOWUP: 16, NAMING: 8}
+MAX_QUEUE_WAIT = {FOLLOWUP: 20.0, NAMING: 60.0}
+RATE_LIMIT_BACKOFF_SECONDS = 10.0
+WAIT_SAMPLES = 256
+
+
+class LLMOverloaded(RuntimeError):
+    pass
+
+
+def _is_rate_limited(error) -> bool:
+    text = f"{type(error).__name__} {error}"
+    return "429" in text or "ResourceExhausted" in text or "quota" in text.lower()
+
+
+class _Request:
+    __slots__ = ("priority", "fn", "args", "kwargs", "future", "enqueued_at", "finished", "abandoned")
+
+    def __init__(self, priority, fn, args, kwargs):
+        self.priority = priority
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+        self.finished = False
+        self.abandoned = False
+
+
+class LLMGateway:
+    """Shared front door for every model call in the process.
+
+    Requests wait in a priority queue and are dispatched by ``concurrency``
+    workers, each taking a token from a requests-per-minute bucket first. A
+    429 from the provider pauses the bucket. Follow-up and naming calls are
+    shed when the queue is deep or when they have waited too long, so they
+    never hold up an analysis.
+
+    A call that is already running can't be withdrawn: it keeps its worker
+    until ``fn`` returns, so ``fn`` must bound itself (model clients get a
+    request timeout). ``stats()["abandoned_running"]`` counts such calls
+    whose caller has given up.
+    """
+
+    def __init__(self, concurrency=LLM_CONCURRENCY, requests_per_minute=LLM_REQUESTS_PER_MINUTE, burst=LLM_BURST):
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._abandoned_running = 0
+        self._waits = {p: deque(maxlen=WAIT_SAMPLES) for p in PRIORITY_NAMES}
+        self._counters = {"completed": 0, "failed": 0, "shed": 0, "rate_limited": 0, "abandoned": 0}
+
+        for i in range(concurrency):
+            threading.Thread(target=self._worker, name=f"llm-gateway-{i}", daemon=True).start()
+
+    def submit(self, fn, *args, priority=ANALYSIS, **kwargs) -> Future:
+        return self._enqueue(fn, args, kwargs, priority).future
+
+    def _enqueue(self, fn, args, kwargs, priority):
+        with self._cond:
+            if priority in SHED_QUEUE_DEPTH:
+                ahead = sum(1 for item in self._queue if item[0] <= priority)
+                if ahead >= SHED_QUEUE_DEPTH[priority] or (priority == NAMING and self.bucket.throttled):
+                    self._counters["shed"] += 1
+                    raise LLMOverloaded(f"{PRIORITY_NAMES[priority]} request shed under load")
+
+            request = _Request(priority, fn, args, kwargs)
+            heapq.heappush(self._queue, (priority, next(self._seq), request))
+            self._cond.notify()
+            return request
+
+    def invoke(self, fn, *args, priority=ANALYSIS, timeout=None, **kwargs):
+        """Submit and wait; a request still queued when ``timeout`` hits is withdrawn.
+
+        One that is already running is left to finish and counted as abandoned.
+        """
+        request = self._enqueue(fn, args, kwargs, priority)
+        try:
+            return request.future.result(timeout)
+        except FutureTimeout:
+            if not request.future.cancel():
+                with self._cond:
+                    if not request.finished:
+                        request.abandoned = True
+                        self._abandoned_running += 1
+                        self._counters["abandoned"] += 1
+            raise TimeoutError(f"model call did not finish within {timeout:.1f}s") from None
+
+    def _next_request(self):
+        with self._cond:
+            while True:
+                if not self._queue:
+                    self._cond.wait()
+                    continue
+
+                priority, _, request = self._queue[0]
+                waited = time.monotonic() - request.enqueued_at
+                if request.future.cancelled() or waited > MAX_QUEUE_WAIT.get(priority, float("inf")):
+                    heapq.heappop(self._queue)
+                    if not request.future.cancelled():
+                        self._counters["shed"] += 1
+                        request.future.set_exception(
+                            LLMOverloaded(f"{PRIORITY_NAMES[priority]} request waited {waited:.1f}s")
+                        )
+                    continue
+
+                wait = self.bucket.try_acquire()
+                if wait > 0:
+                    # Re-check after the wait: a more urgent request may have arrived.
+                    self._cond.wait(wait)
+                    continue
+
+                heapq.heappop(self._queue)
+                if not request.future.set_running_or_notify_cancel():
+                    continue
+                self._waits[priority].append(waited)
+                self._in_flight += 1
+                return request
+
+    def _finish(self, request, outcome):
+        with self._cond:
+            self._counters[outcome] += 1
+            self._in_flight -= 1
+            request.finished = True
+            if request.abandoned:
+                self._abandoned_running -= 1
+
+    def _worker(self):
+        while True:
+            request = self._next_request()
+            try:
+                result = request.fn(*request.args, **request.kwargs)
+            except Exception as e:
+                if _is_rate_limited(e):
+                    self.bucket.penalize(RATE_LIMIT_BACKOFF_SECONDS)
+                    with self._cond:
+                        self._counters["rate_limited"] += 1
+                self._finish(request, "failed")
+                request.future.set_exception(e)
+            else:
+                self._finish(request, "completed")
+                request.future.set_result(result)
+
+    def stats(self):
+        """Queue depth, in-flight calls (and how many of those were abandoned) and recent queue waits per priority class."""
+        with self._cond:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _, request in self._queue:
+                if not request.future.cancelled():
+                    depth[PRIORITY_NAMES[priority]] += 1
+
+            waits = {}
+            for priority, samples in self._waits.items():
+                ordered = sorted(samples)
+                waits[PRIORITY_NAMES[priority]] = {
+                    "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+                    "p95": ordered[math.ceil(0.95 * len(ordered)) - 1] if ordered else 0.0,
+                }
+            return {
+                "queue_depth": depth,
+                "in_flight": self._in_flight,
+                "abandoned_running": self._abandoned_running,
+                "wait_seconds": waits,
+                "throttled": self.bucket.throttled,
+                **self._counters,
+            }
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
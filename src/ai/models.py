@@ -0,0 +1,183 @@
+"""Per-task model profiles.
+
+Each kind of model call gets its own model, temperature and output-token
+cap. Small deterministic tasks go to a fast, cheap model; the analysis
+keeps the strong one. The token cap bounds how long a call can generate.
+Every field can be overridden per task from the environment, e.g.
+``LLM_MODEL_NAMING``, ``LLM_TEMPERATURE_COINS``, ``LLM_MAX_TOKENS_ANALYSIS``.
+
+With ``LLM_FAKE=1`` every task gets a ``FakeChatModel`` instead, so the app
+and benchmarks run offline.
+"""
+import os
+import re
+import time
+
+from langchain_core.messages import AIMessage
+
+from src.ai.gateway import ANALYSIS, FOLLOWUP, NAMING
+
+# Tasks, i.e. the kinds of model call the app makes.
+ANSWER = "analysis"
+COINS = "coins"
+FOLLOWUPS = "followup"
+CHAT_NAME = "naming"
+
+STRONG_MODEL = os.getenv("LLM_STRONG_MODEL", "gemini-2.5-flash")
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gemini-2.5-flash-lite")
+LLM_FAKE = os.getenv("LLM_FAKE", "").lower() in ("1", "true", "yes")
+# Client-side request timeout for calls made without a per-call ``timeout``.
+LLM_CLIENT_TIMEOUT_SECONDS = float(os.getenv("LLM_CLIENT_TIMEOUT_SECONDS", "60"))
+
+
+class ModelProfile:
+    __slots__ = ("task", "model", "temperature", "max_output_tokens", "priority")
+
+    def __init__(self, task, model, temperature, max_output_tokens, priority):
+        env = task.upper()
+        self.task = task
+        self.model = os.getenv(f"LLM_MODEL_{env}", model)
+        self.temperature = float(os.getenv(f"LLM_TEMPERATURE_{env}", temperature))
+        self.max_output_tokens = int(os.getenv(f"LLM_MAX_TOKENS_{env}", max_output_tokens))
+        # Gateway queue priority for this task's calls.
+        self.priority = priority
+
+    def __repr__(self):
+        return (
+            f"ModelProfile({self.task!r}, {self.model!r}, temperature={self.temperature}, "
+            f"max_output_tokens={self.max_output_tokens})"
+        )
+
+
+# gemini-2.5-flash thinks by default and its thinking tokens count toward
+# max_output_tokens, so the analysis cap covers the largest thinking budget
+# (24576) plus the answer; a tighter cap can cut the answer short or leave
+# it empty. Flash-lite doesn't think unless asked, so its caps are the
+# visible output. Coin extraction is on the critical path before any data
+# is fetched, so it gets the fast model and a cap that fits a short list of ids.
+ANSWER_THINKING_TOKENS = 24576
+ANSWER_TOKENS = 2048
+PROFILES = {
+    ANSWER: ModelProfile(ANSWER, STRONG_MODEL, 0.7, ANSWER_THINKING_TOKENS + ANSWER_TOKENS, ANALYSIS),
+    COINS: ModelProfile(COINS, FAST_MODEL, 0.0, 64, ANALYSIS),
+    FOLLOWUPS: ModelProfile(FOLLOWUPS, FAST_MODEL, 0.4, 160, FOLLOWUP),
+    CHAT_NAME: ModelProfile(CHAT_NAME, FAST_MODEL, 0.2, 24, NAMING),
+}
+
+
+def build_model(profile, api_key):
+    """A chat model client for ``profile``; None if it can't be built."""
+    if LLM_FAKE:
+        return FakeChatModel(profile)
+    if not api_key:
+        return None
+    try:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        return ChatGoogleGenerativeAI(
+            model=profile.model,
+            google_api_key=api_key,
+            temperature=profile.temperature,
+            max_output_tokens=profile.max_output_tokens,
+            timeout=LLM_CLIENT_TIMEOUT_SECONDS,
+        )
+    except Exception:
+        return None
+
+
+def build_models(api_key, profiles=None):
+    """``{task: model}`` for every profile, sharing one client per identical profile."""
+    clients = {}
+    models = {}
+    for task, profile in (profiles or PROFILES).items():
+        key = (profile.model, profile.temperature, profile.max_output_tokens)
+        if key not in clients:
+            clients[key] = build_model(profile, api_key)
+        models[task] = clients[key]
+    return models
+
+
+# Offline stand-in: (seconds to first token, output tokens per second) of
+# the visible answer. For gemini-2.5-flash the first-token time includes a
+# typical amount of thinking.
+FAKE_SPEEDS = {
+    "gemini-2.5-flash": (0.45, 180.0),
+    "gemini-2.5-flash-lite": (0.15, 450.0),
+}
+# Tokens a model would write per task if nothing capped it.
+FAKE_NATURAL_TOKENS = {ANSWER: 700, COINS: 12, FOLLOWUPS: 90, CHAT_NAME: 12}
+
+
+class FakeChatModel:
+    """Chat model that sleeps like the real one and returns canned text.
+
+    Latency is time-to-first-token plus generated tokens over throughput,
+    with generation stopped at the profile's ``max_output_tokens``.
+    ``FAKE_SPEEDS`` stand for gemini-2.5-flash and gemini-2.5-flash-lite.
+    Thinking is not modelled separately: on gemini-2.5-flash the cap also
+    covers thinking, so there it does not bound the visible answer the way
+    it does here. ``time_scale`` shrinks every sleep for quick benchmarks.
+    """
+
+    def __init__(self, profile, speeds=FAKE_SPEEDS, time_scale=1.0, natural_tokens=FAKE_NATURAL_TOKENS):
+        self.profile = profile
+        self.first_token, self.tokens_per_second = speeds.get(profile.model, (0.3, 250.0))
+        self.time_scale = time_scale
+        self.natural_tokens = natural_tokens
+        self.calls = 0
+        self.output_tokens = 0
+
+    def _task(self, prompt):
+        if "CoinGecko IDs" in prompt:
+            return COINS
+        if "follow-up questions" in prompt:
+            return FOLLOWUPS
+        if "session name" in prompt:
+            return CHAT_NAME
+        return ANSWER
+
+    def _reply(self, task, prompt):
+        if task == COINS:
+            # The question is on the first line; the rest is examples.
+            question = prompt.strip().splitlines()[0].lower() if prompt.strip() else ""
+            ids = [w for w in ("bitcoin", "ethereum", "solana", "cardano") if w in question]
+            return ",".join(ids or ["bitcoin", "ethereum"])
+        if task == FOLLOWUPS:
+            return "\n".join(
+                [
+                    "How does this compare with last week?",
+                    "What news could move the price next?",
+                    "Which support levels matter now?",
+                    "How correlated is it with the wider market?",
+                ]
+            )
+        if task == CHAT_NAME:
+            return "Bitcoin Market Analysis"
+        return "Prices and news point the same way today. " * (self.natural_tokens[ANSWER] // 8)
+
+    def invoke(self, messages, timeout=None):
+        prompt = messages[-1].content if messages else ""
+        task = self._task(prompt)
+        natural = self.natural_tokens[task]
+        tokens = min(natural, self.profile.max_output_tokens)
+        latency = (self.first_token + tokens / self.tokens_per_second) * self.time_scale
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"{self.profile.model} did not answer within {timeout:.1f}s")
+        time.sleep(latency)
+        self.calls += 1
+        self.output_tokens += tokens
+
+        text = self._reply(task, prompt)
+        if tokens < natural:
+            # Cut at the cap, as a real model would be.
+            words = re.findall(r"\S+\s*", text)
+            text = "".join(words[: max(1, len(words) * tokens // natural)])
+        return AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": len(prompt) // 4,
+                "output_tokens": tokens,
+                "total_tokens": len(prompt) // 4 + tokens,
+            },
+        )
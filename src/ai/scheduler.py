@@ -0,0 +1,214 @@
+"""Per-user admission for analyze requests.
+
+Each analyze costs several model and API calls, so one user clicking fast
+could take every slot. Requests join a per-user queue and are started
+round-robin across users, at most ``ANALYZE_CONCURRENCY`` at a time and
+each user no faster than their own token bucket allows.
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from src.resilience.ratelimit import TokenBucket
+
+ANALYZE_CONCURRENCY = int(os.getenv("ANALYZE_CONCURRENCY", "8"))
+USER_ANALYZE_PER_MINUTE = float(os.getenv("USER_ANALYZE_PER_MINUTE", "6"))
+USER_ANALYZE_BURST = int(os.getenv("USER_ANALYZE_BURST", "3"))
+# Requests a user may have running or queued at once; more are refused.
+USER_MAX_ACTIVE = int(os.getenv("USER_MAX_ACTIVE", "2"))
+ANALYZE_QUEUE_TIMEOUT = float(os.getenv("ANALYZE_QUEUE_TIMEOUT", "60"))
+# How often a waiting request re-checks for a slot and reports its position.
+QUEUE_POLL_SECONDS = 0.5
+MAX_USER_BUCKETS = 10_000
+WAIT_SAMPLES = 256
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+
+
+class UserThrottled(RuntimeError):
+    """Refused or timed out; ``retry_after`` is a hint in seconds."""
+
+    def __init__(self, message, retry_after=0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    __slots__ = ("user", "state", "started", "enqueued_at")
+
+    def __init__(self, user):
+        self.user = user
+        self.state = QUEUED
+        self.started = threading.Event()
+        self.enqueued_at = time.monotonic()
+
+
+class AnalyzeScheduler:
+    """Round-robin, per-user rate-limited admission to a fixed number of slots.
+
+    ``join`` queues a request (or raises ``UserThrottled``), ``wait_turn``
+    blocks until it may start and ``release`` frees its slot; ``turn`` wraps
+    all three. Each start takes a token from the user's bucket, and the
+    next user in the ring goes first whenever a slot frees up.
+    """
+
+    def __init__(
+        self,
+        concurrency=ANALYZE_CONCURRENCY,
+        per_minute=USER_ANALYZE_PER_MINUTE,
+        burst=USER_ANALYZE_BURST,
+        max_active=USER_MAX_ACTIVE,
+    ):
+        self.concurrency = concurrency
+        self.per_minute = per_minute
+        self.burst = burst
+        self.max_active = max_active
+        # Users with queued tickets, in round-robin order.
+        self._queues = OrderedDict()
+        self._buckets = OrderedDict()
+        self._active = {}
+        self._running = 0
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self._counters = {"started": 0, "refused": 0, "timed_out": 0}
+        self._lock = threading.Lock()
+
+    def _bucket(self, user):
+        bucket = self._buckets.get(user)
+        if bucket is None:
+            bucket = self._buckets[user] = TokenBucket(self.per_minute / 60.0, self.burst)
+            if len(self._buckets) > MAX_USER_BUCKETS:
+                idle = next((u for u in self._buckets if u not in self._active), None)
+                if idle is not None:
+                    del self._buckets[idle]
+        else:
+            self._buckets.move_to_end(user)
+        return bucket
+
+    def join(self, user) -> Ticket:
+        with self._lock:
+            active = self._active.get(user, 0)
+            if active >= self.max_active:
+                self._counters["refused"] += 1
+                raise UserThrottled(
+                    f"{active} requests already in progress; wait for one to finish",
+                    retry_after=self._bucket(user).wait_time() or QUEUE_POLL_SECONDS,
+                )
+            ticket = Ticket(user)
+            self._active[user] = active + 1
+            self._queues.setdefault(user, deque()).append(ticket)
+            self._dispatch()
+            return ticket
+
+    def _dispatch(self):
+        while self._running < self.concurrency and self._queues:
+            for user, tickets in self._queues.items():
+                if self._bucket(user).try_acquire() == 0:
+                    break
+            else:
+                # Everyone queued is over their rate; a waiter polls again shortly.
+                return
+            ticket = tickets.popleft()
+            if tickets:
+                self._queues.move_to_end(user)
+            else:
+                del self._queues[user]
+            ticket.state = RUNNING
+            self._running += 1
+            self._counters["started"] += 1
+            self._waits.append(time.monotonic() - ticket.enqueued_at)
+            ticket.started.set()
+
+    def status(self, ticket):
+        """``(position, seconds)``: place in line (0 once started) and time until
+        the user's rate limit allows their next start."""
+        with self._lock:
+            if ticket.state != QUEUED:
+                return 0, 0.0
+            tickets = self._queues[ticket.user]
+            k = tickets.index(ticket)
+            ahead = k
+            before_us = True
+            for user, queued in self._queues.items():
+                if user == ticket.user:
+                    before_us = False
+                    continue
+                ahead += min(len(queued), k + 1 if before_us else k)
+            return ahead + 1, self._bucket(ticket.user).wait_time()
+
+    def wait_turn(self, ticket, timeout=ANALYZE_QUEUE_TIMEOUT, on_wait=None):
+        """Block until ``ticket`` may start; ``on_wait(position, seconds)`` is
+        called while it waits. Raises ``UserThrottled`` after ``timeout``."""
+        deadline = time.monotonic() + timeout
+        while not ticket.started.wait(QUEUE_POLL_SECONDS):
+            with self._lock:
+                self._dispatch()
+            if ticket.started.is_set():
+                break
+            if time.monotonic() >= deadline:
+                with self._lock:
+                    self._counters["timed_out"] += 1
+                raise UserThrottled(f"still queued after {timeout:.0f}s; the server is busy")
+            if on_wait is not None:
+                on_wait(*self.status(ticket))
+
+    def release(self, ticket):
+        """Free the ticket's slot, or withdraw it if it never started."""
+        with self._lock:
+            if ticket.state == DONE:
+                return
+            if ticket.state == RUNNING:
+                self._running -= 1
+            else:
+                tickets = self._queues.get(ticket.user)
+                if tickets is not None and ticket in tickets:
+                    tickets.remove(ticket)
+                    if not tickets:
+                        del self._queues[ticket.user]
+            ticket.state = DONE
+            left = self._active[ticket.user] - 1
+            if left:
+                self._active[ticket.user] = left
+            else:
+                del self._active[ticket.user]
+            self._dispatch()
+
+    @contextmanager
+    def turn(self, user, timeout=ANALYZE_QUEUE_TIMEOUT, on_wait=None):
+        """Hold one of the user's analyze slots for the ``with`` block."""
+        ticket = self.join(user)
+        try:
+            self.wait_turn(ticket, timeout, on_wait)
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self):
+        with self._lock:
+            ordered = sorted(self._waits)
+            return {
+                "running": self._running,
+                "queued": sum(len(tickets) for tickets in self._queues.values()),
+                "users_queued": len(self._queues),
+                "wait_seconds": {
+                    "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+                    "p95": ordered[math.ceil(0.95 * len(ordered)) - 1] if ordered else 0.0,
+                },
+                **self._counters,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_analyze_scheduler() -> AnalyzeScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = AnalyzeScheduler()
+        return _scheduler
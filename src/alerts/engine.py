@@ -0,0 +1,77 @@
+import numpy as np
+
+# Rule kinds: which quote field they read and which side of the threshold fires.
+KINDS = {
+    "price_above": (0, 1.0),
+    "price_below": (0, -1.0),
+    "change_above": (1, 1.0),
+    "change_below": (1, -1.0),
+}
+KIND_LABELS = {
+    "price_above": "price above",
+    "price_below": "price below",
+    "change_above": "24h change above (%)",
+    "change_below": "24h change below (%)",
+}
+PRICE, CHANGE = 0, 1
+
+
+class RuleSet:
+    """Every active alert rule as parallel arrays, one row per rule.
+
+    ``coins`` lists the distinct coin ids; ``coin_index`` maps each rule to
+    its row in the quote matrix passed to ``evaluate``.
+    """
+
+    __slots__ = ("rule_ids", "user_ids", "coins", "coin_index", "field", "direction", "threshold", "armed")
+
+    def __init__(self, rule_ids, user_ids, coin_ids, kinds, thresholds, armed):
+        n = len(rule_ids)
+        self.rule_ids = np.asarray(rule_ids, dtype=np.int64)
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        positions = {}
+        self.coin_index = np.fromiter(
+            (positions.setdefault(coin_id, len(positions)) for coin_id in coin_ids), np.intp, count=n
+        )
+        self.coins = list(positions)
+        self.field = np.fromiter((KINDS[kind][0] for kind in kinds), np.intp, count=n)
+        self.direction = np.fromiter((KINDS[kind][1] for kind in kinds), np.float64, count=n)
+        self.threshold = np.asarray(thresholds, dtype=np.float64)
+        self.armed = np.asarray(armed, dtype=bool)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """From ``(id, user_id, coin_id, kind, threshold, armed)`` rows."""
+        columns = list(zip(*rows)) if rows else [()] * 6
+        return cls(*columns)
+
+    def __len__(self):
+        return len(self.rule_ids)
+
+    def quote_matrix(self, prices):
+        """``(len(coins), 2)`` array of price and 24h change; NaN for coins without a quote."""
+        by_id = {coin["id"]: coin for coin in prices}
+        quotes = np.full((len(self.coins), 2), np.nan)
+        for row, coin_id in enumerate(self.coins):
+            coin = by_id.get(coin_id)
+            if coin is not None:
+                change = coin["change"]
+                quotes[row] = (coin["price"], np.nan if change is None else change)
+        return quotes
+
+
+def evaluate(rules, quotes):
+    """Evaluate every rule against ``quotes`` in one pass.
+
+    Returns ``(fired, values, armed)``: a mask of rules that crossed their
+    threshold, the value each rule saw, and the new armed state. A rule
+    fires when its condition holds and it was armed, and re-arms once the
+    condition stops holding. Rules whose coin has no quote keep their state.
+    """
+    values = quotes[rules.coin_index, rules.field]
+    known = ~np.isnan(values)
+    with np.errstate(invalid="ignore"):
+        holds = rules.direction * (values - rules.threshold) > 0
+    fired = holds & rules.armed
+    armed = np.where(known, ~holds, rules.armed)
+    return fired, values, armed
@@ -0,0 +1,146 @@
+"""Background evaluation of price alert rules.
+
+Every ``ALERT_POLL_SECONDS`` the poller fetches prices for the union of all
+watched coins (in chunked, rate-limited calls), evaluates every rule in one
+vectorized pass and stores the alerts that fired. Run it as its own
+service; app processes only start one when ``ALERT_POLL_IN_APP`` is set.
+Any number of pollers may run; an advisory lock lets one of them work per
+tick.
+
+    python -m src.alerts.poller          # poll in the foreground
+    python -m src.alerts.poller once     # a single tick
+"""
+import atexit
+import logging
+import os
+import sys
+import threading
+import time
+
+from src.alerts.engine import evaluate
+from src.alerts.store import load_rules, record_evaluation, watched_coins
+from src.database.connection import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+ALERT_POLL_SECONDS = float(os.getenv("ALERT_POLL_SECONDS", "60"))
+# Off by default so app processes don't each run a polling thread.
+ALERT_POLL_IN_APP = os.getenv("ALERT_POLL_IN_APP", "").lower() in ("1", "true", "yes")
+_LOCK_KEY = "alert-poller"
+
+
+def _shared_prices(coin_ids):
+    from src.ai.analyzer import get_shared_analyzer
+
+    return get_shared_analyzer().get_prices(coin_ids)
+
+
+class AlertPoller:
+    """Thread that runs ``poll_once`` every ``interval`` seconds."""
+
+    def __init__(self, interval=ALERT_POLL_SECONDS, fetch_prices=_shared_prices):
+        self.interval = interval
+        self.fetch_prices = fetch_prices
+        self.last_poll = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="alert-poller", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def poll_once(self):
+        """One tick. Returns its stats, or None if another process holds the lock."""
+        started = time.perf_counter()
+        conn = get_db_connection()
+        conn.autocommit = True
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (_LOCK_KEY,))
+            if not cur.fetchone()[0]:
+                return None
+            try:
+                coins = watched_coins(cur)
+                rules = load_rules(cur)
+                prices = self.fetch_prices(",".join(coins)) if coins else []
+                fetched = time.perf_counter()
+
+                quotes = rules.quote_matrix(prices)
+                fired, values, armed = evaluate(rules, quotes)
+                evaluated = time.perf_counter()
+
+                conn.autocommit = False
+                try:
+                    events = record_evaluation(cur, rules, fired, values, armed)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    conn.autocommit = True
+            finally:
+                cur.execute("SELECT pg_advisory_unlock(hashtext(%s))", (_LOCK_KEY,))
+        finally:
+            cur.close()
+            conn.close()
+
+        self.last_poll = {
+            "coins": len(coins),
+            "quotes": len(prices),
+            "rules": len(rules),
+            "fired": len(events),
+            "fetch_seconds": round(fetched - started, 3),
+            "evaluate_seconds": round(evaluated - fetched, 6),
+            "at": time.time(),
+        }
+        logger.info("Alert poll: %s", self.last_poll)
+        return self.last_poll
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception("Alert poll failed")
+
+    def close(self):
+        self._stop.set()
+
+
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def get_alert_poller():
+    """Return the per-process poller, starting it on first use.
+
+    Returns None when ``ALERT_POLL_SECONDS`` is 0 or less (polling disabled).
+    """
+    global _poller
+    if ALERT_POLL_SECONDS <= 0:
+        return None
+    with _poller_lock:
+        if _poller is None:
+            _poller = AlertPoller().start()
+            atexit.register(_poller.close)
+        return _poller
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(level=logging.INFO)
+    if argv[:1] == ["once"]:
+        print(AlertPoller().poll_once())
+        return
+    poller = get_alert_poller()
+    if poller is None:
+        sys.exit("ALERT_POLL_SECONDS must be positive")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        poller.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import psycopg2.extras
+
+from src.alerts.engine import KINDS, RuleSet
+from src.database.connection import get_db_connection, get_read_connection, mark_write, user_key
+
+MAX_UNSEEN_ALERTS = 20
+
+
+def add_watch(user_id, coin_id):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "INSERT INTO watchlists (user_id, coin_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
+            (user_id, coin_id.strip().lower()),
+        )
+        conn.commit()
+        mark_write(user_key(user_id))
+    finally:
+        cur.close()
+        conn.close()
+
+
+def remove_watch(user_id, coin_id):
+    """Stop watching ``coin_id``; its alert rules are deleted with it."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM watchlists WHERE user_id = %s AND coin_id = %s", (user_id, coin_id))
+        conn.commit()
+        mark_write(user_key(user_id))
+    finally:
+        cur.close()
+        conn.close()
+
+
+def add_alert_rule(user_id, coin_id, kind, threshold):
+    """Add a rule, watching the coin if it isn't already. Returns the rule id."""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown alert kind: {kind}")
+    coin_id = coin_id.strip().lower()
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "INSERT INTO watchlists (user_id, coin_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
+            (user_id, coin_id),
+        )
+        cur.execute(
+            """
+            INSERT INTO alert_rules (user_id, coin_id, kind, threshold)
+            VALUES (%s, %s, %s, %s) RETURNING id
+            """,
+            (user_id, coin_id, kind, float(threshold)),
+        )
+        rule_id = cur.fetchone()[0]
+        conn.commit()
+        mark_write(user_key(user_id))
+        return rule_id
+    finally:
+        cur.close()
+        conn.close()
+
+
+def delete_alert_rule(user_id, rule_id):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM alert_rules WHERE id = %s AND user_id = %s", (rule_id, user_id))
+        conn.commit()
+        mark_write(user_key(user_id))
+    finally:
+        cur.close()
+        conn.close()
+
+
+def get_watchlist(user_id):
+    """``[(coin_id, [(rule_id, kind, threshold), ...]), ...]`` for the user."""
+    conn = get_read_connection(user_key(user_id))
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT w.coin_id, r.id, r.kind, r.threshold
+            FROM watchlists w
+            LEFT JOIN alert_rules r ON r.user_id = w.user_id AND r.coin_id = w.coin_id
+            WHERE w.user_id = %s
+            ORDER BY w.added_at, w.coin_id, r.id
+            """,
+            (user_id,),
+        )
+        watchlist = {}
+        for coin_id, rule_id, kind, threshold in cur.fetchall():
+            rules = watchlist.setdefault(coin_id, [])
+            if rule_id is not None:
+                rules.append((rule_id, kind, threshold))
+        return list(watchlist.items())
+    finally:
+        cur.close()
+        conn.close()
+
+
+def watched_coins(cur):
+    cur.execute("SELECT DISTINCT coin_id FROM watchlists ORDER BY coin_id")
+    return [row[0] for row in cur.fetchall()]
+
+
+def load_rules(cur) -> RuleSet:
+    cur.execute("SELECT id, user_id, coin_id, kind, threshold, armed FROM alert_rules")
+    return RuleSet.from_rows(cur.fetchall())
+
+
+def record_evaluation(cur, rules, fired, values, armed):
+    """Store alert events for fired rules and any changed armed flags."""
+    events = [
+        (int(rule_id), int(user_id), float(value))
+        for rule_id, user_id, value in zip(rules.rule_ids[fired], rules.user_ids[fired], values[fired])
+    ]
+    if events:
+        # Joined so rules deleted since they were loaded are skipped.
+        psycopg2.extras.execute_values(
+            cur,
+            """
+            INSERT INTO alert_events (rule_id, user_id, value)
+            SELECT v.rule_id, v.user_id, v.value
+            FROM (VALUES %s) AS v (rule_id, user_id, value)
+            JOIN alert_rules r ON r.id = v.rule_id
+            """,
+            events,
+            page_size=10_000,
+        )
+
+    changed = armed != rules.armed
+    if changed.any():
+        psycopg2.extras.execute_values(
+            cur,
+            """
+            UPDATE alert_rules r SET armed = v.armed
+            FROM (VALUES %s) AS v (id, armed)
+            WHERE r.id = v.id
+            """,
+            list(zip(rules.rule_ids[changed].tolist(), armed[changed].tolist())),
+            page_size=10_000,
+        )
+    return events
+
+
+def get_unseen_alerts(user_id, limit=MAX_UNSEEN_ALERTS):
+    # Alerts are written by the poller, never by this user's requests, so
+    # read-your-writes doesn't apply; read from the primary to avoid lag.
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+    try:
+        cur.execute(
+            """
+            SELECT e.id, r.coin_id, r.kind, r.threshold, e.value, e.triggered_at
+            FROM alert_events e
+            JOIN alert_rules r ON r.id = e.rule_id
+            WHERE e.user_id = %s AND NOT e.seen
+            ORDER BY e.triggered_at DESC
+            LIMIT %s
+            """,
+            (user_id, limit),
+        )
+        return cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def dismiss_alerts(user_id, event_ids=None):
+    """Mark the given alert events (or all of them) as seen."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        if event_ids is None:
+            cur.execute("UPDATE alert_events SET seen = true WHERE user_id = %s AND NOT seen", (user_id,))
+        else:
+            cur.execute(
+                "UPDATE alert_events SET seen = true WHERE user_id = %s AND id = ANY(%s)",
+                (user_id, list(event_ids)),
+            )
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
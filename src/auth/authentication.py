@@ -1,7 +1,7 @@
 import bcrypt
 import psycopg2
 
-from src.database.connection import get_db_connection
+from src.database.connection import get_db_connection, get_read_connection, mark_write, username_key
 
 
 def hash_password(password: str) -> str:
@@ -22,6 +22,7 @@ def create_user(username: str, password: str, email: str | None = None) -> bool:
             (username, hashed_pw, email),
         )
         conn.commit()
+        mark_write(username_key(username))
         return True
     except psycopg2.IntegrityError:
         conn.rollback()
@@ -32,7 +33,7 @@ def create_user(username: str, password: str, email: str | None = None) -> bool:
 
 
 def verify_user(username: str, password: str) -> bool:
-    conn = get_db_connection()
+    conn = get_read_connection(username_key(username))
     cur = conn.cursor()
     cur.execute("SELECT password FROM users WHERE username = %s", (username,))
     result = cur.fetchone()
@@ -45,7 +46,7 @@ def verify_user(username: str, password: str) -> bool:
 
 
 def get_user_id(username: str) -> int | None:
-    conn = get_db_connection()
+    conn = get_read_connection(username_key(username))
     cur = conn.cursor()
     cur.execute("SELECT id FROM users WHERE username = %s", (username,))
     result = cur.fetchone()
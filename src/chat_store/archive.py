@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import zlib
+from datetime import datetime, timedelta, timezone
+
+import psycopg2.extras
+
+from src.database.connection import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Sessions with no message newer than this are folded into chat_archives.
+COLD_SESSION_DAYS = int(os.getenv("COLD_SESSION_DAYS", "90"))
+ARCHIVE_BATCH = 200
+# Text indexed for search per archived session; tsvector has a 1 MB limit.
+MAX_SEARCH_CHARS = 200_000
+
+
+def cold_cutoff(days=COLD_SESSION_DAYS) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def pack_messages(rows) -> bytes:
+    """Compress ``(role, content, prices, news, created_at)`` rows into an archive payload.
+
+    ``prices`` and ``news`` stay in their stored text form.
+    """
+    return zlib.compress(
+        json.dumps(
+            [[role, content, prices, news, created_at.isoformat()]
+             for role, content, prices, news, created_at in rows],
+            ensure_ascii=False,
+        ).encode("utf-8")
+    )
+
+
+def unpack_messages(payload):
+    """Rows of an archive payload, oldest first, with ``created_at`` parsed."""
+    return [
+        (role, content, prices, news, datetime.fromisoformat(created_at))
+        for role, content, prices, news, created_at in json.loads(zlib.decompress(bytes(payload)))
+    ]
+
+
+def _archive_batch(cur, cutoff, batch_size):
+    cur.execute(
+        """
+        SELECT DISTINCT m.session_id FROM messages m
+        WHERE m.created_at < %(cutoff)s
+          AND NOT EXISTS (
+              SELECT 1 FROM messages n
+              WHERE n.session_id = m.session_id AND n.created_at >= %(cutoff)s
+          )
+        LIMIT %(limit)s
+        """,
+        {"cutoff": cutoff, "limit": batch_size},
+    )
+    session_ids = [row[0] for row in cur.fetchall()]
+    if not session_ids:
+        return 0
+
+    # Lock the sessions so a concurrent archiver or delete can't interleave.
+    cur.execute(
+        "SELECT id FROM chat_sessions WHERE id = ANY(%s) ORDER BY id FOR UPDATE",
+        (session_ids,),
+    )
+    session_ids = [row[0] for row in cur.fetchall()]
+
+    cur.execute(
+        "SELECT session_id, payload FROM chat_archives WHERE session_id = ANY(%s)",
+        (session_ids,),
+    )
+    rows = {session_id: unpack_messages(payload) for session_id, payload in cur.fetchall()}
+
+    cur.execute(
+        """
+        SELECT session_id, role, content, prices, news, created_at FROM messages
+        WHERE session_id = ANY(%s) AND created_at < %s
+        ORDER BY session_id, created_at, id
+        """,
+        (session_ids, cutoff),
+    )
+    for session_id, *row in cur.fetchall():
+        rows.setdefault(session_id, []).append(tuple(row))
+
+    values = [
+        (
+            session_id,
+            len(messages),
+            messages[0][4],
+            messages[-1][4],
+            psycopg2.Binary(pack_messages(messages)),
+            " ".join(m[1] for m in messages)[:MAX_SEARCH_CHARS],
+        )
+        for session_id, messages in rows.items()
+        if messages
+    ]
+    psycopg2.extras.execute_values(
+        cur,
+        """
+        INSERT INTO chat_archives
+            (session_id, message_count, first_message_at, last_message_at, payload, search_vector)
+        VALUES %s
+        ON CONFLICT (session_id) DO UPDATE SET
+            message_count = EXCLUDED.message_count,
+            first_message_at = EXCLUDED.first_message_at,
+            last_message_at = EXCLUDED.last_message_at,
+            payload = EXCLUDED.payload,
+            search_vector = EXCLUDED.search_vector,
+            archived_at = now()
+        """,
+        values,
+        template="(%s, %s, %s, %s, %s, to_tsvector('english', %s))",
+    )
+    cur.execute(
+        "DELETE FROM messages WHERE session_id = ANY(%s) AND created_at < %s",
+        (session_ids, cutoff),
+    )
+    return len(values)
+
+
+def archive_cold_sessions(days=COLD_SESSION_DAYS, batch_size=ARCHIVE_BATCH) -> int:
+    """Fold sessions untouched for ``days`` into one compressed ``chat_archives`` row each.
+
+    A session that was archived and then continued is merged into its
+    existing archive the next time it goes cold. Each batch commits on its
+    own. Returns the number of sessions archived.
+    """
+    cutoff = cold_cutoff(days)
+    archived = 0
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        while True:
+            try:
+                count = _archive_batch(cur, cutoff, batch_size)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            archived += count
+            if count < batch_size:
+                return archived
+    finally:
+        logger.info("Archived %d cold sessions", archived)
+        cur.close()
+        conn.close()
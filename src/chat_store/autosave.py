@@ -0,0 +1,312 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import psycopg2.extras
+
+from src.chat_store.store import dump_blob
+from src.database.connection import get_db_connection, mark_write, session_key, user_key
+
+logger = logging.getLogger(__name__)
+
+DEBOUNCE_SECONDS = float(os.getenv("AUTOSAVE_DEBOUNCE_SECONDS", "0.5"))
+MAX_BATCH = int(os.getenv("AUTOSAVE_MAX_BATCH", "500"))
+MAX_RETRIES = 5
+# Chat keys whose session id is remembered; the least recently written go first.
+MAX_SESSIONS = 10_000
+SHUTDOWN_TIMEOUT = 15.0
+
+_STOP = object()
+
+
+class _Write:
+    __slots__ = ("chat_key", "user_id", "session_name", "rows", "rename", "session_id", "attempts")
+
+    def __init__(self, chat_key, user_id, session_name, rows, rename=False, session_id=None):
+        self.chat_key = chat_key
+        self.user_id = user_id
+        self.session_name = session_name
+        self.rows = rows
+        self.rename = rename
+        self.session_id = session_id
+        self.attempts = 0
+
+
+def _message_rows(messages):
+    """Serialize messages on the caller's thread so later edits can't leak in."""
+    base = datetime.now(timezone.utc)
+    rows = []
+    for i, msg in enumerate(messages):
+        prices_str = dump_blob(msg.get("prices", [])) if "prices" in msg else None
+        news_str = dump_blob(msg.get("news", [])) if "news" in msg else None
+        # Distinct timestamps keep load_chat_session's ORDER BY created_at stable.
+        created_at = base + timedelta(microseconds=i)
+        rows.append((msg["role"], msg["content"], prices_str, news_str, created_at))
+    return rows
+
+
+class ChatAutosaver:
+    """Write-behind queue that batches chat message inserts on a worker thread.
+
+    Callers only ever enqueue; the first write for an unknown chat creates its
+    ``chat_sessions`` row, and renames are applied in queue order after it.
+    Each chat in a batch is written under its own savepoint, so a chat whose
+    writes keep failing is retried and finally dropped on its own. Everything
+    still queued is written before the process exits.
+    """
+
+    def __init__(self, debounce=DEBOUNCE_SECONDS, max_batch=MAX_BATCH):
+        self.debounce = debounce
+        self.max_batch = max_batch
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._sessions = OrderedDict()
+        self._pending = {}
+        self._flushing = threading.Event()
+        self._closed = False
+
+        self._thread = threading.Thread(
+            target=self._run, name="chat-autosave", daemon=True
+        )
+        self._thread.start()
+
+    def register(self, chat_key, session_id):
+        """Attach an already persisted session to a chat key."""
+        with self._lock:
+            self._remember(chat_key, session_id)
+
+    def session_id(self, chat_key):
+        with self._lock:
+            return self._sessions.get(chat_key)
+
+    def _remember(self, chat_key, session_id):
+        self._sessions[chat_key] = session_id
+        self._sessions.move_to_end(chat_key)
+        while len(self._sessions) > MAX_SESSIONS:
+            self._sessions.popitem(last=False)
+
+    def is_pending(self, chat_key) -> bool:
+        with self._lock:
+            return self._pending.get(chat_key, 0) > 0
+
+    def enqueue(self, chat_key, user_id, messages, session_name=None, session_id=None):
+        """Queue ``messages`` for insertion. Never blocks on the database.
+
+        ``session_name`` is only used if the chat has no session yet.
+        ``session_id`` is the chat's session if the caller already knows it,
+        in case this autosaver has since forgotten the chat key.
+        """
+        if not messages:
+            return
+        self._put(
+            _Write(chat_key, user_id, session_name, _message_rows(messages), session_id=session_id)
+        )
+
+    def rename(self, chat_key, session_name):
+        """Queue a new name for the chat's session, once it has been created."""
+        self._put(_Write(chat_key, None, session_name, [], rename=True))
+
+    def _put(self, write):
+        with self._lock:
+            if self._closed:
+                logger.warning("Autosave is closed; dropping a write for %s", write.chat_key)
+                return
+            self._pending[write.chat_key] = self._pending.get(write.chat_key, 0) + 1
+        self._queue.put(write)
+
+    def flush(self, timeout=None) -> bool:
+        """Block until everything queued so far is written (or dropped)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._flushing.set()
+        try:
+            with self._idle:
+                while any(self._pending.values()):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._idle.wait(remaining)
+            return True
+        finally:
+            self._flushing.clear()
+
+    def close(self, timeout=SHUTDOWN_TIMEOUT) -> bool:
+        with self._lock:
+            if self._closed:
+                return True
+            self._closed = True
+        self._flushing.set()
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error("Autosave did not drain within %.1fs", timeout)
+            return False
+        return True
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.debounce
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if self._flushing.is_set():
+                    remaining = 0
+                try:
+                    nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stopping = True
+                    break
+                batch.append(nxt)
+
+            self._write_with_retry(batch)
+
+    def _write_with_retry(self, batch):
+        while batch:
+            try:
+                failed = self._write(batch)
+            except Exception as e:
+                # The transaction itself failed; every chat in it is retried.
+                failed = {w.chat_key: e for w in batch}
+
+            finished, retry = [], []
+            for w in batch:
+                if w.chat_key in failed:
+                    w.attempts += 1
+                    if w.attempts < MAX_RETRIES:
+                        retry.append(w)
+                        continue
+                finished.append(w)
+            for chat_key, e in failed.items():
+                dropped = sum(1 for w in finished if w.chat_key == chat_key)
+                if dropped:
+                    logger.error("Autosave dropped %d writes for %s: %r", dropped, chat_key, e)
+                else:
+                    logger.warning("Autosave write for %s failed: %r", chat_key, e)
+            self._done(finished)
+
+            batch = retry
+            if batch:
+                time.sleep(min(0.2 * 2 ** max(w.attempts for w in batch), 5.0))
+
+    def _write(self, batch):
+        """Write ``batch`` in one transaction with a savepoint per chat.
+
+        Returns ``{chat_key: error}`` for the chats that were rolled back;
+        the rest is committed.
+        """
+        by_chat = {}
+        for w in batch:
+            by_chat.setdefault(w.chat_key, []).append(w)
+
+        conn = get_db_connection()
+        cur = conn.cursor()
+        sessions = {}
+        written = set()
+        failed = {}
+        try:
+            for chat_key, writes in by_chat.items():
+                chat_written = set()
+                cur.execute("SAVEPOINT chat_write")
+                try:
+                    session_id = self._write_chat(cur, chat_key, writes, chat_written)
+                except Exception as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT chat_write")
+                    failed[chat_key] = e
+                    continue
+                cur.execute("RELEASE SAVEPOINT chat_write")
+                written |= chat_written
+                if session_id is not None:
+                    sessions[chat_key] = session_id
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+        mark_write(*written)
+        with self._lock:
+            for chat_key, session_id in sessions.items():
+                self._remember(chat_key, session_id)
+        return failed
+
+    def _write_chat(self, cur, chat_key, writes, written):
+        """Apply one chat's writes; returns its session id, or None if it has none."""
+        inserts = [w for w in writes if not w.rename]
+        renames = [w.session_name for w in writes if w.rename]
+        name = renames[-1] if renames else None
+
+        session_id = self.session_id(chat_key) or next(
+            (w.session_id for w in inserts if w.session_id is not None), None
+        )
+        if session_id is None and inserts:
+            first = inserts[0]
+            cur.execute(
+                "INSERT INTO chat_sessions (user_id, session_name) VALUES (%s, %s) RETURNING id",
+                (
+                    first.user_id,
+                    name or first.session_name or f"Chat_{datetime.now().strftime('%Y-%m-%d %H:%M')}",
+                ),
+            )
+            session_id = cur.fetchone()[0]
+            name = None
+            written.add(user_key(first.user_id))
+
+        if inserts:
+            written.add(session_key(session_id))
+            rows = [(session_id, *row) for w in inserts for row in w.rows]
+            psycopg2.extras.execute_values(
+                cur,
+                """
+                INSERT INTO messages (session_id, role, content, prices, news, created_at)
+                VALUES %s
+                """,
+                rows,
+                page_size=self.max_batch,
+            )
+
+        # Without a session its first write was dropped, so there is nothing to rename.
+        if name is not None and session_id is not None:
+            cur.execute(
+                "UPDATE chat_sessions SET session_name = %s WHERE id = %s RETURNING user_id",
+                (name, session_id),
+            )
+            for (owner,) in cur.fetchall():
+                written.add(user_key(owner))
+        return session_id
+
+    def _done(self, batch):
+        with self._idle:
+            for w in batch:
+                self._pending[w.chat_key] -= 1
+                if self._pending[w.chat_key] <= 0:
+                    del self._pending[w.chat_key]
+            self._idle.notify_all()
+
+
+_autosaver = None
+_autosaver_lock = threading.Lock()
+
+
+def get_autosaver() -> ChatAutosaver:
+    """Return the per-process autosaver, starting it on first use."""
+    global _autosaver
+    with _autosaver_lock:
+        if _autosaver is None:
+            _autosaver = ChatAutosaver()
+            atexit.register(_autosaver.close)
+        return _autosaver
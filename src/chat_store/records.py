@@ -0,0 +1,154 @@
+"""Compact chat message records for session state.
+
+Assistant messages keep their prices and news as tuples of interned
+records: identical quotes and articles are stored once per process and
+shared by every message and session that shows them. Records still answer
+``msg["role"]`` and ``msg.get("prices")`` so code written against the
+old message dicts keeps working.
+"""
+import sys
+import threading
+import weakref
+from datetime import datetime, timezone
+
+
+class _Interned:
+    """Immutable slotted record, read like a dict."""
+
+    __slots__ = ("key", "__weakref__")
+    fields = ()
+
+    def __init__(self, values):
+        set_field = object.__setattr__
+        set_field(self, "key", values)
+        for name, value in zip(self.fields, values):
+            set_field(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is shared and read-only")
+
+    def __getitem__(self, name):
+        if name not in self.fields:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def get(self, name, default=None):
+        return getattr(self, name) if name in self.fields else default
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.fields}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.as_dict()!r})"
+
+
+class Quote(_Interned):
+    __slots__ = ("id", "name", "symbol", "price", "change")
+    fields = __slots__
+
+
+class Article(_Interned):
+    __slots__ = ("id", "title", "source", "url", "sentiment", "currencies", "score")
+    fields = __slots__
+
+
+def _intern_str(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class _InternTable:
+    """Process-wide store of records keyed by their field values.
+
+    Entries live only as long as some message references them.
+    """
+
+    def __init__(self, cls, shared_strings=()):
+        self.cls = cls
+        self.shared_strings = frozenset(shared_strings)
+        self._records = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def _values(self, item):
+        values = []
+        for name in self.cls.fields:
+            value = item.get(name)
+            if isinstance(value, list):
+                value = tuple(_intern_str(v) for v in value)
+            elif name in self.shared_strings:
+                value = _intern_str(value)
+            values.append(value)
+        return tuple(values)
+
+    def intern(self, item):
+        if isinstance(item, self.cls):
+            return item
+        key = self._values(item)
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                record = self._records[key] = self.cls(key)
+            return record
+
+    def __len__(self):
+        return len(self._records)
+
+
+_quotes = _InternTable(Quote, shared_strings=("id", "name", "symbol"))
+_articles = _InternTable(Article, shared_strings=("source",))
+
+
+def intern_prices(prices):
+    return tuple(_quotes.intern(coin) for coin in prices)
+
+
+def intern_news(news):
+    return tuple(_articles.intern(item) for item in news)
+
+
+def interned_counts():
+    """Number of distinct quotes and articles currently held."""
+    return {"quotes": len(_quotes), "articles": len(_articles)}
+
+
+class ChatMessage:
+    """One chat message; ``prices``/``news`` are None on user messages.
+
+    ``at`` is when the message was written (now, for new messages).
+    """
+
+    __slots__ = ("role", "content", "prices", "news", "at")
+    fields = ("role", "content", "prices", "news")
+
+    def __init__(self, role, content, prices=None, news=None, at=None):
+        self.role = role
+        self.content = content
+        self.prices = intern_prices(prices) if prices is not None else None
+        self.news = intern_news(news) if news is not None else None
+        self.at = at or datetime.now(timezone.utc)
+
+    @classmethod
+    def from_dict(cls, message):
+        return cls(message["role"], message["content"], message.get("prices"), message.get("news"))
+
+    def __getitem__(self, name):
+        if name not in self.fields:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __contains__(self, name):
+        return name in self.fields and getattr(self, name) is not None
+
+    def get(self, name, default=None):
+        return getattr(self, name) if name in self else default
+
+    def __repr__(self):
+        return f"ChatMessage({self.role!r}, {self.content[:40]!r})"
+
+
+def last_quotes(messages):
+    """``{coin_id: (at, price)}`` from the latest message quoting each coin."""
+    seen = {}
+    for message in messages:
+        for quote in message.prices or ():
+            seen[quote.id] = (message.at, quote.price)
+    return seen
@@ -1,113 +1,65 @@
-import re
+import ast
+import json
 from datetime import datetime
 
 import psycopg2
 import psycopg2.extras
-from langchain_core.messages import HumanMessage
 
-from src.database.connection import get_db_connection
+from src.chat_store.archive import unpack_messages
+from src.chat_store.records import ChatMessage
+from src.database.connection import (
+    get_db_connection,
+    get_read_connection,
+    mark_write,
+    session_key,
+    user_key,
+)
 
 
-def generate_chat_name(messages, analyzer) -> str:
-    """Generate a meaningful chat name using AI based on conversation content"""
-    if not messages or len(messages) < 2:
-        return f"Chat_{datetime.now().strftime('%Y-%m-%d %H:%M')}"
-
-    first_user_message = ""
-    for msg in messages:
-        if msg["role"] == "user":
-            first_user_message = msg["content"]
-            break
+def _json_default(value):
+    # Interned quote and article records serialize as the dicts they came from.
+    as_dict = getattr(value, "as_dict", None)
+    return as_dict() if as_dict is not None else str(value)
 
-    if not first_user_message:
-        return f"Chat_{datetime.now().strftime('%Y-%m-%d %H:%M')}"
 
-    prompt = f"""Based on this cryptocurrency question: "{first_user_message}"
+def dump_blob(value) -> str:
+    """Serialize a message's prices or news list for the ``messages`` table."""
+    return json.dumps(value, ensure_ascii=False, default=_json_default)
 
-Generate a short, descriptive chat session name (max 4-5 words) that captures the main topic.
-Examples:
-- "Bitcoin price analysis" -> "Bitcoin Market Analysis"
-- "Ethereum news and price" -> "Ethereum News Update" 
-- "NEAR protocol developments" -> "NEAR Protocol Review"
-- "General crypto market" -> "Market Overview"
 
-Return only the session name, no quotes or explanations:"""
+def load_blob(text):
+    """Parse a stored prices or news list.
 
+    Rows written before the JSON format hold ``str(list)``; those are read
+    with ``ast.literal_eval``, which is slower but never runs code.
+    """
     try:
-        response = analyzer.ai.invoke([HumanMessage(content=prompt)])
-        name = response.content.strip()
-        name = re.sub(r'["\']', "", name)
-        if len(name) > 50:
-            name = name[:47] + "..."
-        return name if name else f"Chat_{datetime.now().strftime('%Y-%m-%d %H:%M')}"
-    except Exception:
-        return f"Chat_{datetime.now().strftime('%Y-%m-%d %H:%M')}"
-
-
-def save_chat_session(user_id, session_name, messages):
-    conn = get_db_connection()
-    cur = conn.cursor()
-
+        return json.loads(text)
+    except ValueError:
+        pass
     try:
-        cur.execute(
-            "INSERT INTO chat_sessions (user_id, session_name) VALUES (%s, %s) RETURNING id",
-            (user_id, session_name),
-        )
-        session_id = cur.fetchone()[0]
-
-        for msg in messages:
-            prices_str = str(msg.get("prices", [])) if "prices" in msg else None
-            news_str = str(msg.get("news", [])) if "news" in msg else None
-
-            cur.execute(
-                """
-                INSERT INTO messages (session_id, role, content, prices, news)
-                VALUES (%s, %s, %s, %s, %s)
-                """,
-                (session_id, msg["role"], msg["content"], prices_str, news_str),
-            )
-
-        conn.commit()
-        return session_id
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        cur.close()
-        conn.close()
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return []
 
 
-def update_chat_session(session_id, messages) -> bool:
-    conn = get_db_connection()
-    cur = conn.cursor()
+def _first_question(messages):
+    for msg in messages:
+        if msg["role"] == "user":
+            return msg["content"]
+    return ""
 
-    try:
-        cur.execute("DELETE FROM messages WHERE session_id = %s", (session_id,))
-
-        for msg in messages:
-            prices_str = str(msg.get("prices", [])) if "prices" in msg else None
-            news_str = str(msg.get("news", [])) if "news" in msg else None
-
-            cur.execute(
-                """
-                INSERT INTO messages (session_id, role, content, prices, news)
-                VALUES (%s, %s, %s, %s, %s)
-                """,
-                (session_id, msg["role"], msg["content"], prices_str, news_str),
-            )
 
-        conn.commit()
-        return True
-    except Exception:
-        conn.rollback()
-        return False
-    finally:
-        cur.close()
-        conn.close()
+def provisional_chat_name(messages) -> str:
+    """Name a chat after its first question until the AI name is ready"""
+    name = " ".join(_first_question(messages).split())
+    if not name:
+        return f"Chat_{datetime.now().strftime('%Y-%m-%d %H:%M')}"
+    return name if len(name) <= 50 else name[:47] + "..."
 
 
 def get_user_sessions(user_id):
-    conn = get_db_connection()
+    conn = get_read_connection(user_key(user_id))
     cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
     cur.execute(
         """
@@ -125,49 +77,131 @@ def get_user_sessions(user_id):
 
 
 def load_chat_session(session_id):
-    conn = get_db_connection()
+    conn = get_read_connection(session_key(session_id))
     cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
 
     try:
-        cur.execute("SELECT session_name FROM chat_sessions WHERE id = %s", (session_id,))
+        cur.execute(
+            """
+            SELECT s.session_name, a.payload
+            FROM chat_sessions s
+            LEFT JOIN chat_archives a ON a.session_id = s.id
+            WHERE s.id = %s
+            """,
+            (session_id,),
+        )
         session_result = cur.fetchone()
         if not session_result:
             return None, []
 
         session_name = session_result["session_name"]
 
+        # Archived messages are older than any live ones, so they come first.
+        rows = []
+        if session_result["payload"] is not None:
+            rows.extend(unpack_messages(session_result["payload"]))
+
         cur.execute(
             """
-            SELECT role, content, prices, news
+            SELECT role, content, prices, news, created_at
             FROM messages
             WHERE session_id = %s
-            ORDER BY created_at ASC
+            ORDER BY created_at ASC, id ASC
             """,
             (session_id,),
         )
+        rows.extend(cur.fetchall())
+
+        messages = [
+            ChatMessage(
+                role,
+                content,
+                load_blob(prices) if prices else None,
+                load_blob(news) if news else None,
+                created_at,
+            )
+            for role, content, prices, news, created_at in rows
+        ]
 
-        messages = []
-        for row in cur.fetchall():
-            message = {
-                "role": row["role"],
-                "content": row["content"],
-            }
-
-            if row["prices"]:
-                try:
-                    message["prices"] = eval(row["prices"])
-                except Exception:
-                    message["prices"] = []
+        return session_name, messages
+    finally:
+        cur.close()
+        conn.close()
 
-            if row["news"]:
-                try:
-                    message["news"] = eval(row["news"])
-                except Exception:
-                    message["news"] = []
 
-            messages.append(message)
+def search_chats(user_id, query, page=0, page_size=10):
+    """Rank a user's sessions by full-text matches in their name and messages.
 
-        return session_name, messages
+    Returns ``(results, total)`` where each result has the session id, name,
+    creation time, number of matching messages and a highlighted snippet.
+    """
+    conn = get_read_connection(user_key(user_id))
+    cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+    try:
+        cur.execute(
+            """
+            WITH q AS (SELECT websearch_to_tsquery('english', %(query)s) AS query),
+            hits AS (
+                SELECT m.session_id, m.id AS message_id,
+                       ts_rank(m.search_vector, q.query) AS rank
+                FROM messages m
+                JOIN chat_sessions s ON s.id = m.session_id, q
+                WHERE s.user_id = %(user_id)s AND m.search_vector @@ q.query
+                UNION ALL
+                -- Archived sessions are indexed as one document each.
+                SELECT a.session_id, NULL, ts_rank(a.search_vector, q.query)
+                FROM chat_archives a
+                JOIN chat_sessions s ON s.id = a.session_id, q
+                WHERE s.user_id = %(user_id)s AND a.search_vector @@ q.query
+                UNION ALL
+                -- A match in the session name counts double.
+                SELECT s.id, NULL, 2 * ts_rank(s.search_vector, q.query)
+                FROM chat_sessions s, q
+                WHERE s.user_id = %(user_id)s AND s.search_vector @@ q.query
+            ),
+            ranked AS (
+                SELECT session_id,
+                       sum(rank) AS score,
+                       count(message_id) AS matches,
+                       (array_agg(message_id ORDER BY rank DESC)
+                            FILTER (WHERE message_id IS NOT NULL))[1] AS best_message,
+                       count(*) OVER () AS total
+                FROM hits
+                GROUP BY session_id
+                ORDER BY score DESC, session_id DESC
+                LIMIT %(limit)s OFFSET %(offset)s
+            )
+            SELECT r.session_id, s.session_name, s.created_at, r.matches, r.total,
+                   CASE WHEN m.id IS NULL THEN NULL
+                        ELSE ts_headline('english', m.content, q.query,
+                                         'StartSel=**, StopSel=**, MaxWords=20, MinWords=8, MaxFragments=1')
+                   END AS snippet
+            FROM ranked r
+            JOIN chat_sessions s ON s.id = r.session_id
+            LEFT JOIN messages m ON m.id = r.best_message
+            CROSS JOIN q
+            ORDER BY r.score DESC, r.session_id DESC
+            """,
+            {
+                "query": query,
+                "user_id": user_id,
+                "limit": page_size,
+                "offset": page * page_size,
+            },
+        )
+        rows = cur.fetchall()
+        total = rows[0]["total"] if rows else 0
+        results = [
+            {
+                "session_id": row["session_id"],
+                "session_name": row["session_name"],
+                "created_at": row["created_at"],
+                "matches": row["matches"],
+                "snippet": row["snippet"],
+            }
+            for row in rows
+        ]
+        return results, total
     finally:
         cur.close()
         conn.close()
@@ -177,8 +211,10 @@ def delete_chat_session(session_id) -> bool:
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        cur.execute("DELETE FROM chat_sessions WHERE id = %s", (session_id,))
+        cur.execute("DELETE FROM chat_sessions WHERE id = %s RETURNING user_id", (session_id,))
+        owners = [user_key(row[0]) for row in cur.fetchall()]
         conn.commit()
+        mark_write(session_key(session_id), *owners)
         return True
     except Exception:
         conn.rollback()
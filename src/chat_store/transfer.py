@@ -0,0 +1,340 @@
+"""Bulk export and import of a user's chat history.
+
+Export streams every message of every session through a server-side cursor,
+so memory stays flat no matter how much history a user has. Import streams
+records into a temporary staging table with ``COPY FROM`` and creates the
+sessions and messages with two set-based inserts.
+
+    python -m src.chat_store.transfer export <username> chats.jsonl
+    python -m src.chat_store.transfer import <username> chats.parquet
+
+Parquet needs the optional ``pyarrow`` package.
+"""
+import json
+import sys
+from datetime import datetime
+
+from src.chat_store.archive import unpack_messages
+from src.chat_store.store import dump_blob, load_blob
+from src.database.connection import get_db_connection, get_read_connection, mark_write, user_key
+
+FETCH_ROWS = 5000
+PARQUET_BATCH_ROWS = 10_000
+FORMATS = ("jsonl", "parquet")
+COLUMNS = (
+    "session_id", "session_name", "session_created_at",
+    "role", "content", "prices", "news", "created_at",
+)
+
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+COPY_CHUNK_BYTES = 1 << 20
+
+
+def _blob_json(text):
+    """A stored prices/news list as JSON text, converting legacy ``str(list)`` rows."""
+    if not text:
+        return None
+    if text == "[]" or text.startswith('[{"'):
+        return text
+    return dump_blob(load_blob(text))
+
+
+def _iter_rows(user_id):
+    """Yield every message of ``user_id`` as a tuple, ordered by session and time.
+
+    Archived sessions are unpacked in line. Prices and news come back as
+    JSON text so they can be passed through without being parsed.
+    """
+    conn = get_read_connection(user_key(user_id))
+    try:
+        # A named cursor keeps the result on the server; rows arrive in pages.
+        cur = conn.cursor(name="chat_export")
+        cur.itersize = FETCH_ROWS
+        cur.execute(
+            """
+            SELECT s.id, s.session_name, s.created_at, a.payload,
+                   NULL, NULL, NULL, NULL, NULL::timestamptz, NULL::integer, 0 AS part
+            FROM chat_sessions s
+            JOIN chat_archives a ON a.session_id = s.id
+            WHERE s.user_id = %(user_id)s
+            UNION ALL
+            SELECT s.id, s.session_name, s.created_at, NULL,
+                   m.role, m.content, m.prices, m.news, m.created_at, m.id, 1
+            FROM chat_sessions s
+            JOIN messages m ON m.session_id = s.id
+            WHERE s.user_id = %(user_id)s
+            -- A session's archive row (older messages) sorts before its live rows.
+            ORDER BY 1, part, 9, 10
+            """,
+            {"user_id": user_id},
+        )
+        for session_id, name, session_created, payload, *message in cur:
+            session_created = session_created.isoformat()
+            messages = unpack_messages(payload) if payload is not None else [message[:5]]
+            for role, content, prices, news, created in messages:
+                yield (
+                    session_id, name, session_created, role, content,
+                    _blob_json(prices), _blob_json(news), created.isoformat(),
+                )
+        cur.close()
+    finally:
+        conn.close()
+
+
+def iter_user_messages(user_id):
+    """Yield one dict per message of ``user_id``, ordered by session and time."""
+    for row in _iter_rows(user_id):
+        record = dict(zip(COLUMNS, row))
+        for name in ("prices", "news"):
+            if record[name] is not None:
+                record[name] = json.loads(record[name])
+        yield record
+
+
+def _parquet():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow") from None
+    return pyarrow, pyarrow.parquet
+
+
+def _parquet_schema(pa):
+    return pa.schema(
+        [
+            ("session_id", pa.int64()),
+            ("session_name", pa.string()),
+            ("session_created_at", pa.string()),
+            ("role", pa.string()),
+            ("content", pa.string()),
+            # Nested price/news lists are kept as JSON text.
+            ("prices", pa.string()),
+            ("news", pa.string()),
+            ("created_at", pa.string()),
+        ]
+    )
+
+
+def _write_parquet(rows, path):
+    pa, pq = _parquet()
+    schema = _parquet_schema(pa)
+    count = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= PARQUET_BATCH_ROWS:
+                writer.write_table(pa.Table.from_arrays(list(map(list, zip(*batch))), schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_arrays(list(map(list, zip(*batch))), schema=schema))
+            count += len(batch)
+    return count
+
+
+def _jsonl_line(row):
+    # Prices and news are already JSON text; splice them in rather than re-encoding.
+    *head, prices, news, created_at = row
+    values = [*map(_encode, head), prices or "null", news or "null", _encode(created_at)]
+    return "{" + ", ".join(f'"{name}": {value}' for name, value in zip(COLUMNS, values)) + "}\n"
+
+
+def export_chats(user_id, path, fmt="jsonl") -> int:
+    """Write every message of ``user_id`` to ``path``; returns the message count."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {FORMATS}")
+
+    rows = _iter_rows(user_id)
+    if fmt == "parquet":
+        return _write_parquet(rows, path)
+
+    count = 0
+    with open(path, "w", encoding="utf-8") as out:
+        for row in rows:
+            out.write(_jsonl_line(row))
+            count += 1
+    return count
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as src:
+        for line in src:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _read_parquet(path):
+    _, pq = _parquet()
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=PARQUET_BATCH_ROWS):
+        yield from batch.to_pylist()
+
+
+def _copy_field(value):
+    if value is None:
+        return "\\N"
+    # COPY text format: backslash escapes for the delimiter and line breaks.
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _stored_blob(value):
+    # JSONL holds decoded lists; Parquet keeps the JSON text.
+    if value is None or isinstance(value, str):
+        return value
+    return dump_blob(value)
+
+
+def _copy_lines(records):
+    for r in records:
+        prices = _stored_blob(r.get("prices"))
+        news = _stored_blob(r.get("news"))
+        fields = (
+            r["session_id"], r.get("session_name") or "Imported chat",
+            r.get("session_created_at") or r.get("created_at"),
+            r["role"], r["content"], prices, news,
+            r.get("created_at") or datetime.now().isoformat(),
+        )
+        yield "\t".join(map(_copy_field, fields)) + "\n"
+
+
+class _LineStream:
+    """File-like ``read`` over an iterator of lines, for ``copy_expert``."""
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._buffer = ""
+
+    def read(self, size=-1):
+        chunks = [self._buffer]
+        have = len(self._buffer)
+        for line in self._lines:
+            chunks.append(line)
+            have += len(line)
+            if 0 <= size <= have:
+                break
+        data = "".join(chunks)
+        if size < 0:
+            self._buffer = ""
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+    readline = read
+
+
+def import_chats(user_id, path, fmt="jsonl"):
+    """Load an export into ``user_id``'s history as new sessions.
+
+    Sessions get fresh ids; messages keep their text, data and timestamps.
+    Returns ``(sessions, messages)`` created. Nothing is written on failure.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format {fmt!r}; expected one of {FORMATS}")
+    records = _read_parquet(path) if fmt == "parquet" else _read_jsonl(path)
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            CREATE TEMP TABLE chat_import (
+                source_session BIGINT,
+                session_name TEXT,
+                session_created_at TIMESTAMPTZ,
+                role TEXT,
+                content TEXT,
+                prices TEXT,
+                news TEXT,
+                created_at TIMESTAMPTZ,
+                position BIGSERIAL
+            ) ON COMMIT DROP
+            """
+        )
+        cur.copy_expert(
+            """
+            COPY chat_import (source_session, session_name, session_created_at,
+                              role, content, prices, news, created_at)
+            FROM STDIN
+            """,
+            _LineStream(_copy_lines(records)),
+            size=COPY_CHUNK_BYTES,
+        )
+
+        # One new id per exported session, drawn from the sessions sequence.
+        cur.execute(
+            """
+            CREATE TEMP TABLE chat_import_sessions ON COMMIT DROP AS
+            SELECT source_session,
+                   nextval(pg_get_serial_sequence('chat_sessions', 'id')) AS id,
+                   min(session_name) AS session_name,
+                   min(session_created_at) AS created_at
+            FROM chat_import
+            GROUP BY source_session
+            """
+        )
+        cur.execute(
+            """
+            INSERT INTO chat_sessions (id, user_id, session_name, created_at)
+            SELECT id, %s, session_name, created_at FROM chat_import_sessions
+            """,
+            (user_id,),
+        )
+        sessions = cur.rowcount
+        cur.execute(
+            """
+            INSERT INTO messages (session_id, role, content, prices, news, created_at)
+            SELECT s.id, i.role, i.content, i.prices, i.news, i.created_at
+            FROM chat_import i
+            JOIN chat_import_sessions s USING (source_session)
+            ORDER BY i.position
+            """
+        )
+        messages = cur.rowcount
+        conn.commit()
+        mark_write(user_key(user_id))
+        return sessions, messages
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _format_for(path):
+    return "parquet" if str(path).endswith(".parquet") else "jsonl"
+
+
+def main(argv=None):
+    from src.auth.authentication import get_user_id
+
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 3 or argv[0] not in ("export", "import"):
+        print(__doc__)
+        return 2
+
+    action, username, path = argv
+    user_id = get_user_id(username)
+    if user_id is None:
+        print(f"No such user: {username}")
+        return 1
+
+    if action == "export":
+        count = export_chats(user_id, path, _format_for(path))
+        print(f"Exported {count} messages to {path}")
+    else:
+        sessions, messages = import_chats(user_id, path, _format_for(path))
+        print(f"Imported {messages} messages in {sessions} sessions from {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
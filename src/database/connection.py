@@ -1,23 +1,55 @@
+import logging
 import os
+import threading
+import time
+
 import psycopg2
 import psycopg2.extras
 import streamlit as st
 from dotenv import load_dotenv
 
+from src.database.schema import SCHEMA_STATEMENTS
+from src.resilience.breaker import CircuitOpenError, get_breaker
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# After a write, reads for the same keys stay on the primary this long so a
+# lagging replica can't hide the write.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+REPLICA_CONNECT_TIMEOUT = int(os.getenv("DB_REPLICA_CONNECT_TIMEOUT", "2"))
+REPLICA = "postgres-replica"
+
+_recent_writes = {}
+_recent_writes_lock = threading.Lock()
+
+
+def _secrets_section(name):
+    # st.secrets raises when there is no secrets.toml (CLI tools, workers).
+    try:
+        return st.secrets[name] if name in st.secrets else None
+    except Exception:
+        return None
+
+
+def _connect(db_conf, **kwargs):
+    return psycopg2.connect(
+        host=db_conf["DB_HOST"],
+        database=db_conf["DB_NAME"],
+        user=db_conf["DB_USER"],
+        password=db_conf["DB_PASSWORD"],
+        port=db_conf.get("DB_PORT", "5432"),
+        sslmode=db_conf.get("DB_SSLMODE", "require"),
+        **kwargs,
+    )
+
 
 def get_db_connection():
-    if "db" in st.secrets:
-        db_conf = st.secrets["db"]
-        return psycopg2.connect(
-            host=db_conf["DB_HOST"],
-            database=db_conf["DB_NAME"],
-            user=db_conf["DB_USER"],
-            password=db_conf["DB_PASSWORD"],
-            port=db_conf.get("DB_PORT", "5432"),
-            sslmode=db_conf.get("DB_SSLMODE", "require"),
-        )
+    """Connection to the primary; use it for writes and read-after-write."""
+    db_conf = _secrets_section("db")
+    if db_conf is not None:
+        return _connect(db_conf)
 
     return psycopg2.connect(
         host=os.getenv("DB_HOST", "localhost"),
@@ -28,16 +60,112 @@ def get_db_connection():
     )
 
 
-def init_db():
+def _replica_connection():
+    """A connection to the replica, or None when no replica is configured."""
+    db_conf = _secrets_section("db_replica")
+    if db_conf is not None:
+        return _connect(db_conf, connect_timeout=REPLICA_CONNECT_TIMEOUT)
+
+    host = os.getenv("DB_REPLICA_HOST")
+    if not host:
+        return None
+    return psycopg2.connect(
+        host=host,
+        database=os.getenv("DB_REPLICA_NAME", os.getenv("DB_NAME", "crypto_ai")),
+        user=os.getenv("DB_REPLICA_USER", os.getenv("DB_USER", "postgres")),
+        password=os.getenv("DB_REPLICA_PASSWORD", os.getenv("DB_PASSWORD", "")),
+        port=os.getenv("DB_REPLICA_PORT", os.getenv("DB_PORT", "5432")),
+        connect_timeout=REPLICA_CONNECT_TIMEOUT,
+    )
+
+
+def mark_write(*keys):
+    """Record that ``keys`` (e.g. ``"user:7"``) were just written on the primary."""
+    until = time.monotonic() + READ_YOUR_WRITES_SECONDS
+    with _recent_writes_lock:
+        for key in keys:
+            _recent_writes[key] = until
+        if len(_recent_writes) > 10_000:
+            now = time.monotonic()
+            for key in [k for k, t in _recent_writes.items() if t < now]:
+                del _recent_writes[key]
+
+
+def _recently_written(keys) -> bool:
+    now = time.monotonic()
+    with _recent_writes_lock:
+        return any(_recent_writes.get(key, 0) > now for key in keys)
+
+
+def get_read_connection(*keys):
+    """Connection for read-only queries about ``keys``.
+
+    Goes to the replica when one is configured, unless any of ``keys`` was
+    written within ``READ_YOUR_WRITES_SECONDS``. Falls back to the primary
+    while the replica is unreachable.
+    """
+    if _recently_written(keys):
+        return get_db_connection()
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        conn.commit()
-    except Exception as e:
-        st.error(f"DB init failed: {e!r}")
-    finally:
+        conn = get_breaker(REPLICA).call(_replica_connection)
+    except (CircuitOpenError, psycopg2.OperationalError) as e:
+        logger.warning("Reading from the primary, replica unavailable: %r", e)
+        conn = None
+    return conn if conn is not None else get_db_connection()
+
+
+def user_key(user_id):
+    return f"user:{user_id}"
+
+
+def session_key(session_id):
+    return f"session:{session_id}"
+
+
+def username_key(username):
+    return f"username:{username}"
+
+
+_db_ready = False
+_db_ready_lock = threading.Lock()
+
+
+def init_db():
+    """Create the schema and upcoming partitions, once per process.
+
+    Streamlit calls this on every script run; after the first success it
+    returns immediately. A failure is retried on the next call. Tables left
+    unpartitioned by an older version stop the app until they are migrated.
+    """
+    global _db_ready
+    if _db_ready:
+        return
+    with _db_ready_lock:
+        if _db_ready:
+            return
+        from src.database.maintenance import NotPartitionedError, ensure_message_partitions
+        from src.market.ticks import ensure_tick_partitions
+
         try:
-            cur.close()
-            conn.close()
-        except Exception:
-            pass
+            conn = get_db_connection()
+            cur = conn.cursor()
+            for statement in SCHEMA_STATEMENTS:
+                cur.execute(statement)
+            conn.commit()
+
+            ensure_message_partitions()
+            ensure_tick_partitions()
+            _db_ready = True
+        except NotPartitionedError as e:
+            # Running on the old layout would skip partition upkeep for good.
+            logger.error("Database needs migrating: %s", e)
+            st.error(f"DB init failed: {e!r}")
+            st.stop()
+        except Exception as e:
+            st.error(f"DB init failed: {e!r}")
+        finally:
+            try:
+                cur.close()
+                conn.close()
+            except Exception:
+                pass
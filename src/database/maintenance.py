@@ -0,0 +1,251 @@
+"""Partition upkeep for the ``messages`` and ``price_ticks`` tables.
+
+``messages`` is range-partitioned by month and ``price_ticks`` by day. New
+partitions must exist before rows arrive, so both are created ahead from
+``init_db`` and from the periodic maintenance job, which also archives cold
+sessions, drops message partitions they leave empty, drops tick partitions
+past retention and prunes finished jobs:
+
+    python -m src.database.maintenance           # partitions, archival, tick and job retention
+    python -m src.database.maintenance migrate   # one-off: partition old tables
+"""
+import logging
+import os
+import sys
+from datetime import date, datetime, timezone
+
+from src.database.connection import get_db_connection
+from src.database.schema import MESSAGES_STATEMENTS
+
+logger = logging.getLogger(__name__)
+
+# Months created ahead of the current one.
+PARTITION_MONTHS_AHEAD = int(os.getenv("MESSAGE_PARTITION_MONTHS_AHEAD", "3"))
+DEFAULT_PARTITION = "messages_default"
+_LOCK_KEY = "messages_partitions"
+
+_MESSAGE_COLUMNS = "id, session_id, role, content, prices, news, created_at"
+
+
+class NotPartitionedError(RuntimeError):
+    """A table the schema partitions is still a plain table from an older version."""
+
+
+def _add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_start(month: date) -> datetime:
+    # Partition bounds are UTC month boundaries whatever the session time zone.
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: date) -> str:
+    return f"messages_{month:%Y_%m}"
+
+
+def is_partitioned(cur, table="messages") -> bool:
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cur.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def _create_partition(cur, month: date):
+    """Create the partition for ``month``, moving any rows parked in the default one."""
+    name = partition_name(month)
+    start, end = _month_start(month), _month_start(_add_months(month, 1))
+    # The default partition may not keep rows that belong to a new partition.
+    cur.execute(
+        f"CREATE TEMP TABLE moving_messages AS SELECT {_MESSAGE_COLUMNS} FROM messages WITH NO DATA"
+    )
+    cur.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE created_at >= %s AND created_at < %s
+            RETURNING {_MESSAGE_COLUMNS}
+        )
+        INSERT INTO moving_messages SELECT * FROM moved
+        """,
+        (start, end),
+    )
+    cur.execute(
+        f"CREATE TABLE {name} PARTITION OF messages FOR VALUES FROM (%s) TO (%s)",
+        (start, end),
+    )
+    cur.execute(
+        f"INSERT INTO messages ({_MESSAGE_COLUMNS}) SELECT {_MESSAGE_COLUMNS} FROM moving_messages"
+    )
+    cur.execute("DROP TABLE moving_messages")
+    return name
+
+
+def _ensure_partitions(cur, months_ahead, extra_months=()):
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (_LOCK_KEY,))
+    cur.execute(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF messages DEFAULT")
+
+    this_month = date.today().replace(day=1)
+    months = {_add_months(this_month, n) for n in range(months_ahead + 1)}
+    months.update(extra_months)
+    # Rows that landed in the default partition (late or imported history).
+    cur.execute(
+        f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date FROM {DEFAULT_PARTITION}"
+    )
+    months.update(row[0] for row in cur.fetchall())
+
+    created = []
+    for month in sorted(months):
+        cur.execute("SELECT to_regclass(%s)", (partition_name(month),))
+        if cur.fetchone()[0] is None:
+            created.append(_create_partition(cur, month))
+    return created
+
+
+def ensure_message_partitions(months_ahead=PARTITION_MONTHS_AHEAD):
+    """Create missing monthly partitions up to ``months_ahead`` months out.
+
+    Returns the names of the partitions created. Raises
+    ``NotPartitionedError`` if ``messages`` predates partitioning, since
+    ``CREATE TABLE IF NOT EXISTS`` leaves such a table as it is.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        if not is_partitioned(cur):
+            raise NotPartitionedError(
+                "messages is not partitioned; run `python -m src.database.maintenance migrate` once"
+            )
+        created = _ensure_partitions(cur, months_ahead)
+        conn.commit()
+        return created
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def drop_empty_partitions(before: date):
+    """Drop monthly partitions that end on or before ``before`` and hold no rows."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        if not is_partitioned(cur):
+            return []
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (_LOCK_KEY,))
+        cur.execute(
+            """
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'messages'::regclass AND c.relname ~ '^messages_[0-9]{4}_[0-9]{2}$'
+            """
+        )
+        dropped = []
+        for (name,) in cur.fetchall():
+            year, month = map(int, name.rsplit("_", 2)[1:])
+            if _add_months(date(year, month, 1), 1) > before:
+                continue
+            cur.execute(f"SELECT EXISTS (SELECT 1 FROM {name})")
+            if not cur.fetchone()[0]:
+                cur.execute(f"DROP TABLE {name}")
+                dropped.append(name)
+        conn.commit()
+        return dropped
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def migrate_messages_to_partitions(months_ahead=PARTITION_MONTHS_AHEAD):
+    """Rebuild an unpartitioned ``messages`` table as a partitioned one.
+
+    Runs in one transaction holding an exclusive lock on ``messages``, so
+    writes wait until the copy is done. Ids and their sequence are kept.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        if is_partitioned(cur):
+            return False
+        cur.execute("LOCK TABLE messages IN ACCESS EXCLUSIVE MODE")
+        cur.execute("ALTER TABLE messages RENAME TO messages_unpartitioned")
+        cur.execute("ALTER TABLE messages_unpartitioned RENAME CONSTRAINT messages_pkey TO messages_unpartitioned_pkey")
+        cur.execute("ALTER SEQUENCE messages_id_seq RENAME TO messages_unpartitioned_id_seq")
+        cur.execute("DROP INDEX IF EXISTS messages_session_idx, messages_search_idx")
+
+        for statement in MESSAGES_STATEMENTS:
+            cur.execute(statement)
+
+        # Every month with history gets its partition before the copy.
+        cur.execute(
+            "SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date FROM messages_unpartitioned"
+        )
+        _ensure_partitions(cur, months_ahead, [row[0] for row in cur.fetchall()])
+        cur.execute(
+            f"INSERT INTO messages ({_MESSAGE_COLUMNS}) SELECT {_MESSAGE_COLUMNS} FROM messages_unpartitioned"
+        )
+        cur.execute(
+            "SELECT setval('messages_id_seq', greatest((SELECT max(id) FROM messages_unpartitioned), 1))"
+        )
+        cur.execute("DROP TABLE messages_unpartitioned")
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def run_maintenance():
+    """The periodic job: partitions ahead, cold sessions archived, empty months dropped, old tick days and jobs pruned."""
+    from src.chat_store.archive import COLD_SESSION_DAYS, archive_cold_sessions, cold_cutoff
+
+    from src.jobs.store import prune_jobs
+    from src.market.ticks import ensure_tick_partitions, prune_ticks
+
+    created = ensure_message_partitions() + ensure_tick_partitions()
+    archived = archive_cold_sessions()
+    dropped = drop_empty_partitions(cold_cutoff(COLD_SESSION_DAYS).date())
+    pruned = prune_ticks()
+    pruned_jobs = prune_jobs()
+    return {
+        "created": created,
+        "archived": archived,
+        "dropped": dropped,
+        "pruned_ticks": pruned,
+        "pruned_jobs": pruned_jobs,
+    }
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(level=logging.INFO)
+    if argv == ["migrate"]:
+        from src.market.ticks import migrate_ticks_to_partitions
+
+        migrated = migrate_messages_to_partitions()
+        print("messages partitioned" if migrated else "messages is already partitioned")
+        migrated = migrate_ticks_to_partitions()
+        print("price_ticks partitioned" if migrated else "price_ticks is already partitioned")
+        return 0
+    if argv:
+        print(__doc__)
+        return 2
+    result = run_maintenance()
+    print(
+        f"created {len(result['created'])} partitions, archived {result['archived']} sessions, "
+        f"dropped {len(result['dropped'])} empty message partitions and {len(result['pruned_ticks'])} "
+        f"expired tick partitions, pruned {result['pruned_jobs']} finished jobs"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
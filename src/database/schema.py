@@ -0,0 +1,172 @@
+# DDL applied by init_db. Every statement must be safe to run repeatedly.
+
+# Messages are range-partitioned by month on created_at, so the primary key
+# has to include it. Partitions are created by
+# src.database.maintenance.ensure_message_partitions. An older unpartitioned
+# table is left alone by CREATE TABLE IF NOT EXISTS; init_db then refuses to
+# finish until `python -m src.database.maintenance migrate` has rebuilt it.
+MESSAGES_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS messages (
+        id SERIAL,
+        session_id INTEGER NOT NULL REFERENCES chat_sessions (id) ON DELETE CASCADE,
+        role TEXT NOT NULL,
+        content TEXT NOT NULL,
+        prices TEXT,
+        news TEXT,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at)
+    """,
+    "CREATE INDEX IF NOT EXISTS messages_session_idx ON messages (session_id, created_at)",
+    # Full-text search. Generated columns keep the vectors current on every insert.
+    """
+    ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS messages_search_idx ON messages USING GIN (search_vector)",
+]
+
+# Every fetched quote, append-only, range-partitioned by UTC day on ts. Rows
+# arrive in time order, so a BRIN index on ts stays tiny and still prunes
+# time-range scans. Retention drops whole days (src.market.ticks.prune_ticks)
+# rather than deleting rows, so freed pages are never refilled with new ticks
+# and every partition stays in ts order. Ranges are summarized as they fill;
+# unsummarized ranges are always scanned.
+TICKS_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS price_ticks (
+        coin_id TEXT NOT NULL,
+        ts TIMESTAMPTZ NOT NULL DEFAULT now(),
+        price DOUBLE PRECISION NOT NULL,
+        change DOUBLE PRECISION
+    ) PARTITION BY RANGE (ts)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS price_ticks_ts_brin ON price_ticks USING BRIN (ts)
+        WITH (pages_per_range = 32, autosummarize = on)
+    """,
+]
+
+SCHEMA_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        email TEXT,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS chat_sessions (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+        session_name TEXT NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+    *MESSAGES_STATEMENTS,
+    "CREATE INDEX IF NOT EXISTS chat_sessions_user_idx ON chat_sessions (user_id, created_at DESC)",
+    """
+    ALTER TABLE chat_sessions ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', coalesce(session_name, ''))) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS chat_sessions_search_idx ON chat_sessions USING GIN (search_vector)",
+    # Cold sessions: all their messages in one zlib-compressed JSON payload.
+    """
+    CREATE TABLE IF NOT EXISTS chat_archives (
+        session_id INTEGER PRIMARY KEY REFERENCES chat_sessions (id) ON DELETE CASCADE,
+        message_count INTEGER NOT NULL,
+        first_message_at TIMESTAMPTZ,
+        last_message_at TIMESTAMPTZ,
+        payload BYTEA NOT NULL,
+        search_vector tsvector,
+        archived_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS chat_archives_search_idx ON chat_archives USING GIN (search_vector)",
+    """
+    CREATE TABLE IF NOT EXISTS news_articles (
+        id BIGINT PRIMARY KEY,
+        title TEXT NOT NULL,
+        source TEXT,
+        url TEXT,
+        published_at TIMESTAMPTZ NOT NULL,
+        votes_positive INTEGER NOT NULL DEFAULT 0,
+        votes_negative INTEGER NOT NULL DEFAULT 0,
+        currencies TEXT[] NOT NULL DEFAULT '{}',
+        fetched_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS news_articles_currencies_idx ON news_articles USING GIN (currencies)",
+    "CREATE INDEX IF NOT EXISTS news_articles_published_idx ON news_articles (published_at DESC)",
+    """
+    CREATE TABLE IF NOT EXISTS news_ingest_state (
+        feed TEXT PRIMARY KEY,
+        last_id BIGINT NOT NULL DEFAULT 0,
+        ingested_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+    # Price alerts. Rules belong to a watched coin and go with it. ``armed``
+    # is false while the condition holds, so a rule fires once per crossing.
+    """
+    CREATE TABLE IF NOT EXISTS watchlists (
+        user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+        coin_id TEXT NOT NULL,
+        added_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (user_id, coin_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS alert_rules (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        coin_id TEXT NOT NULL,
+        kind TEXT NOT NULL
+            CHECK (kind IN ('price_above', 'price_below', 'change_above', 'change_below')),
+        threshold DOUBLE PRECISION NOT NULL,
+        armed BOOLEAN NOT NULL DEFAULT true,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        FOREIGN KEY (user_id, coin_id) REFERENCES watchlists (user_id, coin_id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS alert_rules_user_idx ON alert_rules (user_id)",
+    """
+    CREATE TABLE IF NOT EXISTS alert_events (
+        id BIGSERIAL PRIMARY KEY,
+        rule_id INTEGER NOT NULL REFERENCES alert_rules (id) ON DELETE CASCADE,
+        user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+        value DOUBLE PRECISION NOT NULL,
+        triggered_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        seen BOOLEAN NOT NULL DEFAULT false
+    )
+    """,
+    *TICKS_STATEMENTS,
+    "CREATE INDEX IF NOT EXISTS alert_events_unseen_idx ON alert_events (user_id, triggered_at DESC) WHERE NOT seen",
+    # Analyze requests for out-of-process workers (src.jobs). Workers claim
+    # queued rows with FOR UPDATE SKIP LOCKED; only queued and running rows
+    # are indexed, so finished jobs cost nothing until they are pruned.
+    """
+    CREATE TABLE IF NOT EXISTS analysis_jobs (
+        id BIGSERIAL PRIMARY KEY,
+        user_id INTEGER,
+        question TEXT NOT NULL,
+        payload JSONB NOT NULL DEFAULT '{}',
+        status TEXT NOT NULL DEFAULT 'queued'
+            CHECK (status IN ('queued', 'running', 'done', 'failed')),
+        attempts INTEGER NOT NULL DEFAULT 0,
+        worker TEXT,
+        result JSONB,
+        error TEXT,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        started_at TIMESTAMPTZ,
+        finished_at TIMESTAMPTZ
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS analysis_jobs_queued_idx ON analysis_jobs (id) WHERE status = 'queued'",
+    """
+    CREATE INDEX IF NOT EXISTS analysis_jobs_active_idx ON analysis_jobs (user_id, status)
+        WHERE status IN ('queued', 'running')
+    """,
+]
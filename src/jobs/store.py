@@ -0,0 +1,244 @@
+"""The ``analysis_jobs`` queue: enqueue, claim, finish and look up jobs.
+
+The app enqueues a question and notifies ``JOBS_CHANNEL``; a worker claims
+it with ``FOR UPDATE SKIP LOCKED``, so any number of workers on any number
+of hosts can share the table without handing out a job twice. Finished
+jobs are announced on ``DONE_CHANNEL`` with their id as the payload.
+"""
+import json
+import os
+import select
+from datetime import datetime
+
+import psycopg2.extras
+
+from src.ai.scheduler import USER_MAX_ACTIVE, UserThrottled
+from src.database.connection import get_db_connection
+from src.resilience.deadline import ANALYZE_DEADLINE_SECONDS
+
+# Send questions to worker processes instead of answering in the app.
+ANALYSIS_QUEUE = os.getenv("ANALYSIS_QUEUE", "").lower() in ("1", "true", "yes")
+JOBS_CHANNEL = "analysis_jobs"
+DONE_CHANNEL = "analysis_done"
+# A running job older than this lost its worker; it is retried or failed.
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", str(ANALYZE_DEADLINE_SECONDS * 3)))
+JOB_MAX_ATTEMPTS = 2
+JOB_RETENTION_HOURS = int(os.getenv("JOB_RETENTION_HOURS", "24"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def _json(value):
+    return psycopg2.extras.Json(value, dumps=lambda v: json.dumps(v, default=str))
+
+
+def job_payload(history, last_seen=None):
+    """JSON-ready analyze arguments from chat messages and ``last_quotes``."""
+    return {
+        "history": [{"role": m["role"], "content": m["content"]} for m in history],
+        "last_seen": {
+            coin_id: [when.isoformat(), price]
+            for coin_id, (when, price) in (last_seen or {}).items()
+            if when is not None
+        },
+    }
+
+
+def payload_arguments(payload):
+    """``(history, last_seen)`` back from a ``job_payload``."""
+    last_seen = {
+        coin_id: (datetime.fromisoformat(when), price)
+        for coin_id, (when, price) in payload.get("last_seen", {}).items()
+    }
+    return payload.get("history", []), last_seen
+
+
+def enqueue_analysis(user_id, question, payload, max_active=USER_MAX_ACTIVE) -> int:
+    """Queue a question; returns the job id.
+
+    Raises ``UserThrottled`` when the user already has ``max_active`` jobs
+    queued or running.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        if user_id is not None:
+            # Under READ COMMITTED two enqueues could both pass the count
+            # below; the lock makes one wait for the other's commit.
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext('analysis_jobs'), %s)", (user_id,))
+        cur.execute(
+            """
+            INSERT INTO analysis_jobs (user_id, question, payload)
+            SELECT %(user_id)s, %(question)s, %(payload)s
+            WHERE %(user_id)s IS NULL OR (
+                SELECT count(*) FROM analysis_jobs
+                WHERE user_id = %(user_id)s AND status IN ('queued', 'running')
+            ) < %(max_active)s
+            RETURNING id
+            """,
+            {
+                "user_id": user_id,
+                "question": question,
+                "payload": _json(payload),
+                "max_active": max_active,
+            },
+        )
+        row = cur.fetchone()
+        if row is None:
+            conn.rollback()
+            raise UserThrottled(f"{max_active} questions already in progress; wait for one to finish")
+        # Delivered on commit.
+        cur.execute("SELECT pg_notify(%s, %s)", (JOBS_CHANNEL, str(row[0])))
+        conn.commit()
+        return row[0]
+    finally:
+        cur.close()
+        conn.close()
+
+
+def claim_job(cur, worker):
+    """Take the oldest queued job, or None. Commit to make the claim visible.
+
+    Returns ``(id, attempts, question, payload)``; pass ``worker`` and
+    ``attempts`` back to ``finish_job``. Oldest first is fair enough because
+    ``enqueue_analysis`` already caps how many jobs each user has in flight.
+    """
+    cur.execute(
+        """
+        UPDATE analysis_jobs j
+        SET status = 'running', started_at = now(), attempts = j.attempts + 1, worker = %s
+        WHERE j.id = (
+            SELECT q.id FROM analysis_jobs q
+            WHERE q.status = 'queued'
+            ORDER BY q.id
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING j.id, j.attempts, j.question, j.payload
+        """,
+        (worker,),
+    )
+    return cur.fetchone()
+
+
+def finish_job(cur, job_id, worker, attempts, result=None, error=None) -> bool:
+    """Store a job's result (or error) and announce it. Caller commits.
+
+    Only the claim ``(worker, attempts)`` that is still running may finish
+    the job; returns False when it was requeued and claimed again meanwhile.
+    """
+    cur.execute(
+        """
+        UPDATE analysis_jobs
+        SET status = %s, result = %s, error = %s, finished_at = now()
+        WHERE id = %s AND status = 'running' AND worker = %s AND attempts = %s
+        """,
+        (
+            FAILED if error else DONE,
+            None if result is None else _json(result),
+            error,
+            job_id,
+            worker,
+            attempts,
+        ),
+    )
+    if not cur.rowcount:
+        return False
+    cur.execute("SELECT pg_notify(%s, %s)", (DONE_CHANNEL, str(job_id)))
+    return True
+
+
+def requeue_stale_jobs(cur, stale_seconds=JOB_STALE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS):
+    """Retry jobs whose worker died mid-run, or fail them after ``max_attempts``.
+
+    Returns ``(requeued, failed)`` job ids. Caller commits.
+    """
+    cur.execute(
+        """
+        UPDATE analysis_jobs
+        SET status = CASE WHEN attempts >= %(max_attempts)s THEN 'failed' ELSE 'queued' END,
+            error = CASE WHEN attempts >= %(max_attempts)s THEN 'worker stopped responding' END,
+            finished_at = CASE WHEN attempts >= %(max_attempts)s THEN now() END
+        WHERE status = 'running' AND started_at < now() - make_interval(secs => %(stale)s)
+        RETURNING id, status
+        """,
+        {"max_attempts": max_attempts, "stale": stale_seconds},
+    )
+    rows = cur.fetchall()
+    requeued = [job_id for job_id, status in rows if status == QUEUED]
+    failed = [job_id for job_id, status in rows if status == FAILED]
+    for job_id in requeued:
+        cur.execute("SELECT pg_notify(%s, %s)", (JOBS_CHANNEL, str(job_id)))
+    for job_id in failed:
+        cur.execute("SELECT pg_notify(%s, %s)", (DONE_CHANNEL, str(job_id)))
+    return requeued, failed
+
+
+def listen(channel):
+    """An autocommit connection LISTENing on ``channel``; read it with ``wait_notifies``."""
+    conn = get_db_connection()
+    conn.autocommit = True
+    cur = conn.cursor()
+    try:
+        cur.execute(f"LISTEN {channel}")
+    finally:
+        cur.close()
+    return conn
+
+
+def wait_notifies(conn, timeout):
+    """Payloads of the notifications that arrive within ``timeout`` seconds."""
+    if select.select([conn], [], [], timeout)[0]:
+        conn.poll()
+    payloads = [notify.payload for notify in conn.notifies]
+    conn.notifies.clear()
+    return payloads
+
+
+def get_job(job_id):
+    """``{"status", "result", "error", "position"}`` for a job, or None.
+
+    ``position`` is its place among queued jobs (0 once it has started).
+    Jobs are written by workers, never by the asking session, so this
+    reads from the primary rather than a possibly lagging replica.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    try:
+        cur.execute(
+            """
+            SELECT status, result, error,
+                   CASE WHEN status = 'queued' THEN (
+                       SELECT count(*) FROM analysis_jobs q WHERE q.status = 'queued' AND q.id <= j.id
+                   ) ELSE 0 END AS position
+            FROM analysis_jobs j
+            WHERE id = %s
+            """,
+            (job_id,),
+        )
+        return cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def prune_jobs(hours=JOB_RETENTION_HOURS) -> int:
+    """Delete jobs finished more than ``hours`` ago; returns the number removed."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            DELETE FROM analysis_jobs
+            WHERE status IN ('done', 'failed') AND finished_at < now() - make_interval(hours => %s)
+            """,
+            (hours,),
+        )
+        conn.commit()
+        return cur.rowcount
+    finally:
+        cur.close()
+        conn.close()
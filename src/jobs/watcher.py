@@ -0,0 +1,72 @@
+"""App-side view of finished jobs.
+
+One thread per app process LISTENs on ``DONE_CHANNEL`` and remembers the
+ids of recently finished jobs, so sessions waiting for an answer check an
+in-memory set and only read the job row once it is done.
+"""
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+
+from src.jobs.store import DONE_CHANNEL, listen, wait_notifies
+
+logger = logging.getLogger(__name__)
+
+MAX_REMEMBERED = 10_000
+RECONNECT_SECONDS = 5.0
+
+
+class JobWatcher:
+    def __init__(self):
+        self.listening = False
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="job-watcher", daemon=True)
+        self._thread.start()
+
+    def finished(self, job_id) -> bool:
+        """Whether a worker has announced ``job_id`` as finished."""
+        with self._lock:
+            return job_id in self._finished
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = listen(DONE_CHANNEL)
+                self.listening = True
+                while not self._stop.is_set():
+                    payloads = wait_notifies(conn, 1.0)
+                    if not payloads:
+                        continue
+                    with self._lock:
+                        for payload in payloads:
+                            self._finished[int(payload)] = True
+                        while len(self._finished) > MAX_REMEMBERED:
+                            self._finished.popitem(last=False)
+            except Exception as e:
+                # Pollers fall back to reading job rows until we're back.
+                logger.warning("Job watcher disconnected: %r", e)
+                self._stop.wait(RECONNECT_SECONDS)
+            finally:
+                self.listening = False
+                if conn is not None:
+                    conn.close()
+
+    def close(self):
+        self._stop.set()
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def get_job_watcher() -> JobWatcher:
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = JobWatcher()
+            atexit.register(_watcher.close)
+        return _watcher
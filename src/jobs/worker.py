@@ -0,0 +1,221 @@
+"""Analysis workers: processes that answer questions from ``analysis_jobs``.
+
+Each process keeps one warm analyzer (coin list, models, caches) and runs
+several claim loops on it, since an analysis mostly waits on the network.
+Workers wake on ``LISTEN`` and claim with ``SKIP LOCKED``, so capacity grows
+by starting more processes here or on other hosts:
+
+    python -m src.jobs.worker                             # one process
+    python -m src.jobs.worker --processes 4 --threads 8
+
+The app sends questions here when ``ANALYSIS_QUEUE=1``.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+from src.ai.analyzer import get_shared_analyzer, history_messages
+from src.database.connection import get_db_connection
+from src.jobs.store import (
+    JOBS_CHANNEL,
+    claim_job,
+    finish_job,
+    listen,
+    payload_arguments,
+    requeue_stale_jobs,
+    wait_notifies,
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_THREADS = int(os.getenv("JOB_THREADS", "4"))
+# Claim loops also poll this often, in case a notification was missed.
+JOB_IDLE_SECONDS = 5.0
+REAP_SECONDS = 30.0
+
+
+class AnalysisWorker:
+    """Claim loops sharing one analyzer, woken by a listener thread."""
+
+    def __init__(self, analyzer, threads=JOB_THREADS, name=None):
+        self.analyzer = analyzer
+        self.threads = threads
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.completed = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._wakeup = threading.Condition()
+        self._signals = 0
+
+    def run(self):
+        """Serve jobs until ``stop`` is called."""
+        threads = [threading.Thread(target=self._listen, name="jobs-listen", daemon=True)]
+        threads += [
+            threading.Thread(target=self._loop, args=(i == 0,), name=f"jobs-{i}", daemon=True)
+            for i in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        logger.info("Worker %s serving with %d threads", self.name, self.threads)
+        self._stop.wait()
+        for thread in threads:
+            thread.join(timeout=5)
+
+    def stop(self):
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def _listen(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = listen(JOBS_CHANNEL)
+                while not self._stop.is_set():
+                    signals = len(wait_notifies(conn, 1.0))
+                    if signals:
+                        with self._wakeup:
+                            self._signals += signals
+                            self._wakeup.notify(signals)
+            except Exception as e:
+                # Claim loops fall back to polling until the listener is back.
+                logger.warning("Job listener disconnected: %r", e)
+                self._stop.wait(JOB_IDLE_SECONDS)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _wait_for_work(self):
+        with self._wakeup:
+            if not self._signals:
+                self._wakeup.wait(JOB_IDLE_SECONDS)
+            self._signals = max(self._signals - 1, 0)
+
+    def _loop(self, reaper):
+        conn = None
+        last_reap = 0.0
+        while not self._stop.is_set():
+            try:
+                if conn is None:
+                    conn = get_db_connection()
+                if reaper and time.monotonic() - last_reap >= REAP_SECONDS:
+                    last_reap = time.monotonic()
+                    self._reap(conn)
+                job = self._claim(conn)
+                if job is None:
+                    self._wait_for_work()
+                    continue
+                self._process(conn, *job)
+            except Exception:
+                logger.exception("Job loop failed; reconnecting")
+                if conn is not None:
+                    conn.close()
+                    conn = None
+                self._stop.wait(1.0)
+        if conn is not None:
+            conn.close()
+
+    def _claim(self, conn):
+        cur = conn.cursor()
+        try:
+            job = claim_job(cur, self.name)
+            conn.commit()
+            return job
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    def _reap(self, conn):
+        cur = conn.cursor()
+        try:
+            requeued, failed = requeue_stale_jobs(cur)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+        if requeued or failed:
+            logger.warning("Stale jobs: requeued %s, failed %s", requeued, failed)
+
+    def _process(self, conn, job_id, attempts, question, payload):
+        history, last_seen = payload_arguments(payload)
+        result = error = None
+        try:
+            answer, prices, news, _ = self.analyzer.analyze(
+                question,
+                history_messages(history),
+                include_related=False,
+                last_seen=last_seen,
+            )
+            result = {"answer": answer, "prices": prices, "news": news}
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            error = str(e) or type(e).__name__
+
+        cur = conn.cursor()
+        try:
+            finished = finish_job(cur, job_id, self.name, attempts, result, error)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+        if not finished:
+            logger.warning("Job %s was taken over by a newer attempt; discarding this result", job_id)
+        elif error:
+            self.failed += 1
+        else:
+            self.completed += 1
+
+
+def run_worker(threads=JOB_THREADS, stop=None):
+    """One worker process; ``stop`` (a multiprocessing Event) ends it."""
+    worker = AnalysisWorker(get_shared_analyzer(), threads)
+    if stop is not None:
+        threading.Thread(target=lambda: (stop.wait(), worker.stop()), daemon=True).start()
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.jobs.worker", description="Answer queued analysis jobs")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=JOB_THREADS, help="claim loops per process")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.processes <= 1:
+        run_worker(args.threads)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    processes = [
+        context.Process(target=run_worker, args=(args.threads, stop), name=f"analysis-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        stop.set()
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.resilience.http import COINGECKO, provider_get
+
+COINGECKO_API = "https://api.coingecko.com/api/v3"
+CACHE_DIR = os.getenv("MARKET_CACHE_DIR", os.path.join(".cache", "market_history"))
+
+HOUR_MS = 3_600_000
+DAY_MS = 24 * HOUR_MS
+# CoinGecko serves hourly points for ranges up to 90 days.
+MAX_HISTORY_DAYS = 90
+# Every one of these returns 4-hour candles, so merged series stay uniform.
+OHLC_DAYS = (7, 14, 30)
+REFRESH_SECONDS = int(os.getenv("MARKET_HISTORY_REFRESH_SECONDS", "300"))
+SUMMARY_WINDOWS = (7, 30)
+
+INTERVAL_MS = {"1h": HOUR_MS, "4h": 4 * HOUR_MS}
+
+CHART_COLUMNS = ("ts", "price", "market_cap", "volume")
+OHLC_COLUMNS = ("ts", "open", "high", "low", "close")
+
+
+def _empty(columns):
+    return {
+        name: np.empty(0, dtype=np.int64 if name == "ts" else np.float64)
+        for name in columns
+    }
+
+
+def forward_fill(matrix):
+    """Forward-fill NaNs along the last axis of a 2-D array."""
+    idx = np.where(np.isnan(matrix), 0, np.arange(matrix.shape[1]))
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return matrix[np.arange(matrix.shape[0])[:, None], idx]
+
+
+def _merge(old, new, columns, bucket_ms):
+    """Concatenate two column sets, bucket timestamps and keep the newest row per bucket."""
+    merged = {name: np.concatenate([old[name], new[name]]) for name in columns}
+    if not len(merged["ts"]):
+        return merged
+
+    merged["ts"] = merged["ts"] // bucket_ms * bucket_ms
+    # Stable sort so that, within a bucket, rows from ``new`` come last.
+    order = np.argsort(merged["ts"], kind="stable")
+    merged = {name: col[order] for name, col in merged.items()}
+    ts = merged["ts"]
+    keep = np.ones(len(ts), dtype=bool)
+    keep[:-1] = ts[1:] != ts[:-1]
+
+    cutoff = int(time.time() * 1000) - MAX_HISTORY_DAYS * DAY_MS
+    keep &= ts >= cutoff
+    return {name: col[keep] for name, col in merged.items()}
+
+
+class _CoinHistory:
+    __slots__ = ("chart", "ohlc", "refreshed_at", "lock")
+
+    def __init__(self, chart, ohlc):
+        self.chart = chart
+        self.ohlc = ohlc
+        self.refreshed_at = 0.0
+        self.lock = threading.Lock()
+
+
+class MarketHistory:
+    """Hourly price/market-cap/volume and 4h OHLC history per coin.
+
+    Series are kept as NumPy columns in memory and in one ``.npz`` file per
+    coin. A refresh only asks CoinGecko for the range after the last stored
+    point.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, refresh_seconds=REFRESH_SECONDS):
+        self.cache_dir = cache_dir
+        self.refresh_seconds = refresh_seconds
+        self._coins = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="market-history")
+
+    def _path(self, coin_id):
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in coin_id)
+        return os.path.join(self.cache_dir, f"{safe}.npz")
+
+    def _entry(self, coin_id):
+        with self._lock:
+            entry = self._coins.get(coin_id)
+            if entry is None:
+                entry = _CoinHistory(*self._load(coin_id))
+                self._coins[coin_id] = entry
+            return entry
+
+    def _load(self, coin_id):
+        chart, ohlc = _empty(CHART_COLUMNS), _empty(OHLC_COLUMNS)
+        try:
+            with np.load(self._path(coin_id)) as data:
+                chart = {name: data[f"chart_{name}"] for name in CHART_COLUMNS}
+                ohlc = {name: data[f"ohlc_{name}"] for name in OHLC_COLUMNS}
+        except Exception:
+            pass
+        return chart, ohlc
+
+    def _save(self, coin_id, entry):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(coin_id)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            arrays = {f"chart_{k}": v for k, v in entry.chart.items()}
+            arrays.update({f"ohlc_{k}": v for k, v in entry.ohlc.items()})
+            with open(tmp, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, path)
+        except Exception:
+            pass
+
+    def _fetch_chart(self, coin_id, since_ms, now_ms):
+        url = f"{COINGECKO_API}/coins/{coin_id}/market_chart/range"
+        params = {
+            "vs_currency": "usd",
+            "from": since_ms // 1000,
+            "to": now_ms // 1000,
+        }
+        data = provider_get(COINGECKO, url, params=params)
+
+        prices = np.asarray(data.get("prices") or [], dtype=np.float64).reshape(-1, 2)
+        caps = dict(map(tuple, data.get("market_caps") or []))
+        volumes = dict(map(tuple, data.get("total_volumes") or []))
+        return {
+            "ts": prices[:, 0].astype(np.int64),
+            "price": prices[:, 1],
+            "market_cap": np.array([caps.get(t, np.nan) for t in prices[:, 0]], dtype=np.float64),
+            "volume": np.array([volumes.get(t, np.nan) for t in prices[:, 0]], dtype=np.float64),
+        }
+
+    def _fetch_ohlc(self, coin_id, days):
+        url = f"{COINGECKO_API}/coins/{coin_id}/ohlc"
+        rows = provider_get(COINGECKO, url, params={"vs_currency": "usd", "days": days})
+        rows = np.asarray(rows or [], dtype=np.float64).reshape(-1, 5)
+        return {
+            "ts": rows[:, 0].astype(np.int64),
+            "open": rows[:, 1],
+            "high": rows[:, 2],
+            "low": rows[:, 3],
+            "close": rows[:, 4],
+        }
+
+    def refresh(self, coin_id, force=False):
+        """Download whatever is missing for ``coin_id``; returns the cached entry."""
+        entry = self._entry(coin_id)
+        with entry.lock:
+            if not force and time.time() - entry.refreshed_at < self.refresh_seconds:
+                return entry
+
+            now_ms = int(time.time() * 1000)
+            oldest_wanted = now_ms - max(SUMMARY_WINDOWS) * DAY_MS
+            changed = False
+
+            chart_ts = entry.chart["ts"]
+            # Re-fetch the last (possibly partial) hour so it gets finalized.
+            since = int(chart_ts[-1]) if len(chart_ts) and chart_ts[-1] >= oldest_wanted else oldest_wanted
+            try:
+                new = self._fetch_chart(coin_id, since, now_ms)
+                entry.chart = _merge(entry.chart, new, CHART_COLUMNS, HOUR_MS)
+                changed = True
+            except Exception:
+                pass
+
+            ohlc_ts = entry.ohlc["ts"]
+            missing_days = (now_ms - int(ohlc_ts[-1])) / DAY_MS if len(ohlc_ts) else max(OHLC_DAYS)
+            days = next((d for d in OHLC_DAYS if d >= missing_days), max(OHLC_DAYS))
+            try:
+                new = self._fetch_ohlc(coin_id, days)
+                entry.ohlc = _merge(entry.ohlc, new, OHLC_COLUMNS, 4 * HOUR_MS)
+                changed = True
+            except Exception:
+                pass
+
+            if changed:
+                entry.refreshed_at = time.time()
+                self._save(coin_id, entry)
+            return entry
+
+    def refresh_many(self, coin_ids):
+        # Each task runs in a copy of the caller's context so its requests
+        # see the caller's deadline.
+        futures = [
+            self._pool.submit(contextvars.copy_context().run, self.refresh, coin_id)
+            for coin_id in coin_ids
+        ]
+        return [future.result() for future in futures]
+
+    def summarize(self, coin_id, windows=SUMMARY_WINDOWS):
+        """Window statistics from the cached series, without any network access."""
+        entry = self._entry(coin_id)
+        chart, ohlc = entry.chart, entry.ohlc
+        ts, price = chart["ts"], chart["price"]
+        if len(ts) < 2:
+            return {}
+
+        now_ms = int(ts[-1])
+        summary = {}
+        for days in windows:
+            start = now_ms - days * DAY_MS
+            mask = ts >= start
+            window = price[mask]
+            if len(window) < 2:
+                continue
+
+            log_returns = np.diff(np.log(window))
+            candle_mask = ohlc["ts"] >= start
+            if candle_mask.any():
+                high = float(np.nanmax(ohlc["high"][candle_mask]))
+                low = float(np.nanmin(ohlc["low"][candle_mask]))
+            else:
+                high, low = float(np.nanmax(window)), float(np.nanmin(window))
+
+            summary[days] = {
+                "start": float(window[0]),
+                "end": float(window[-1]),
+                "change": float((window[-1] / window[0] - 1) * 100),
+                "high": high,
+                "low": low,
+                "avg_volume": float(np.nanmean(chart["volume"][mask])),
+                # Hourly log returns, annualized.
+                "volatility": float(np.std(log_returns) * np.sqrt(24 * 365) * 100),
+                "covers_window": bool(ts[0] <= start + DAY_MS),
+            }
+        return summary
+
+    def close_matrix(self, coin_ids, interval="1h", days=30, complete_only=True):
+        """Closes for ``coin_ids`` on a shared time grid, forward-filled.
+
+        Returns ``(ts, closes)`` where ``closes`` has one row per coin and NaN
+        before a coin's first known point. ``interval`` is ``"1h"`` (market
+        chart) or ``"4h"`` (OHLC closes). With ``complete_only`` the candle
+        that is still forming is left out.
+        """
+        bucket = INTERVAL_MS[interval]
+        series = []
+        for coin_id in coin_ids:
+            entry = self._entry(coin_id)
+            if interval == "1h":
+                series.append((entry.chart["ts"], entry.chart["price"]))
+            else:
+                series.append((entry.ohlc["ts"], entry.ohlc["close"]))
+
+        last = max((int(ts[-1]) for ts, _ in series if len(ts)), default=None)
+        if last is None:
+            return np.empty(0, dtype=np.int64), np.full((len(coin_ids), 0), np.nan)
+
+        last = last // bucket * bucket
+        if complete_only:
+            last = min(last, int(time.time() * 1000) // bucket * bucket - bucket)
+        grid = np.arange(last - days * DAY_MS + bucket, last + bucket, bucket, dtype=np.int64)
+        closes = np.full((len(coin_ids), len(grid)), np.nan)
+        for row, (ts, values) in enumerate(series):
+            idx = (ts // bucket * bucket - grid[0]) // bucket
+            ok = (idx >= 0) & (idx < len(grid))
+            closes[row, idx[ok]] = values[ok]
+        return grid, forward_fill(closes)
+
+    def format_summaries(self, coin_names):
+        """Render 7d/30d summaries for ``{coin_id: display name}`` as prompt lines.
+
+        Only reads what is cached; call ``refresh_many`` first for fresh data.
+        """
+        lines = ""
+        for coin_id in coin_names:
+            try:
+                summary = self.summarize(coin_id)
+            except Exception:
+                continue
+            for days, s in summary.items():
+                partial = "" if s["covers_window"] else " (partial history)"
+                lines += (
+                    f"- {coin_names[coin_id]} {days}d{partial}: "
+                    f"{s['change']:+.2f}% ({s['start']:,.2f} -> {s['end']:,.2f}), "
+                    f"range {s['low']:,.2f}-{s['high']:,.2f}, "
+                    f"annualized volatility {s['volatility']:.0f}%\n"
+                )
+        return lines
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_market_history() -> MarketHistory:
+    """Process-wide history cache shared by every analyzer."""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = MarketHistory()
+        return _history
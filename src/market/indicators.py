@@ -0,0 +1,244 @@
+import threading
+import warnings
+
+import numpy as np
+
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BOLLINGER_PERIOD = 20
+BOLLINGER_WIDTH = 2.0
+# Candles per realized-volatility / correlation window, per interval (7 days).
+WINDOW_CANDLES = {"1h": 24 * 7, "4h": 6 * 7}
+CANDLES_PER_YEAR = {"1h": 24 * 365, "4h": 6 * 365}
+# Candles needed before MACD and RSI are trustworthy.
+WARMUP = MACD_SLOW + MACD_SIGNAL
+
+
+class _State:
+    """Recursive indicator state of one coin at one interval."""
+
+    __slots__ = ("as_of", "close", "ema_fast", "ema_slow", "signal", "avg_gain", "avg_loss", "count")
+
+    def __init__(self):
+        self.as_of = None
+        self.close = np.nan
+        self.ema_fast = np.nan
+        self.ema_slow = np.nan
+        self.signal = np.nan
+        self.avg_gain = np.nan
+        self.avg_loss = np.nan
+        self.count = 0
+
+
+def _ema_step(prev, value, alpha, mask):
+    """One EMA step for every row where ``mask`` is set; seeds NaN state with ``value``."""
+    step = np.where(np.isnan(prev), value, prev + alpha * (value - prev))
+    return np.where(mask, step, prev)
+
+
+def _window_stats(closes, period):
+    """Mean and std of the last ``period`` closes per row, ignoring NaNs."""
+    tail = closes[:, -period:]
+    with warnings.catch_warnings():
+        # All-NaN rows (coins with no data yet) just yield NaN.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmean(tail, axis=1), np.nanstd(tail, axis=1)
+
+
+def log_returns(closes):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.diff(np.log(closes), axis=1)
+
+
+def correlation_matrix(closes, interval="1h"):
+    """Pairwise correlation of log returns over the last window; NaN where undefined."""
+    returns = log_returns(closes[:, -(WINDOW_CANDLES[interval] + 1):])
+    valid = ~np.isnan(returns)
+    n = valid.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        centered = np.where(valid, returns - np.nansum(returns, axis=1, keepdims=True) / n, 0.0)
+        cov = centered @ centered.T
+        std = np.sqrt(np.diag(cov))
+        corr = cov / np.outer(std, std)
+    return np.clip(corr, -1.0, 1.0)
+
+
+class IndicatorEngine:
+    """Batched RSI, MACD, Bollinger and realized-volatility computation.
+
+    ``update`` takes a whole ``(coins, candles)`` close matrix and advances
+    the recursive state of every coin at once, one time column at a time,
+    skipping candles a coin has already seen. Results are cached per
+    ``(coin, interval, as_of)``, so repeating a question without new candles
+    costs a dictionary lookup.
+    """
+
+    def __init__(self):
+        self._states = {}
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def update(self, coin_ids, ts, closes, interval="1h"):
+        """Return ``{coin_id: indicators}`` as of each coin's latest candle."""
+        if not len(coin_ids) or not len(ts):
+            return {}
+
+        with self._lock:
+            states = [self._states.setdefault((c, interval), _State()) for c in coin_ids]
+            latest = self._latest(ts, closes)
+
+            results = {}
+            stale_rows = []
+            for row, (coin_id, as_of) in enumerate(zip(coin_ids, latest)):
+                cached = self._results.get((coin_id, interval, as_of))
+                if cached is not None:
+                    results[coin_id] = cached
+                elif as_of is not None:
+                    stale_rows.append(row)
+
+            if stale_rows:
+                rows = np.asarray(stale_rows)
+                fresh = self._advance(
+                    [states[r] for r in rows], ts, closes[rows], interval
+                )
+                for r, result in zip(rows, fresh):
+                    key = (coin_ids[r], interval, result["as_of"])
+                    self._results[key] = result
+                    results[coin_ids[r]] = result
+                self._evict(interval)
+            return results
+
+    @staticmethod
+    def _latest(ts, closes):
+        """Timestamp of each row's last non-NaN close, or None."""
+        known = ~np.isnan(closes)
+        last = closes.shape[1] - 1 - np.argmax(known[:, ::-1], axis=1)
+        return [int(t) if ok else None for t, ok in zip(ts[last], known.any(axis=1))]
+
+    def _advance(self, states, ts, closes, interval):
+        n = len(states)
+        as_of = np.array([s.as_of if s.as_of is not None else -1 for s in states], dtype=np.int64)
+        prev_close = np.array([s.close for s in states])
+        ema_fast = np.array([s.ema_fast for s in states])
+        ema_slow = np.array([s.ema_slow for s in states])
+        signal = np.array([s.signal for s in states])
+        avg_gain = np.array([s.avg_gain for s in states])
+        avg_loss = np.array([s.avg_loss for s in states])
+        count = np.array([s.count for s in states], dtype=np.int64)
+
+        fast_alpha = 2.0 / (MACD_FAST + 1)
+        slow_alpha = 2.0 / (MACD_SLOW + 1)
+        signal_alpha = 2.0 / (MACD_SIGNAL + 1)
+        rsi_alpha = 1.0 / RSI_PERIOD
+
+        # Only walk the columns at least one coin hasn't consumed yet.
+        start = int(np.searchsorted(ts, as_of.min(), side="right"))
+        for col in range(start, len(ts)):
+            value = closes[:, col]
+            mask = (ts[col] > as_of) & ~np.isnan(value)
+            if not mask.any():
+                continue
+
+            change = value - prev_close
+            has_prev = mask & ~np.isnan(prev_close)
+            gain = np.where(change > 0, change, 0.0)
+            loss = np.where(change < 0, -change, 0.0)
+            avg_gain = _ema_step(avg_gain, gain, rsi_alpha, has_prev)
+            avg_loss = _ema_step(avg_loss, loss, rsi_alpha, has_prev)
+
+            ema_fast = _ema_step(ema_fast, value, fast_alpha, mask)
+            ema_slow = _ema_step(ema_slow, value, slow_alpha, mask)
+            signal = _ema_step(signal, ema_fast - ema_slow, signal_alpha, mask)
+
+            prev_close = np.where(mask, value, prev_close)
+            as_of = np.where(mask, ts[col], as_of)
+            count += mask
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+        macd = ema_fast - ema_slow
+
+        bb_mid, bb_std = _window_stats(closes, BOLLINGER_PERIOD)
+        bb_upper = bb_mid + BOLLINGER_WIDTH * bb_std
+        bb_lower = bb_mid - BOLLINGER_WIDTH * bb_std
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct_b = (prev_close - bb_lower) / (bb_upper - bb_lower)
+
+        _, vol = _window_stats(log_returns(closes[:, -(WINDOW_CANDLES[interval] + 1):]), WINDOW_CANDLES[interval])
+        volatility = vol * np.sqrt(CANDLES_PER_YEAR[interval]) * 100
+
+        results = []
+        for i in range(n):
+            state = states[i]
+            state.as_of = int(as_of[i])
+            state.close = prev_close[i]
+            state.ema_fast = ema_fast[i]
+            state.ema_slow = ema_slow[i]
+            state.signal = signal[i]
+            state.avg_gain = avg_gain[i]
+            state.avg_loss = avg_loss[i]
+            state.count = int(count[i])
+            results.append(
+                {
+                    "as_of": state.as_of,
+                    "close": float(prev_close[i]),
+                    "rsi": float(rsi[i]),
+                    "macd": float(macd[i]),
+                    "macd_signal": float(signal[i]),
+                    "macd_hist": float(macd[i] - signal[i]),
+                    "bb_mid": float(bb_mid[i]),
+                    "bb_upper": float(bb_upper[i]),
+                    "bb_lower": float(bb_lower[i]),
+                    "bb_pct_b": float(pct_b[i]),
+                    "volatility": float(volatility[i]),
+                    "warm": state.count >= WARMUP,
+                }
+            )
+        return results
+
+    def _evict(self, interval):
+        """Drop cached results that are older than their coin's current state."""
+        current = {c: s.as_of for (c, i), s in self._states.items() if i == interval}
+        for key in [k for k in self._results if k[1] == interval and k[2] != current.get(k[0])]:
+            del self._results[key]
+
+
+def format_indicators(results, names, corr=None, coin_ids=None):
+    """Prompt lines for ``results`` keyed by coin id, using ``names`` for display."""
+    lines = ""
+    for coin_id, r in results.items():
+        if not r["warm"]:
+            continue
+        lines += (
+            f"- {names.get(coin_id, coin_id)}: RSI {r['rsi']:.0f} | "
+            f"MACD {r['macd']:+,.4g} (signal {r['macd_signal']:+,.4g}, hist {r['macd_hist']:+,.4g}) | "
+            f"Bollinger {r['bb_lower']:,.2f}-{r['bb_upper']:,.2f} (%B {r['bb_pct_b']:.2f}) | "
+            f"7d realized volatility {r['volatility']:.0f}%\n"
+        )
+
+    if corr is not None and coin_ids is not None and len(coin_ids) > 1:
+        pairs = []
+        for i in range(len(coin_ids)):
+            for j in range(i + 1, len(coin_ids)):
+                if not np.isnan(corr[i, j]):
+                    pairs.append(
+                        f"{names.get(coin_ids[i], coin_ids[i])}/{names.get(coin_ids[j], coin_ids[j])} "
+                        f"{corr[i, j]:+.2f}"
+                    )
+        if pairs:
+            lines += "- 7d return correlation: " + ", ".join(pairs) + "\n"
+    return lines
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_indicator_engine() -> IndicatorEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = IndicatorEngine()
+        return _engine
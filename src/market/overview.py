@@ -0,0 +1,165 @@
+import math
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from src.market.history import COINGECKO_API
+from src.market.ticks import get_tick_writer
+from src.resilience.http import COINGECKO, provider_get
+
+PER_PAGE = 250
+OVERVIEW_TOP_N = int(os.getenv("MARKET_OVERVIEW_TOP_N", "100"))
+OVERVIEW_TTL_SECONDS = int(os.getenv("MARKET_OVERVIEW_TTL_SECONDS", "120"))
+TOP_MOVERS = 5
+LEADERS = 5
+
+_OVERVIEW_PATTERN = re.compile(
+    r"\b(market overview|overall market|whole market|entire market|crypto market|"
+    r"market summary|top coins|top \d+ coins|market breadth|state of the market)\b",
+    re.IGNORECASE,
+)
+
+
+def is_overview_question(question: str) -> bool:
+    return bool(_OVERVIEW_PATTERN.search(question or ""))
+
+
+def fetch_markets(top_n=OVERVIEW_TOP_N):
+    """Top ``top_n`` coins by market cap as column arrays, in as few pages as possible."""
+    per_page = min(top_n, PER_PAGE)
+    rows = []
+    for page in range(1, math.ceil(top_n / per_page) + 1):
+        batch = provider_get(
+            COINGECKO,
+            f"{COINGECKO_API}/coins/markets",
+            params={
+                "vs_currency": "usd",
+                "order": "market_cap_desc",
+                "per_page": per_page,
+                "page": page,
+                "price_change_percentage": "24h",
+            },
+        )
+        rows.extend(batch)
+        if len(batch) < per_page:
+            break
+    rows = rows[:top_n]
+    get_tick_writer().record(
+        (r["id"], r.get("current_price"), r.get("price_change_percentage_24h")) for r in rows
+    )
+
+    def column(key):
+        return np.array(
+            [r.get(key) if r.get(key) is not None else np.nan for r in rows],
+            dtype=np.float64,
+        )
+
+    return {
+        "id": [r["id"] for r in rows],
+        "symbol": [r.get("symbol", "").upper() for r in rows],
+        "name": [r.get("name", r["id"]) for r in rows],
+        "price": column("current_price"),
+        "market_cap": column("market_cap"),
+        "market_cap_change": column("market_cap_change_percentage_24h"),
+        "change": column("price_change_percentage_24h"),
+        "volume": column("total_volume"),
+    }
+
+
+def _coin(markets, i):
+    return {
+        "id": markets["id"][i],
+        "name": markets["name"][i],
+        "symbol": markets["symbol"][i],
+        "price": float(markets["price"][i]),
+        "change": float(np.nan_to_num(markets["change"][i])),
+    }
+
+
+def compute_overview(markets):
+    """Aggregate statistics over the market columns, all in vectorized form."""
+    cap = markets["market_cap"]
+    change = markets["change"]
+    known_cap = np.nan_to_num(cap)
+    total_cap = float(known_cap.sum())
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prev_cap = known_cap / (1 + np.nan_to_num(markets["market_cap_change"]) / 100)
+    prev_total = float(prev_cap.sum())
+    cap_change = (total_cap / prev_total - 1) * 100 if prev_total else 0.0
+
+    valid = ~np.isnan(change)
+    weights = np.where(valid, known_cap, 0)
+    cap_weighted = float(np.average(np.nan_to_num(change), weights=weights)) if weights.sum() else 0.0
+
+    share = known_cap / total_cap * 100 if total_cap else np.zeros_like(known_cap)
+    # NaNs sort last, so the first n_valid entries are the known moves.
+    by_change = np.argsort(change)
+    n_valid = int(valid.sum())
+    ranked = by_change[:n_valid]
+    gainers = ranked[::-1][:TOP_MOVERS]
+    gainers = gainers[change[gainers] > 0]
+    losers = ranked[:TOP_MOVERS]
+    losers = losers[change[losers] < 0]
+
+    return {
+        "coins": len(markets["id"]),
+        "total_market_cap": total_cap,
+        "market_cap_change": cap_change,
+        "total_volume": float(np.nansum(markets["volume"])),
+        "advancers": int((change > 0).sum()),
+        "decliners": int((change < 0).sum()),
+        "median_change": float(np.nanmedian(change)) if n_valid else 0.0,
+        "cap_weighted_change": cap_weighted,
+        "dominance": [
+            (markets["symbol"][i], float(share[i])) for i in range(min(2, len(share)))
+        ],
+        "gainers": [_coin(markets, i) for i in gainers],
+        "losers": [_coin(markets, i) for i in losers],
+        "leaders": [_coin(markets, i) for i in range(min(LEADERS, len(markets["id"])))],
+        "fetched_at": time.time(),
+    }
+
+
+def format_overview(overview):
+    """Compact prompt block replacing the per-coin price lines"""
+
+    def movers(coins):
+        return ", ".join(f"{c['symbol']} {c['change']:+.1f}%" for c in coins) or "none"
+
+    dominance = ", ".join(f"{symbol} {share:.1f}%" for symbol, share in overview["dominance"])
+    return (
+        f"**MARKET OVERVIEW (top {overview['coins']} coins by market cap):**\n"
+        f"- Total market cap: ${overview['total_market_cap'] / 1e9:,.0f}B "
+        f"({overview['market_cap_change']:+.2f}% 24h), 24h volume ${overview['total_volume'] / 1e9:,.0f}B\n"
+        f"- Breadth: {overview['advancers']} advancing, {overview['decliners']} declining; "
+        f"median move {overview['median_change']:+.2f}%, cap-weighted move {overview['cap_weighted_change']:+.2f}%\n"
+        f"- Dominance within top {overview['coins']}: {dominance}\n"
+        f"- Top gainers: {movers(overview['gainers'])}\n"
+        f"- Top losers: {movers(overview['losers'])}\n"
+    )
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_market_overview(top_n=OVERVIEW_TOP_N, ttl=OVERVIEW_TTL_SECONDS):
+    """Overview shared by every session in the process, refreshed after ``ttl`` seconds.
+
+    Only one caller fetches at a time; the rest wait and reuse its result. If a
+    refresh fails the last overview is served until a later one succeeds.
+    """
+    with _cache_lock:
+        cached = _cache.get(top_n)
+        if cached and time.time() - cached["fetched_at"] < ttl:
+            return cached
+        try:
+            overview = compute_overview(fetch_markets(top_n))
+        except Exception:
+            return cached
+        _cache[top_n] = overview
+        return overview
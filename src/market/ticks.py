@@ -0,0 +1,369 @@
+"""Every fetched quote, kept as a narrow time series in ``price_ticks``.
+
+Quotes are queued by whoever fetched them and inserted in batches by one
+writer thread, so fetching never waits on the database. ``moves_since``
+answers "how did the price move since then" from stored ticks alone.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import psycopg2.extras
+
+from src.database.connection import get_db_connection, get_read_connection
+from src.database.maintenance import NotPartitionedError, is_partitioned
+from src.database.schema import TICKS_STATEMENTS
+
+logger = logging.getLogger(__name__)
+
+TICK_FLUSH_SECONDS = float(os.getenv("TICK_FLUSH_SECONDS", "2"))
+TICK_MAX_BATCH = 5000
+# Ticks waiting to be written; beyond this new ones are dropped, not queued.
+TICK_MAX_QUEUE = 100_000
+TICK_RETENTION_DAYS = int(os.getenv("TICK_RETENTION_DAYS", "90"))
+# Daily partitions created ahead of today; maintenance must run more often than this.
+TICK_PARTITION_DAYS_AHEAD = int(os.getenv("TICK_PARTITION_DAYS_AHEAD", "7"))
+_PARTITION_LOCK_KEY = "price_ticks_partitions"
+
+_STOP = object()
+
+
+class TickWriter:
+    """Background batch inserter for ``price_ticks``."""
+
+    def __init__(self, flush_seconds=TICK_FLUSH_SECONDS, max_batch=TICK_MAX_BATCH):
+        self.flush_seconds = flush_seconds
+        self.max_batch = max_batch
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=TICK_MAX_QUEUE)
+        self._thread = threading.Thread(target=self._run, name="price-ticks", daemon=True)
+        self._thread.start()
+
+    def record(self, quotes, ts=None):
+        """Queue ``(coin_id, price, change)`` quotes; ``ts`` defaults to now."""
+        ts = ts or datetime.now(timezone.utc)
+        for coin_id, price, change in quotes:
+            if price is None:
+                continue
+            try:
+                self._queue.put_nowait((coin_id, ts, float(price), None if change is None else float(change)))
+            except queue.Full:
+                self.dropped += 1
+
+    def record_prices(self, prices):
+        """Queue analyzer price dicts (``id``, ``price``, ``change``)."""
+        self.record((coin["id"], coin["price"], coin.get("change")) for coin in prices)
+
+    def flush(self, timeout=10.0) -> bool:
+        """Block until everything queued so far is written (or dropped)."""
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_seconds
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    # A flush writes what is queued now instead of waiting out the interval.
+                    deadline = 0
+                else:
+                    batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    # Ticks are a best-effort record; never retry into a backlog.
+                    logger.warning("Dropped %d price ticks: %r", len(batch), e)
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, rows):
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            psycopg2.extras.execute_values(
+                cur,
+                "INSERT INTO price_ticks (coin_id, ts, price, change) VALUES %s",
+                rows,
+                page_size=self.max_batch,
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_tick_writer() -> TickWriter:
+    """Return the per-process tick writer, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = TickWriter()
+            atexit.register(_writer.close)
+        return _writer
+
+
+def moves_since(since):
+    """Price path of each coin since a given time, from stored ticks only.
+
+    ``since`` maps coin ids to timezone-aware datetimes. Returns
+    ``{coin_id: {"first", "last", "low", "high", "ticks", "first_at", "last_at"}}``
+    for coins with at least one tick since then.
+    """
+    if not since:
+        return {}
+    coin_ids = list(since)
+    starts = [since[c] for c in coin_ids]
+    conn = get_read_connection()
+    cur = conn.cursor()
+    try:
+        # The bare ts bound lets the BRIN index skip everything older.
+        cur.execute(
+            """
+            SELECT t.coin_id,
+                   (array_agg(t.price ORDER BY t.ts))[1],
+                   (array_agg(t.price ORDER BY t.ts DESC))[1],
+                   min(t.price), max(t.price), count(*), min(t.ts), max(t.ts)
+            FROM price_ticks t
+            JOIN unnest(%(coins)s::text[], %(starts)s::timestamptz[]) AS s (coin_id, since)
+              ON t.coin_id = s.coin_id AND t.ts >= s.since
+            WHERE t.ts >= %(oldest)s
+            GROUP BY t.coin_id
+            """,
+            {"coins": coin_ids, "starts": starts, "oldest": min(starts)},
+        )
+        return {
+            coin_id: {
+                "first": first,
+                "last": last,
+                "low": low,
+                "high": high,
+                "ticks": ticks,
+                "first_at": first_at,
+                "last_at": last_at,
+            }
+            for coin_id, first, last, low, high, ticks, first_at, last_at in cur.fetchall()
+        }
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _ago(then, now):
+    seconds = max((now - then).total_seconds(), 0)
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min ago"
+    if seconds < 2 * 86400:
+        return f"{seconds / 3600:.1f} h ago"
+    return f"{seconds / 86400:.1f} days ago"
+
+
+def _price(value):
+    return f"{value:,.2f}" if abs(value) >= 1 else f"{value:.6g}"
+
+
+def format_moves(last_seen, prices, moves):
+    """Prompt lines on how each coin moved since the chat last discussed it.
+
+    ``last_seen`` maps coin ids to ``(when, price_then)``; ``prices`` are
+    this answer's quotes, which take precedence over the latest tick.
+    """
+    now = datetime.now(timezone.utc)
+    current = {coin["id"]: coin for coin in prices}
+    lines = []
+    for coin_id, (when, then_price) in last_seen.items():
+        move = moves.get(coin_id)
+        coin = current.get(coin_id)
+        now_price = coin["price"] if coin else (move["last"] if move else None)
+        if not then_price or now_price is None:
+            continue
+        name = coin["name"] if coin else coin_id
+        line = (
+            f"- {name}: {_price(then_price)} when last discussed ({_ago(when, now)}), "
+            f"now {_price(now_price)} ({(now_price / then_price - 1) * 100:+.2f}%)"
+        )
+        if move and move["ticks"] > 1:
+            low = min(move["low"], now_price)
+            high = max(move["high"], now_price)
+            line += f"; range since then {_price(low)} to {_price(high)} over {move['ticks']} quotes"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def tick_partition_name(day: date) -> str:
+    return f"price_ticks_{day:%Y_%m_%d}"
+
+
+def _day_start(day: date) -> datetime:
+    # Partition bounds are UTC midnights whatever the session time zone.
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+def _ensure_tick_partitions(cur, days_ahead, extra_days=()):
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (_PARTITION_LOCK_KEY,))
+    today = datetime.now(timezone.utc).date()
+    days = {today + timedelta(days=n) for n in range(days_ahead + 1)}
+    days.update(extra_days)
+
+    created = []
+    for day in sorted(days):
+        name = tick_partition_name(day)
+        cur.execute("SELECT to_regclass(%s)", (name,))
+        if cur.fetchone()[0] is None:
+            cur.execute(
+                f"CREATE TABLE {name} PARTITION OF price_ticks FOR VALUES FROM (%s) TO (%s)",
+                (_day_start(day), _day_start(day + timedelta(days=1))),
+            )
+            created.append(name)
+    return created
+
+
+def ensure_tick_partitions(days_ahead=TICK_PARTITION_DAYS_AHEAD):
+    """Create missing daily partitions up to ``days_ahead`` days out.
+
+    Returns the names of the partitions created. Raises
+    ``NotPartitionedError`` if ``price_ticks`` predates partitioning.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        if not is_partitioned(cur, "price_ticks"):
+            raise NotPartitionedError(
+                "price_ticks is not partitioned; run `python -m src.database.maintenance migrate` once"
+            )
+        created = _ensure_tick_partitions(cur, days_ahead)
+        conn.commit()
+        return created
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def prune_ticks(days=TICK_RETENTION_DAYS):
+    """Drop the daily partitions that ended more than ``days`` ago; returns their names.
+
+    Whole days go at once, so rows are never deleted in place. Also
+    summarizes any BRIN ranges autovacuum hasn't got to yet.
+    """
+    cutoff = datetime.now(timezone.utc).date() - timedelta(days=days)
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        if not is_partitioned(cur, "price_ticks"):
+            return []
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (_PARTITION_LOCK_KEY,))
+        cur.execute(
+            """
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'price_ticks'::regclass
+              AND c.relname ~ '^price_ticks_[0-9]{4}_[0-9]{2}_[0-9]{2}$'
+            """
+        )
+        dropped = []
+        for (name,) in sorted(cur.fetchall()):
+            day = datetime.strptime(name[len("price_ticks_"):], "%Y_%m_%d").date()
+            if day + timedelta(days=1) <= cutoff:
+                cur.execute(f"DROP TABLE {name}")
+                dropped.append(name)
+        cur.execute(
+            """
+            SELECT brin_summarize_new_values(relid)
+            FROM pg_partition_tree('price_ticks_ts_brin') WHERE isleaf
+            """
+        )
+        conn.commit()
+        return dropped
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def migrate_ticks_to_partitions(days=TICK_RETENTION_DAYS, days_ahead=TICK_PARTITION_DAYS_AHEAD):
+    """Rebuild an unpartitioned ``price_ticks`` table as a partitioned one.
+
+    Only ticks within ``days`` of retention are kept, copied in ts order.
+    Runs in one transaction holding an exclusive lock on ``price_ticks``,
+    so tick inserts wait until the copy is done.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        if is_partitioned(cur, "price_ticks"):
+            return False
+        cur.execute("LOCK TABLE price_ticks IN ACCESS EXCLUSIVE MODE")
+        cur.execute("ALTER TABLE price_ticks RENAME TO price_ticks_unpartitioned")
+        cur.execute("DROP INDEX IF EXISTS price_ticks_ts_brin")
+
+        for statement in TICKS_STATEMENTS:
+            cur.execute(statement)
+
+        cutoff = _day_start(datetime.now(timezone.utc).date() - timedelta(days=days))
+        cur.execute(
+            """
+            SELECT DISTINCT (ts AT TIME ZONE 'UTC')::date
+            FROM price_ticks_unpartitioned WHERE ts >= %s
+            """,
+            (cutoff,),
+        )
+        _ensure_tick_partitions(cur, days_ahead, [row[0] for row in cur.fetchall()])
+        cur.execute(
+            """
+            INSERT INTO price_ticks (coin_id, ts, price, change)
+            SELECT coin_id, ts, price, change FROM price_ticks_unpartitioned
+            WHERE ts >= %s ORDER BY ts
+            """,
+            (cutoff,),
+        )
+        cur.execute("DROP TABLE price_ticks_unpartitioned")
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
@@ -0,0 +1,232 @@
+"""Relevance ranking of news articles against a question.
+
+Headlines are turned into hashed word unigram and bigram features, plus
+one feature per tagged currency, and kept as sparse TF vectors in flat
+NumPy arrays. A search weights both sides by IDF and returns cosine
+similarity, discounted by age. Articles are added as they are fetched, so
+the index grows incrementally; the oldest are dropped once it is full.
+"""
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from src.news.sentiment import get_sentiment_scorer
+from src.news.store import recent_articles
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIM = 1 << 18
+NEWS_INDEX_MAX_ARTICLES = int(os.getenv("NEWS_INDEX_MAX_ARTICLES", "20000"))
+# Stored articles loaded when the index is first used.
+NEWS_INDEX_WARM_ARTICLES = 2000
+# Relevance halves every this many hours; older than the max age never ranks.
+NEWS_HALF_LIFE_HOURS = float(os.getenv("NEWS_HALF_LIFE_HOURS", "24"))
+NEWS_MAX_AGE_HOURS = float(os.getenv("NEWS_MAX_AGE_HOURS", "168"))
+MIN_SIMILARITY = 0.05
+# Document norms are recomputed with fresh IDF once the index grows this much.
+RENORM_GROWTH = 1.25
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the this "
+    "to was were what when where which who why will with about after into over than "
+    "today now price prices news crypto latest".split()
+)
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def features(text, currencies=()):
+    """Hashed feature ids for ``text`` and ``currencies`` (one entry per occurrence)."""
+    words = [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    grams += [f"${code.lower()}" for code in currencies if code]
+    return [zlib.crc32(gram.encode()) & (INDEX_DIM - 1) for gram in grams]
+
+
+def _key(article):
+    return " ".join(article.get("title", "").lower().split())
+
+
+class NewsIndex:
+    """Incremental hashed TF-IDF index over article headlines.
+
+    Every article's features live in the flat ``indices``/``tf`` arrays;
+    ``entry_rows`` maps each entry back to its article, so a search is one
+    gather and one ``bincount`` over every entry.
+    """
+
+    def __init__(self, max_articles=NEWS_INDEX_MAX_ARTICLES):
+        self.max_articles = max_articles
+        self.articles = []
+        self._rows = {}
+        self._times = np.zeros(0)
+        self._norms = np.zeros(0)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._tf = np.zeros(0, dtype=np.float32)
+        self._entry_rows = np.zeros(0, dtype=np.int32)
+        self._df = np.zeros(INDEX_DIM, dtype=np.int32)
+        self._normed_at = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.articles)
+
+    def _idf(self, ids):
+        return np.log((1 + len(self.articles)) / (1 + self._df[ids])) + 1
+
+    def add(self, articles, published=None):
+        """Index ``articles`` not seen before; returns how many were new.
+
+        ``published`` gives each article's publish time (datetime or epoch
+        seconds); articles without one count as published now. Known articles get their fields
+        refreshed (votes, sentiment) but keep their vector.
+        """
+        now = time.time()
+        published = published or [None] * len(articles)
+        with self._lock:
+            rows, times, indices, tf = [], [], [], []
+            for article, when in zip(articles, published):
+                key = _key(article)
+                if not key:
+                    continue
+                if key in self._rows:
+                    self.articles[self._rows[key]] = article
+                    continue
+                grams = features(article["title"], article.get("currencies") or ())
+                ids, counts = np.unique(grams, return_counts=True)
+                self._rows[key] = len(self.articles) + len(rows)
+                rows.append(article)
+                times.append(when.timestamp() if hasattr(when, "timestamp") else (when or now))
+                indices.append(ids.astype(np.int32))
+                tf.append((1 + np.log(counts)).astype(np.float32))
+            if not rows:
+                return 0
+
+            first = len(self.articles)
+            self.articles.extend(rows)
+            sizes = [len(ids) for ids in indices]
+            indices = np.concatenate(indices)
+            tf = np.concatenate(tf)
+            entry_rows = np.repeat(np.arange(first, len(self.articles), dtype=np.int32), sizes)
+            np.add.at(self._df, indices, 1)
+
+            # New rows are normed with the current IDF; older rows catch up in _renorm.
+            weights = tf * self._idf(indices)
+            norms = np.sqrt(np.bincount(entry_rows - first, weights**2, minlength=len(rows)))
+            self._indices = np.concatenate([self._indices, indices])
+            self._tf = np.concatenate([self._tf, tf])
+            self._entry_rows = np.concatenate([self._entry_rows, entry_rows])
+            self._times = np.concatenate([self._times, times])
+            self._norms = np.concatenate([self._norms, norms])
+
+            if len(self.articles) > self.max_articles:
+                self._drop_oldest(len(self.articles) - self.max_articles * 3 // 4)
+            elif len(self.articles) >= self._normed_at * RENORM_GROWTH:
+                self._renorm()
+            return len(rows)
+
+    def _renorm(self):
+        weights = self._tf * self._idf(self._indices)
+        self._norms = np.sqrt(np.bincount(self._entry_rows, weights**2, minlength=len(self.articles)))
+        self._normed_at = len(self.articles)
+
+    def _drop_oldest(self, count):
+        """Remove the ``count`` oldest articles and rebuild the arrays."""
+        keep = np.ones(len(self.articles), dtype=bool)
+        keep[np.argsort(self._times, kind="stable")[:count]] = False
+        new_row = np.cumsum(keep, dtype=np.int32) - 1
+        entries = keep[self._entry_rows]
+
+        self.articles = [a for a, k in zip(self.articles, keep) if k]
+        self._rows = {_key(a): i for i, a in enumerate(self.articles)}
+        self._times = self._times[keep]
+        self._indices = self._indices[entries]
+        self._tf = self._tf[entries]
+        self._entry_rows = new_row[self._entry_rows[entries]]
+        self._df = np.bincount(self._indices, minlength=INDEX_DIM).astype(np.int32)
+        self._renorm()
+
+    def search(self, text, currencies=(), limit=4, min_similarity=MIN_SIMILARITY, now=None):
+        """Up to ``limit`` articles most relevant to ``text`` and ``currencies``, best first.
+
+        Returns ``[(article, score), ...]``: cosine similarity scaled by the
+        article's age (see ``NEWS_HALF_LIFE_HOURS``), at least ``min_similarity``.
+        """
+        ids, counts = np.unique(features(text, currencies), return_counts=True)
+        if not len(ids):
+            return []
+        now = now or time.time()
+        with self._lock:
+            if not self.articles:
+                return []
+            idf = self._idf(ids)
+            query = (1 + np.log(counts)) * idf
+            # Dense lookup table for the query, so scoring is one gather over all entries.
+            lookup = np.zeros(INDEX_DIM, dtype=np.float32)
+            lookup[ids] = query * idf
+            hits = lookup[self._indices]
+            matched = np.flatnonzero(hits)
+            dots = np.bincount(
+                self._entry_rows[matched], self._tf[matched] * hits[matched], minlength=len(self.articles)
+            )
+            norms = self._norms
+            times = self._times
+            articles = self.articles
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            similarity = np.nan_to_num(dots / (norms * np.linalg.norm(query)))
+        age_hours = np.maximum(now - times, 0) / 3600
+        scores = similarity * 0.5 ** (age_hours / NEWS_HALF_LIFE_HOURS)
+        scores[age_hours > NEWS_MAX_AGE_HOURS] = 0
+
+        candidates = np.flatnonzero(scores >= min_similarity)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        best = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(articles[i], float(scores[i])) for i in best]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_news_index() -> NewsIndex:
+    """The per-process index, seeded with recent stored articles on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NewsIndex()
+            try:
+                stored = recent_articles(NEWS_INDEX_WARM_ARTICLES)
+            except Exception as e:
+                # Fetched articles still get indexed as they come in.
+                logger.warning("News index starts empty: %r", e)
+                stored = []
+            if stored:
+                articles = [article for article, _ in stored]
+                for article, score in zip(articles, get_sentiment_scorer().score_articles(articles)):
+                    article["score"] = round(score, 3)
+                _index.add(articles, [when for _, when in stored])
+        return _index
+
+
+def rank_news(question, coins, articles, limit=4):
+    """The indexed articles most relevant to ``question`` and ``coins``.
+
+    ``articles`` (just fetched) are added to the index first, aged by their
+    ``published_at``. ``coins`` are
+    ``(name, symbol)`` pairs. Falls back to the first two of ``articles``
+    when nothing in the index is relevant enough.
+    """
+    index = get_news_index()
+    index.add(articles, [article.get("published_at") for article in articles])
+    text = " ".join([question, *(name for name, _ in coins)])
+    ranked = index.search(text, [symbol for _, symbol in coins], limit)
+    if not ranked:
+        return list(articles[:2])
+    return [article for article, _ in ranked]
+
@@ -0,0 +1,160 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Headline lexicon tuned for crypto news. Weights are roughly -3..3.
+LEXICON = {
+    # positive
+    "surge": 2.5, "surges": 2.5, "surged": 2.5, "soar": 2.5, "soars": 2.5, "soared": 2.5,
+    "rally": 2.0, "rallies": 2.0, "rallied": 2.0, "bullish": 2.5, "bull": 1.5,
+    "gain": 1.5, "gains": 1.5, "jump": 2.0, "jumps": 2.0, "jumped": 2.0,
+    "rise": 1.5, "rises": 1.5, "rising": 1.5, "rose": 1.5, "climb": 1.5, "climbs": 1.5,
+    "record": 1.5, "ath": 2.5, "breakout": 2.0, "breaks": 0.5, "high": 1.0, "highs": 1.0,
+    "adoption": 1.5, "adopts": 1.5, "approve": 2.0, "approves": 2.0, "approved": 2.0,
+    "approval": 2.0, "greenlight": 2.0, "partnership": 1.5, "partners": 1.0,
+    "launch": 1.0, "launches": 1.0, "upgrade": 1.0, "inflow": 1.5, "inflows": 1.5,
+    "accumulate": 1.5, "accumulation": 1.5, "accumulating": 1.5, "buy": 1.0, "buys": 1.0,
+    "recover": 1.5, "recovers": 1.5, "recovery": 1.5, "rebound": 1.5, "rebounds": 1.5,
+    "outperform": 1.5, "outperforms": 1.5, "boost": 1.5, "boosts": 1.5,
+    "milestone": 1.5, "integration": 1.0, "integrates": 1.0, "listing": 1.0, "lists": 0.5,
+    "optimism": 1.5, "optimistic": 1.5, "upbeat": 1.5, "strong": 1.0, "growth": 1.5,
+    "wins": 1.5, "win": 1.0, "support": 0.5, "pump": 1.0, "moon": 1.5, "upside": 1.5,
+    # negative
+    "crash": -3.0, "crashes": -3.0, "crashed": -3.0, "plunge": -2.5, "plunges": -2.5,
+    "plunged": -2.5, "drop": -1.5, "drops": -1.5, "dropped": -1.5, "fall": -1.5,
+    "falls": -1.5, "fell": -1.5, "falling": -1.5, "dump": -2.0, "dumps": -2.0,
+    "bearish": -2.5, "bear": -1.5, "hack": -3.0, "hacked": -3.0, "hacker": -2.5,
+    "hackers": -2.5, "exploit": -3.0, "exploited": -3.0, "scam": -3.0, "fraud": -3.0,
+    "lawsuit": -2.0, "sue": -2.0, "sues": -2.0, "sued": -2.0, "ban": -2.5, "bans": -2.5,
+    "banned": -2.5, "crackdown": -2.5, "liquidation": -2.0, "liquidations": -2.0,
+    "liquidated": -2.0, "outflow": -1.5, "outflows": -1.5, "selloff": -2.0,
+    "decline": -1.5, "declines": -1.5, "declined": -1.5, "slump": -2.0, "slumps": -2.0,
+    "tumble": -2.0, "tumbles": -2.0, "fear": -1.5, "fears": -1.5, "warning": -1.5,
+    "warns": -1.5, "risk": -1.0, "risks": -1.0, "delist": -2.0, "delists": -2.0,
+    "delisting": -2.0, "bankruptcy": -3.0, "bankrupt": -3.0, "insolvent": -3.0,
+    "collapse": -3.0, "collapses": -3.0, "rug": -2.5, "investigation": -2.0,
+    "probe": -2.0, "fined": -2.0, "fine": -0.5, "stolen": -3.0, "vulnerability": -2.0,
+    "halt": -2.0, "halts": -2.0, "outage": -2.0, "loss": -1.5, "losses": -1.5,
+    "low": -1.0, "lows": -1.0, "dip": -1.0, "dips": -1.0, "slide": -1.5, "slides": -1.5,
+    "sink": -2.0, "sinks": -2.0, "reject": -2.0, "rejects": -2.0, "rejected": -2.0,
+    "rejection": -2.0, "delay": -1.0, "delays": -1.0, "delayed": -1.0,
+    "downside": -1.5, "weak": -1.0, "weakness": -1.0, "concern": -1.0, "concerns": -1.0,
+    "panic": -2.5, "capitulation": -2.5, "downturn": -2.0, "penalty": -2.0,
+}
+NEGATORS = frozenset({"not", "no", "never", "without", "fails", "failed", "denies", "isn't", "won't", "can't"})
+# Tokens after a negator whose polarity gets flipped.
+NEGATION_WINDOW = 2
+POSITIVE_THRESHOLD = 0.25
+CACHE_SIZE = 50_000
+
+_SEPARATOR = " \x01 "
+# Everything but letters, apostrophes and hyphens splits tokens.
+_PUNCTUATION = str.maketrans(
+    {c: " " for c in map(chr, range(128)) if not (c.isalpha() or c in "'-\x01")}
+)
+
+
+class SentimentScorer:
+    """Offline lexicon scorer for news headlines.
+
+    Titles are tokenized once and scored together with NumPy: every token
+    maps to a weight, negation flips the few tokens after a negator, and the
+    per-title sums are squashed into ``[-1, 1]``. Scores are memoized per
+    article key so each headline is scored once per process.
+    """
+
+    def __init__(self, lexicon=LEXICON, cache_size=CACHE_SIZE):
+        self._vocab = {word: i + 1 for i, word in enumerate(lexicon)}
+        for negator in NEGATORS:
+            self._vocab.setdefault(negator, len(self._vocab) + 1)
+        self._weights = np.zeros(len(self._vocab) + 1)
+        self._weights[[self._vocab[w] for w in lexicon]] = list(lexicon.values())
+        self._negator_ids = np.array([self._vocab[n] for n in NEGATORS])
+        self._vocab["\x01"] = -1
+
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def score_titles(self, titles) -> np.ndarray:
+        """Score ``titles`` in one pass; returns one float per title."""
+        n = len(titles)
+        if not n:
+            return np.zeros(0)
+
+        # One pass over all titles at once; "\x01" tokens mark title boundaries.
+        text = _SEPARATOR.join(titles).lower().replace("sell-off", "selloff")
+        tokens = text.translate(_PUNCTUATION).split()
+        vocab_get = self._vocab.get
+        ids = np.array([vocab_get(t, 0) for t in tokens], dtype=np.int64)
+
+        boundary = ids == -1
+        title_idx = np.cumsum(boundary)[~boundary]
+        token_ids = ids[~boundary]
+        if not len(token_ids):
+            return np.zeros(n)
+        weights = self._weights[token_ids]
+
+        negator_at = np.flatnonzero(np.isin(token_ids, self._negator_ids))
+        if len(negator_at):
+            sign = np.ones(len(token_ids))
+            for offset in range(1, NEGATION_WINDOW + 1):
+                target = negator_at + offset
+                target = target[target < len(token_ids)]
+                same_title = title_idx[target] == title_idx[target - offset]
+                sign[target[same_title]] *= -1
+            weights = weights * sign
+
+        raw = np.bincount(title_idx, weights=weights, minlength=n)
+        lengths = np.bincount(title_idx, minlength=n)
+        # Dampen long titles a little so a single strong word still counts.
+        return np.tanh(raw / np.sqrt(np.maximum(lengths, 1)) * 0.75)
+
+    def score_articles(self, articles):
+        """Scores for article dicts, keyed by ``id``, then ``url``, then ``title``."""
+        keys = [a.get("id") or a.get("url") or a.get("title", "") for a in articles]
+        with self._lock:
+            cached = [self._cache.get(k) for k in keys]
+            for k in keys:
+                if k in self._cache:
+                    self._cache.move_to_end(k)
+
+        missing = [i for i, s in enumerate(cached) if s is None]
+        if missing:
+            fresh = self.score_titles([articles[i].get("title", "") for i in missing])
+            with self._lock:
+                for i, score in zip(missing, fresh.tolist()):
+                    cached[i] = score
+                    self._cache[keys[i]] = score
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return cached
+
+
+def combined_sentiment(article) -> float:
+    """Blend the lexicon score with CryptoPanic votes, when there are any."""
+    votes = article.get("sentiment", 0) or 0
+    score = article.get("score", 0.0) or 0.0
+    return float(np.clip(score + votes / 10, -1.0, 1.0))
+
+
+def sentiment_label(article) -> str:
+    value = combined_sentiment(article)
+    if value >= POSITIVE_THRESHOLD:
+        return "Positive"
+    if value <= -POSITIVE_THRESHOLD:
+        return "Negative"
+    return "Neutral"
+
+
+_scorer = None
+_scorer_lock = threading.Lock()
+
+
+def get_sentiment_scorer() -> SentimentScorer:
+    global _scorer
+    with _scorer_lock:
+        if _scorer is None:
+            _scorer = SentimentScorer()
+        return _scorer
@@ -0,0 +1,213 @@
+import os
+import threading
+from datetime import datetime, timezone
+
+import psycopg2.extras
+
+from src.database.connection import get_db_connection, get_read_connection, mark_write
+from src.resilience.http import CRYPTOPANIC, provider_get
+
+CRYPTOPANIC_URL = "https://cryptopanic.com/api/v1/posts/"
+# A feed older than this is re-ingested before it is served.
+NEWS_STALE_SECONDS = int(os.getenv("NEWS_STALE_SECONDS", "300"))
+MAX_INGEST_PAGES = 3
+GENERAL_FEED = ""
+# Read-your-writes key for the whole news store.
+NEWS_KEY = "news"
+
+_feed_locks = {}
+_feed_locks_guard = threading.Lock()
+
+
+def _feed_lock(feed):
+    with _feed_locks_guard:
+        return _feed_locks.setdefault(feed, threading.Lock())
+
+
+def parse_time(value):
+    """A CryptoPanic timestamp as an aware datetime; now if the post has none."""
+    if not value:
+        return datetime.now(timezone.utc)
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _row(item):
+    votes = item.get("votes", {}) or {}
+    return (
+        item["id"],
+        item.get("title", ""),
+        (item.get("source") or {}).get("title", "Unknown"),
+        item.get("url", ""),
+        parse_time(item.get("published_at") or item.get("created_at")),
+        votes.get("positive", 0) or 0,
+        votes.get("negative", 0) or 0,
+        [c.get("code") for c in item.get("currencies", []) or [] if c.get("code")],
+    )
+
+
+def _article(row):
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "source": row["source"],
+        "url": row["url"],
+        "sentiment": row["votes_positive"] - row["votes_negative"],
+        "currencies": list(row["currencies"]),
+        "published_at": row["published_at"],
+    }
+
+
+def _stale_feeds(cur, feeds):
+    cur.execute(
+        """
+        SELECT feed FROM news_ingest_state
+        WHERE feed = ANY(%s) AND ingested_at > now() - make_interval(secs => %s)
+        """,
+        (list(feeds), NEWS_STALE_SECONDS),
+    )
+    fresh = {row[0] for row in cur.fetchall()}
+    return [feed for feed in feeds if feed not in fresh]
+
+
+def ingest_feed(feed, auth_token):
+    """Pull posts newer than the last one stored for ``feed`` and upsert them.
+
+    ``feed`` is a currency code, or ``GENERAL_FEED`` for all news. Returns the
+    number of posts written.
+    """
+    with _feed_lock(feed):
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            # Another session may have refreshed it while we waited on the lock.
+            if not _stale_feeds(cur, [feed]):
+                return 0
+
+            cur.execute("SELECT last_id FROM news_ingest_state WHERE feed = %s", (feed,))
+            row = cur.fetchone()
+            last_id = row[0] if row else 0
+
+            params = {"auth_token": auth_token, "kind": "news"}
+            if feed:
+                params["currencies"] = feed
+
+            rows = []
+            url = CRYPTOPANIC_URL
+            for _ in range(MAX_INGEST_PAGES):
+                data = provider_get(CRYPTOPANIC, url, params=params)
+                results = data.get("results", [])
+                new = [item for item in results if item.get("id", 0) > last_id]
+                rows.extend(_row(item) for item in new)
+                # Posts come newest first, so an old id means we've caught up.
+                if len(new) < len(results) or not data.get("next"):
+                    break
+                url, params = data["next"], None
+
+            if rows:
+                psycopg2.extras.execute_values(
+                    cur,
+                    """
+                    INSERT INTO news_articles
+                        (id, title, source, url, published_at,
+                         votes_positive, votes_negative, currencies)
+                    VALUES %s
+                    ON CONFLICT (id) DO UPDATE SET
+                        votes_positive = EXCLUDED.votes_positive,
+                        votes_negative = EXCLUDED.votes_negative,
+                        currencies = EXCLUDED.currencies,
+                        fetched_at = now()
+                    """,
+                    rows,
+                )
+
+            cur.execute(
+                """
+                INSERT INTO news_ingest_state (feed, last_id, ingested_at)
+                VALUES (%s, %s, now())
+                ON CONFLICT (feed) DO UPDATE SET
+                    last_id = GREATEST(news_ingest_state.last_id, EXCLUDED.last_id),
+                    ingested_at = now()
+                """,
+                (feed, max([r[0] for r in rows], default=last_id)),
+            )
+            conn.commit()
+            mark_write(NEWS_KEY)
+            return len(rows)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+
+def refresh_feeds(symbols, auth_token):
+    """Ingest any stale feed among ``symbols`` and the general feed."""
+    feeds = [*dict.fromkeys(s for s in symbols if s), GENERAL_FEED]
+    conn = get_read_connection(NEWS_KEY)
+    cur = conn.cursor()
+    try:
+        stale = _stale_feeds(cur, feeds)
+    finally:
+        cur.close()
+        conn.close()
+
+    for feed in stale:
+        try:
+            ingest_feed(feed, auth_token)
+        except Exception:
+            # Serve what is stored; the next request retries.
+            continue
+
+
+def query_news(symbols, limit=10):
+    """Newest stored articles for ``symbols``, topped up with general news.
+
+    Both branches are index scans (GIN on currencies, btree on published_at)
+    combined in one round-trip.
+    """
+    conn = get_read_connection(NEWS_KEY)
+    cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+    try:
+        cur.execute(
+            """
+            (SELECT *, 0 AS tier FROM news_articles
+             WHERE currencies && %(symbols)s
+             ORDER BY published_at DESC LIMIT %(limit)s)
+            UNION ALL
+            (SELECT *, 1 AS tier FROM news_articles
+             ORDER BY published_at DESC LIMIT %(limit)s)
+            ORDER BY tier, published_at DESC
+            """,
+            {"symbols": list(symbols), "limit": limit},
+        )
+        articles = []
+        seen = set()
+        for row in cur.fetchall():
+            if row["title"] in seen:
+                continue
+            seen.add(row["title"])
+            articles.append(_article(row))
+            if len(articles) >= limit:
+                break
+        return articles
+    finally:
+        cur.close()
+        conn.close()
+
+
+def recent_articles(limit):
+    """Newest stored articles as ``(article, published_at)`` pairs."""
+    conn = get_read_connection(NEWS_KEY)
+    cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+    try:
+        cur.execute("SELECT * FROM news_articles ORDER BY published_at DESC LIMIT %s", (limit,))
+        return [(_article(row), row["published_at"]) for row in cur.fetchall()]
+    finally:
+        cur.close()
+        conn.close()
+
+
+def get_stored_news(symbols, auth_token, limit=10):
+    refresh_feeds(symbols, auth_token)
+    return query_news(symbols, limit)
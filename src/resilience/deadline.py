@@ -0,0 +1,62 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+ANALYZE_DEADLINE_SECONDS = float(os.getenv("ANALYZE_DEADLINE_SECONDS", "30"))
+# Below this there is no point starting another network call.
+MIN_CALL_SECONDS = 0.25
+
+_current = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    """A point in time by which a whole request must have answered."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+def current_deadline():
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(seconds=ANALYZE_DEADLINE_SECONDS):
+    """Make a new deadline current for this context (and contexts copied from it)."""
+    deadline = Deadline(seconds)
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def remaining(default=None):
+    deadline = _current.get()
+    return default if deadline is None else deadline.remaining()
+
+
+def request_timeout(cap, reserve=0.0) -> float:
+    """Timeout for one call: ``cap`` trimmed to what is left of the current deadline.
+
+    ``reserve`` keeps time back for stages that still have to run afterwards.
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return cap
+    left = deadline.remaining() - reserve
+    if left < MIN_CALL_SECONDS:
+        raise DeadlineExceeded("request deadline exhausted")
+    return min(cap, left)
@@ -0,0 +1,87 @@
+import os
+import threading
+
+import requests
+
+from src.resilience.breaker import CircuitOpenError, get_breaker
+from src.resilience.deadline import request_timeout
+from src.resilience.ratelimit import TokenBucket
+
+COINGECKO = "coingecko"
+CRYPTOPANIC = "cryptopanic"
+GEMINI = "gemini"
+
+DEFAULT_TIMEOUT = 10
+
+# (requests per minute, burst) per provider; others are not throttled here.
+# CoinGecko's public API allows about 30 calls a minute.
+PROVIDER_RATE_LIMITS = {
+    COINGECKO: (
+        float(os.getenv("COINGECKO_REQUESTS_PER_MINUTE", "30")),
+        int(os.getenv("COINGECKO_BURST", "30")),
+    ),
+}
+RATE_LIMIT_BACKOFF_SECONDS = 10.0
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class ProviderThrottled(RuntimeError):
+    """No request slot for the provider within the caller's deadline."""
+
+
+def get_rate_limiter(provider):
+    """The process-wide token bucket for ``provider``, or None if it has no limit."""
+    if provider not in PROVIDER_RATE_LIMITS:
+        return None
+    with _limiters_lock:
+        if provider not in _limiters:
+            per_minute, burst = PROVIDER_RATE_LIMITS[provider]
+            _limiters[provider] = TokenBucket(per_minute / 60.0, burst)
+        return _limiters[provider]
+
+
+def _retry_after(response):
+    try:
+        return max(float(response.headers.get("Retry-After", "")), 1.0)
+    except ValueError:
+        return RATE_LIMIT_BACKOFF_SECONDS
+
+
+def provider_get(provider, url, params=None, timeout=DEFAULT_TIMEOUT):
+    """GET ``url`` behind the provider's circuit breaker, rate limit and the current deadline.
+
+    Returns the decoded JSON body. Connection errors, timeouts (including
+    running out of deadline), 429s, 5xx responses and unreadable bodies count
+    as provider failures; any other non-2xx status is raised without tripping
+    the breaker. A 429 also pauses the provider's rate limiter for ``Retry-After``.
+    """
+    breaker = get_breaker(provider)
+    if breaker.rejecting():
+        raise CircuitOpenError(f"{provider} circuit is open")
+
+    # Wait for a request slot before claiming a half-open trial: being
+    # throttled says nothing about the provider's health.
+    limiter = get_rate_limiter(provider)
+    if limiter is not None and not limiter.acquire(timeout=request_timeout(timeout)):
+        raise ProviderThrottled(f"{provider} rate limit reached")
+
+    if not breaker.allow():
+        raise CircuitOpenError(f"{provider} circuit is open")
+
+    # Every way out below settles the breaker, so a half-open trial call
+    # can't leave it waiting for an outcome that never comes.
+    try:
+        response = requests.get(url, params=params, timeout=request_timeout(timeout))
+        if response.status_code == 429 and limiter is not None:
+            limiter.penalize(_retry_after(response))
+        if response.status_code == 429 or response.status_code >= 500:
+            response.raise_for_status()
+        data = response.json() if response.ok else None
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    response.raise_for_status()
+    return data
@@ -0,0 +1,83 @@
+import contextvars
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+STAGE_WORKERS = 16
+
+_pool = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix="stage")
+
+
+def submit(fn, *args, **kwargs):
+    """Run ``fn`` on the stage pool, carrying over the caller's deadline."""
+    context = contextvars.copy_context()
+    return _pool.submit(context.run, fn, *args, **kwargs)
+
+
+def run_with_timeout(fn, timeout, *args, **kwargs):
+    """Call ``fn`` but give up waiting after ``timeout`` seconds (it keeps running)."""
+    future = submit(fn, *args, **kwargs)
+    try:
+        return future.result(timeout)
+    except FutureTimeout:
+        raise TimeoutError(f"stage did not finish within {timeout:.1f}s") from None
+
+
+class StaleCache:
+    """Last good result per key, served when a fresh one isn't ready in time.
+
+    ``run`` starts ``fn`` in the background and waits at most ``timeout``.
+    When it misses the deadline or fails, the previous value for ``key`` is
+    returned instead, and a late success still refreshes the cache for the
+    next caller.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._values:
+                self._values.move_to_end(key)
+                return self._values[key]
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+
+    def run(self, key, fn, timeout, default=None):
+        """Return ``(value, is_stale)``."""
+        return self.wait(key, self.start(key, fn), timeout, default)
+
+    def start(self, key, fn):
+        """Start ``fn`` on the stage pool; pass the future to ``wait``.
+
+        Lets the caller overlap stages without waiting inside the pool itself.
+        """
+        future = submit(fn)
+
+        def remember(done):
+            if not done.cancelled() and done.exception() is None and done.result():
+                self.put(key, done.result())
+
+        future.add_done_callback(remember)
+        return future
+
+    def wait(self, key, future, timeout, default=None):
+        """``(value, is_stale)`` for a ``start``-ed future, waiting at most ``timeout``."""
+        try:
+            value = future.result(timeout)
+            if value:
+                return value, False
+        except FutureTimeout:
+            pass
+        except Exception:
+            pass
+        return self.get(key, default), True
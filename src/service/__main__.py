@@ -0,0 +1,58 @@
+"""Command line entry point for the headless service.
+
+    python -m src.service serve [--host H] [--port P]
+    python -m src.service analyze "How is bitcoin doing?"
+    python -m src.service prices bitcoin,ethereum
+    python -m src.service news bitcoin [--limit 10]
+"""
+import argparse
+import json
+import sys
+
+
+def _print(value):
+    json.dump(value, sys.stdout, indent=2, default=str)
+    sys.stdout.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.service", description="Crypto AI Analyst without the web UI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="run the JSON API")
+    serve.add_argument("--host")
+    serve.add_argument("--port", type=int)
+
+    analyze = commands.add_parser("analyze", help="answer one question")
+    analyze.add_argument("question")
+
+    prices = commands.add_parser("prices", help="current prices")
+    prices.add_argument("ids", help="comma-separated CoinGecko ids")
+
+    news = commands.add_parser("news", help="recent news with sentiment")
+    news.add_argument("coins", help="comma-separated CoinGecko ids")
+    news.add_argument("--limit", type=int, default=10)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        from src.service.api import SERVICE_HOST, SERVICE_PORT, serve as run
+
+        run(args.host or SERVICE_HOST, args.port or SERVICE_PORT)
+        return 0
+
+    from src.ai.analyzer import get_shared_analyzer
+
+    analyzer = get_shared_analyzer()
+    if args.command == "analyze":
+        answer, prices_, news_, related = analyzer.analyze(args.question, [])
+        _print({"answer": answer, "prices": prices_, "news": news_, "related_questions": related})
+    elif args.command == "prices":
+        _print(analyzer.get_prices(args.ids))
+    else:
+        _print(analyzer.get_news(args.coins, args.limit))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""Headless JSON API over the shared analyzer.
+
+    POST /analyze   {"question": ..., "history": [{"role", "content"}], "stream": false}
+    GET  /prices?ids=bitcoin,ethereum
+    GET  /news?coins=bitcoin&limit=10
+    GET  /stats
+
+With ``"stream": true`` /analyze answers with NDJSON events as each stage
+finishes: ``queued`` (while waiting for a slot), ``data`` (prices and news),
+``answer``, ``related`` and ``done``.
+
+Analyze requests are admitted per caller (the ``X-User-Id`` header, else the
+client address); a caller over their limit gets 429 with ``Retry-After``.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from src.ai.analyzer import get_shared_analyzer, history_messages
+from src.ai.gateway import get_llm_gateway
+from src.ai.scheduler import UserThrottled, get_analyze_scheduler
+from src.resilience.breaker import breaker_states
+
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8080"))
+# Threads running blocking analyzer calls; most of their time is spent waiting on I/O.
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "32"))
+MAX_NEWS_LIMIT = 50
+
+_ANALYZER = web.AppKey("analyzer", object)
+_EXECUTOR = web.AppKey("executor", ThreadPoolExecutor)
+_COUNTERS = web.AppKey("counters", dict)
+
+_DONE = object()
+
+
+def _json_dumps(value):
+    return json.dumps(value, default=str)
+
+
+async def _run(request, fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app[_EXECUTOR], lambda: fn(*args, **kwargs))
+
+
+async def _read_question(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="Body must be JSON") from None
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="Body must be a JSON object")
+    question = str(body.get("question") or "").strip()
+    if not question:
+        raise web.HTTPBadRequest(text="'question' is required")
+    history = body.get("history") or []
+    if not isinstance(history, list) or not all(isinstance(m, dict) and "role" in m and "content" in m for m in history):
+        raise web.HTTPBadRequest(text="'history' must be a list of {role, content}")
+    return question, history_messages(history), bool(body.get("stream"))
+
+
+def _too_many_requests(error):
+    return web.HTTPTooManyRequests(
+        text=str(error), headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+    )
+
+
+def _in_turn(ticket, fn, *args, on_wait=None, **kwargs):
+    """Wait for the ticket's slot, run ``fn`` in it, then free the slot."""
+    scheduler = get_analyze_scheduler()
+    try:
+        scheduler.wait_turn(ticket, on_wait=on_wait)
+        return fn(*args, **kwargs)
+    finally:
+        scheduler.release(ticket)
+
+
+async def analyze(request):
+    question, history, stream = await _read_question(request)
+    analyzer = request.app[_ANALYZER]
+    counters = request.app[_COUNTERS]
+    user = request.headers.get("X-User-Id") or request.remote
+    try:
+        ticket = get_analyze_scheduler().join(user)
+    except UserThrottled as e:
+        raise _too_many_requests(e) from None
+    counters["analyze"] += 1
+    counters["in_flight"] += 1
+    try:
+        if not stream:
+            try:
+                answer, prices, news, related = await _run(
+                    request, _in_turn, ticket, analyzer.analyze, question, history
+                )
+            except UserThrottled as e:
+                raise _too_many_requests(e) from None
+            return web.json_response(
+                {"answer": answer, "prices": prices, "news": news, "related_questions": related},
+                dumps=_json_dumps,
+            )
+        return await _stream_analysis(request, analyzer, ticket, question, history)
+    finally:
+        counters["in_flight"] -= 1
+
+
+async def _stream_analysis(request, analyzer, ticket, question, history):
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def emit(event, **payload):
+        loop.call_soon_threadsafe(events.put_nowait, {"event": event, **payload})
+
+    def work():
+        try:
+            answer, prices, news, _ = _in_turn(
+                ticket,
+                analyzer.analyze,
+                question,
+                history,
+                include_related=False,
+                on_data=lambda prices, news: emit("data", prices=prices, news=news),
+                on_wait=lambda position, seconds: emit("queued", position=position, seconds=round(seconds, 1)),
+            )
+            emit("answer", answer=answer)
+            names = [coin["name"] for coin in prices]
+            emit("related", related_questions=analyzer.get_related_questions(question, names))
+        except Exception as e:
+            emit("error", error=str(e))
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, _DONE)
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    started = time.monotonic()
+    future = loop.run_in_executor(request.app[_EXECUTOR], work)
+    while (event := await events.get()) is not _DONE:
+        await response.write((_json_dumps(event) + "\n").encode("utf-8"))
+    await future
+    done = {"event": "done", "seconds": round(time.monotonic() - started, 3)}
+    await response.write((_json_dumps(done) + "\n").encode("utf-8"))
+    await response.write_eof()
+    return response
+
+
+async def prices(request):
+    ids = ",".join(i.strip() for i in request.query.get("ids", "").split(",") if i.strip())
+    if not ids:
+        raise web.HTTPBadRequest(text="'ids' is required, e.g. ?ids=bitcoin,ethereum")
+    request.app[_COUNTERS]["prices"] += 1
+    result = await _run(request, request.app[_ANALYZER].get_prices, ids)
+    return web.json_response({"prices": result}, dumps=_json_dumps)
+
+
+async def news(request):
+    coins = request.query.get("coins", "bitcoin")
+    try:
+        limit = min(max(int(request.query.get("limit", "10")), 1), MAX_NEWS_LIMIT)
+    except ValueError:
+        raise web.HTTPBadRequest(text="'limit' must be an integer") from None
+    request.app[_COUNTERS]["news"] += 1
+    result = await _run(request, request.app[_ANALYZER].get_news, coins, limit)
+    return web.json_response({"news": result}, dumps=_json_dumps)
+
+
+async def stats(request):
+    return web.json_response(
+        {
+            "requests": request.app[_COUNTERS],
+            "analyze_scheduler": get_analyze_scheduler().stats(),
+            "llm_gateway": get_llm_gateway().stats(),
+            "breakers": breaker_states(),
+        },
+        dumps=_json_dumps,
+    )
+
+
+def create_app(analyzer=None, workers=SERVICE_WORKERS) -> web.Application:
+    """Build the app; the analyzer defaults to the process-wide shared one."""
+    app = web.Application()
+    app[_ANALYZER] = analyzer or get_shared_analyzer()
+    app[_EXECUTOR] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="service")
+    app[_COUNTERS] = {"analyze": 0, "prices": 0, "news": 0, "in_flight": 0}
+
+    async def shutdown(app):
+        app[_EXECUTOR].shutdown(wait=False, cancel_futures=True)
+
+    app.on_cleanup.append(shutdown)
+    app.add_routes(
+        [
+            web.post("/analyze", analyze),
+            web.get("/prices", prices),
+            web.get("/news", news),
+            web.get("/stats", stats),
+        ]
+    )
+    return app
+
+
+def serve(host=SERVICE_HOST, port=SERVICE_PORT):
+    web.run_app(create_app(), host=host, port=port)
@@ -1,15 +1,56 @@
-import streamlit as st
-from langchain_core.messages import HumanMessage, AIMessage
+import time
+import uuid
 
-from src.ai.analyzer import CryptoAnalyzer
+import streamlit as st
+from src.ai.analyzer import get_shared_analyzer, history_messages
+from src.ai.background import submit_auxiliary
+from src.ai.scheduler import QUEUE_POLL_SECONDS, UserThrottled, get_analyze_scheduler
+from src.alerts.engine import KIND_LABELS, KINDS
+from src.alerts.poller import ALERT_POLL_IN_APP, get_alert_poller
+from src.alerts.store import (
+    add_alert_rule,
+    delete_alert_rule,
+    dismiss_alerts,
+    get_unseen_alerts,
+    get_watchlist,
+    remove_watch,
+)
+from src.chat_store.autosave import get_autosaver
+from src.chat_store.records import ChatMessage, last_quotes
 from src.chat_store.store import (
-    generate_chat_name,
-    save_chat_session,
-    update_chat_session,
     get_user_sessions,
     load_chat_session,
     delete_chat_session,
+    provisional_chat_name,
+    search_chats,
 )
+from src.jobs.store import ANALYSIS_QUEUE, DONE, FAILED, enqueue_analysis, get_job, job_payload
+from src.jobs.watcher import get_job_watcher
+from src.news.sentiment import combined_sentiment, sentiment_label
+from src.ui.runstats import count_action, render_run_stats, rerun
+
+SEARCH_PAGE_SIZE = 10
+# How often the sidebar checks for follow-up questions while they are generated.
+SUGGESTION_POLL_SECONDS = 1.0
+# How often the sidebar checks for newly triggered price alerts.
+ALERT_CHECK_SECONDS = 30
+# With ANALYSIS_QUEUE, how often a waiting answer checks the in-memory
+# finished set, and how often it reads its job row regardless.
+JOB_POLL_SECONDS = 1.0
+JOB_RECHECK_SECONDS = 5.0
+
+# Chat flow. Widget callbacks record the question and set PENDING; the same
+# script run then answers it, so asking costs one execution and no reruns.
+IDLE = "idle"
+PENDING = "pending"  # the last message is a question to answer
+ANSWERING = "answering"  # only seen at the start of a run if answering was interrupted
+
+QUICK_START = [
+    "Bitcoin price and news analysis",
+    "Ethereum market update with recent news",
+    "NEAR protocol price and developments",
+    "Current crypto market overview",
+]
 
 
 def _ensure_chat_state():
@@ -17,46 +58,333 @@ def _ensure_chat_state():
         st.session_state.messages = []
 
     if "analyzer" not in st.session_state:
+        # One analyzer (and coin list) per process, not per browser session.
         with st.spinner("Loading analysis engine..."):
-            st.session_state.analyzer = CryptoAnalyzer()
+            st.session_state.analyzer = get_shared_analyzer()
 
     if "related_questions" not in st.session_state:
         st.session_state.related_questions = []
 
+    if "related_future" not in st.session_state:
+        st.session_state.related_future = None
+
+    if "chat_phase" not in st.session_state:
+        st.session_state.chat_phase = IDLE
+
+    if "pending_job" not in st.session_state:
+        st.session_state.pending_job = None
+
     if "current_session_id" not in st.session_state:
         st.session_state.current_session_id = None
 
+    if "chat_key" not in st.session_state:
+        _start_new_chat()
+
+    # Alerts are normally polled by the separate ``src.alerts.poller`` service.
+    if ALERT_POLL_IN_APP:
+        get_alert_poller()
+    if ANALYSIS_QUEUE:
+        get_job_watcher()
+
+    # The autosaver creates the session row in the background; pick up its id.
+    if st.session_state.current_session_id is None:
+        st.session_state.current_session_id = get_autosaver().session_id(
+            st.session_state.chat_key
+        )
+
+
+def _start_new_chat(session_id=None, saved_count=0):
+    st.session_state.chat_key = uuid.uuid4().hex
+    st.session_state.saved_count = saved_count
+    st.session_state.current_session_id = session_id
+    if session_id is not None:
+        get_autosaver().register(st.session_state.chat_key, session_id)
+
+
+def _reset_related():
+    st.session_state.related_questions = []
+    st.session_state.related_future = None
+
+
+def _clear_chat():
+    st.session_state.messages = []
+    st.session_state.chat_phase = IDLE
+    st.session_state.pending_job = None
+    _reset_related()
+    _start_new_chat()
+
+
+def _ask(question):
+    count_action("ask")
+    st.session_state.messages.append(ChatMessage("user", question))
+    st.session_state.chat_phase = PENDING
+    # A job still running for an earlier question is left to finish unread.
+    st.session_state.pending_job = None
+    _reset_related()
+
+
+def _on_chat_input():
+    prompt = st.session_state.chat_prompt
+    if prompt:
+        _ask(prompt)
+
+
+def _collect_related():
+    """Move finished follow-up questions from the background into the session."""
+    future = st.session_state.related_future
+    if future is None or not future.done():
+        return False
+    st.session_state.related_future = None
+    try:
+        st.session_state.related_questions = future.result()
+    except Exception:
+        st.session_state.related_questions = []
+    return True
+
+
+def _name_chat(chat_key, messages, analyzer):
+    name = analyzer.suggest_chat_name(messages)
+    if name:
+        get_autosaver().rename(chat_key, name)
+
+
+def _autosave():
+    messages = st.session_state.messages
+    new_messages = messages[st.session_state.saved_count :]
+    if not new_messages:
+        return
+
+    first_save = (
+        st.session_state.saved_count == 0
+        and st.session_state.current_session_id is None
+    )
+    chat_key = st.session_state.chat_key
+    # Save under the first question now; the AI name replaces it when ready.
+    get_autosaver().enqueue(
+        chat_key,
+        st.session_state.user_id,
+        new_messages,
+        session_name=provisional_chat_name(messages),
+        session_id=st.session_state.current_session_id,
+    )
+    if first_save:
+        submit_auxiliary(
+            _name_chat, chat_key, list(messages), st.session_state.analyzer
+        )
+    st.session_state.saved_count = len(messages)
+
+
+def _load_session(session_id):
+    count_action("load chat")
+    loaded_name, messages = load_chat_session(session_id)
+    if loaded_name:
+        st.session_state.messages = messages
+        st.session_state.chat_phase = IDLE
+        st.session_state.pending_job = None
+        _start_new_chat(session_id, len(messages))
+        _reset_related()
+        st.toast(f"Loaded: {loaded_name}")
+    else:
+        st.toast("Could not load this chat.")
+
+
+def _delete_session(session_id):
+    count_action("delete chat")
+    if delete_chat_session(session_id):
+        if st.session_state.current_session_id == session_id:
+            _clear_chat()
+        st.toast("Chat deleted.")
+    else:
+        st.toast("Could not delete this chat.")
+
+
+def _new_chat():
+    count_action("new chat")
+    # Saved messages stay saved; clearing starts a fresh chat.
+    _clear_chat()
+
+
+def _log_out():
+    count_action("log out")
+    st.session_state.authenticated = False
+    st.session_state.username = None
+    st.session_state.user_id = None
+    _clear_chat()
+
+
+def _on_search():
+    count_action("search")
+    st.session_state.search_page = 0
+
+
+def _turn_search_page(step):
+    count_action("search page")
+    st.session_state.search_page += step
+
+
+def _add_alert():
+    count_action("add alert")
+    coin_id = st.session_state.alert_coin.strip().lower()
+    known = st.session_state.analyzer.all_coins
+    if not coin_id or (known and coin_id not in known):
+        st.toast(f"Unknown CoinGecko id: {coin_id or '(empty)'}")
+        return
+    try:
+        add_alert_rule(
+            st.session_state.user_id,
+            coin_id,
+            st.session_state.alert_kind,
+            st.session_state.alert_threshold,
+        )
+        st.toast(f"Watching {coin_id}.")
+    except Exception:
+        st.toast("Could not save this alert.")
+
+
+def _delete_alert(rule_id):
+    count_action("delete alert")
+    delete_alert_rule(st.session_state.user_id, rule_id)
+
+
+def _unwatch(coin_id):
+    count_action("unwatch")
+    remove_watch(st.session_state.user_id, coin_id)
+
+
+def _dismiss_alerts(event_ids):
+    count_action("dismiss alerts")
+    dismiss_alerts(st.session_state.user_id, event_ids)
+
+
+def _render_alert_feed():
+    try:
+        alerts = get_unseen_alerts(st.session_state.user_id)
+    except Exception:
+        return
+    if not alerts:
+        return
+    for alert in alerts:
+        st.warning(
+            f"**{alert['coin_id']}**: {KIND_LABELS[alert['kind']]} "
+            f"{alert['threshold']:,.2f} (now {alert['value']:,.2f}, "
+            f"{alert['triggered_at']:%H:%M})"
+        )
+    st.button(
+        "Dismiss alerts",
+        key="dismiss_alerts",
+        on_click=_dismiss_alerts,
+        args=([alert["id"] for alert in alerts],),
+    )
+
+
+def _render_watchlist():
+    with st.expander("Watchlist & alerts"):
+        try:
+            watchlist = get_watchlist(st.session_state.user_id)
+        except Exception:
+            st.caption("Alerts are unavailable right now.")
+            return
+
+        for coin_id, rules in watchlist:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.markdown(f"**{coin_id}**")
+            with col2:
+                st.button(
+                    "X", key=f"unwatch_{coin_id}", on_click=_unwatch, args=(coin_id,)
+                )
+            for rule_id, kind, threshold in rules:
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    st.caption(f"{KIND_LABELS[kind]} {threshold:,.2f}")
+                with col2:
+                    st.button(
+                        "x",
+                        key=f"alert_{rule_id}",
+                        on_click=_delete_alert,
+                        args=(rule_id,),
+                    )
+
+        with st.form("alert_form", clear_on_submit=True):
+            st.text_input("Coin", key="alert_coin", placeholder="CoinGecko id, e.g. bitcoin")
+            st.selectbox(
+                "Alert when", list(KINDS), format_func=KIND_LABELS.get, key="alert_kind"
+            )
+            st.number_input("Threshold", key="alert_threshold", value=0.0, step=1.0)
+            st.form_submit_button("Add alert", on_click=_add_alert)
+
+
+def _render_search():
+    query = st.text_input(
+        "Search chats",
+        key="chat_search",
+        placeholder="e.g. ETF inflows",
+        on_change=_on_search,
+    ).strip()
+    if not query:
+        return
+
+    page = st.session_state.get("search_page", 0)
+    try:
+        results, total = search_chats(
+            st.session_state.user_id, query, page, SEARCH_PAGE_SIZE
+        )
+    except Exception:
+        st.error("Search is unavailable right now.")
+        return
+
+    if not results:
+        st.caption("No matching chats.")
+        return
+
+    st.caption(f"{total} matching chats")
+    for result in results:
+        label = f"{result['session_name']} ({result['created_at']:%Y-%m-%d})"
+        st.button(
+            label,
+            key=f"search_{result['session_id']}",
+            on_click=_load_session,
+            args=(result["session_id"],),
+        )
+        if result["snippet"]:
+            st.caption(f"...{result['snippet']}...")
+
+    pages = (total + SEARCH_PAGE_SIZE - 1) // SEARCH_PAGE_SIZE
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button(
+            "<",
+            key="search_prev",
+            disabled=page == 0,
+            on_click=_turn_search_page,
+            args=(-1,),
+        )
+    with col2:
+        st.caption(f"Page {page + 1} of {pages}")
+    with col3:
+        st.button(
+            ">",
+            key="search_next",
+            disabled=page + 1 >= pages,
+            on_click=_turn_search_page,
+            args=(1,),
+        )
+
 
 def _render_sidebar():
     with st.sidebar:
         st.header("Sessions")
         st.caption(f"Signed in as {st.session_state.username}")
+        st.fragment(_render_alert_feed, run_every=ALERT_CHECK_SECONDS)()
 
-        # Save / update current chat manually (simpler than auto-saving every rerun)
-        if st.session_state.messages:
-            if st.session_state.current_session_id:
-                if st.button("Save current chat"):
-                    ok = update_chat_session(
-                        st.session_state.current_session_id,
-                        st.session_state.messages,
-                    )
-                    if ok:
-                        st.success("Chat updated.")
-                    else:
-                        st.error("Could not update chat.")
+        if st.session_state.saved_count:
+            if get_autosaver().is_pending(st.session_state.chat_key):
+                st.caption("Saving chat...")
             else:
-                if st.button("Save current chat"):
-                    chat_name = generate_chat_name(
-                        st.session_state.messages,
-                        st.session_state.analyzer,
-                    )
-                    session_id = save_chat_session(
-                        st.session_state.user_id,
-                        chat_name,
-                        st.session_state.messages,
-                    )
-                    st.session_state.current_session_id = session_id
-                    st.success(f"Saved: {chat_name}")
+                st.caption("Chat saved automatically.")
+
+        _render_search()
+        _render_watchlist()
 
         st.divider()
 
@@ -68,26 +396,19 @@ def _render_sidebar():
                 session_id, session_name, created_at = session
                 col1, col2 = st.columns([4, 1])
                 with col1:
-                    if st.button(session_name, key=f"load_{session_id}"):
-                        loaded_name, messages = load_chat_session(session_id)
-                        if loaded_name:
-                            st.session_state.messages = messages
-                            st.session_state.current_session_id = session_id
-                            st.session_state.related_questions = []
-                            st.success(f"Loaded: {loaded_name}")
-                            st.rerun()
-                        else:
-                            st.error("Could not load this chat.")
+                    st.button(
+                        session_name,
+                        key=f"load_{session_id}",
+                        on_click=_load_session,
+                        args=(session_id,),
+                    )
                 with col2:
-                    if st.button("X", key=f"delete_{session_id}"):
-                        if delete_chat_session(session_id):
-                            if st.session_state.current_session_id == session_id:
-                                st.session_state.current_session_id = None
-                                st.session_state.messages = []
-                            st.success("Chat deleted.")
-                            st.rerun()
-                        else:
-                            st.error("Could not delete this chat.")
+                    st.button(
+                        "X",
+                        key=f"delete_{session_id}",
+                        on_click=_delete_session,
+                        args=(session_id,),
+                    )
         else:
             st.info("No saved chats yet.")
 
@@ -96,126 +417,221 @@ def _render_sidebar():
         st.subheader("Actions")
         col1, col2 = st.columns(2)
         with col1:
-            if st.button("New chat"):
-                st.session_state.messages = []
-                st.session_state.related_questions = []
-                st.session_state.current_session_id = None
-                st.rerun()
+            st.button("New chat", on_click=_new_chat)
         with col2:
-            if st.button("Clear"):
-                st.session_state.messages = []
-                st.session_state.related_questions = []
-                st.rerun()
-
-        if st.button("Log out"):
-            st.session_state.authenticated = False
-            st.session_state.username = None
-            st.session_state.user_id = None
-            st.session_state.messages = []
-            st.session_state.current_session_id = None
-            st.rerun()
+            st.button("Clear", key="clear_chat", on_click=_new_chat)
+
+        st.button("Log out", on_click=_log_out)
 
         st.divider()
 
-        # Related questions / suggestions
-        if st.session_state.related_questions:
-            st.subheader("Suggested follow-ups")
-            for q in st.session_state.related_questions:
-                if st.button(q, key=f"suggest_{q}"):
-                    st.session_state.messages.append({"role": "user", "content": q})
-                    st.rerun()
-        else:
-            st.subheader("Quick start")
-            defaults = [
-                "Bitcoin price and news analysis",
-                "Ethereum market update with recent news",
-                "NEAR protocol price and developments",
-                "Current crypto market overview",
-            ]
-            for q in defaults:
-                if st.button(q, key=f"default_{q}"):
-                    st.session_state.messages.append({"role": "user", "content": q})
-                    st.rerun()
+        _collect_related()
+        if st.session_state.related_future is not None:
+            # Only this fragment reruns while follow-ups are generated.
+            st.fragment(_poll_suggestions, run_every=SUGGESTION_POLL_SECONDS)()
+        _render_suggestions()
+        render_run_stats()
+
+
+def _poll_suggestions():
+    if _collect_related():
+        # One full run to show the buttons and stop the timer.
+        rerun("follow-ups ready")
+    st.caption("Finding follow-up questions...")
+
+
+def _render_suggestions():
+    if st.session_state.related_questions:
+        st.subheader("Suggested follow-ups")
+        questions, prefix = st.session_state.related_questions, "suggest"
+    else:
+        st.subheader("Quick start")
+        questions, prefix = QUICK_START, "default"
+    for q in questions:
+        st.button(q, key=f"{prefix}_{q}", on_click=_ask, args=(q,))
+
+
+def _render_message_body(message):
+    text = st.session_state.analyzer.clean_text(message.content)
+    st.markdown(text)
+
+    if message.role != "assistant":
+        return
+
+    # Prices expander
+    if message.prices:
+        with st.expander("Market prices", expanded=False):
+            for coin in message.prices:
+                name = f"{coin['name']} ({coin['symbol']})"
+                price = f"{coin['price']:,.2f}"
+                change = f"{coin['change']:+.2f}%"
+                st.markdown(f"**{name}**")
+                st.markdown(f"Price: {price}  |  Change: {change}")
+                st.divider()
+
+    # News expander
+    if message.news:
+        with st.expander("News used in analysis", expanded=False):
+            for i, item in enumerate(message.news[:6]):
+                clean_title = st.session_state.analyzer.clean_text(item["title"])
+                st.markdown(f"- {clean_title}")
+                st.caption(
+                    f"{item['source']}  |  Sentiment: {sentiment_label(item)} "
+                    f"({combined_sentiment(item):+.2f})  |  Votes: {item['sentiment']:+d}"
+                )
+                if item["url"] and item["url"] != "#":
+                    st.markdown(f"[Open article]({item['url']})")
+                if i < len(message.news[:6]) - 1:
+                    st.divider()
+
+
+def _show_queue_position(notice, position, seconds):
+    if seconds > QUEUE_POLL_SECONDS:
+        notice.info(f"You're asking quickly; this question starts in about {seconds:.0f}s.")
+    elif position > 1:
+        notice.info(f"Busy right now; you're number {position} in line.")
+    else:
+        notice.info("Starting shortly...")
+
+
+def _answer_pending():
+    """Answer the pending question in this run and render the answer in place."""
+    if st.session_state.chat_phase == ANSWERING:
+        # The run that was answering was interrupted; answer again.
+        st.session_state.chat_phase = PENDING
+    if st.session_state.chat_phase != PENDING:
+        return
+
+    messages = st.session_state.messages
+    if not messages or messages[-1].role != "user":
+        st.session_state.chat_phase = IDLE
+        return
+    question = messages[-1].content
+    if ANALYSIS_QUEUE:
+        _answer_in_worker(question)
+        return
+
+    st.session_state.chat_phase = ANSWERING
+    analyzer = st.session_state.analyzer
+    with st.chat_message("assistant"):
+        queue_notice = st.empty()
+        try:
+            with get_analyze_scheduler().turn(
+                st.session_state.user_id,
+                on_wait=lambda position, seconds: _show_queue_position(queue_notice, position, seconds),
+            ):
+                queue_notice.empty()
+                with st.spinner("Analyzing market data and news..."):
+                    response, prices, news, _ = analyzer.analyze(
+                        question,
+                        history_messages(messages[:-1]),
+                        include_related=False,
+                        last_seen=last_quotes(messages),
+                    )
+        except UserThrottled as e:
+            # Drop the unanswered question; the user can ask it again.
+            queue_notice.empty()
+            messages.pop()
+            st.session_state.chat_phase = IDLE
+            st.toast(f"Not answered: {e}")
+            return
+        answer = ChatMessage("assistant", response, prices, news)
+        _render_message_body(answer)
+
+    _record_answer(question, answer)
+
+
+def _record_answer(question, answer):
+    st.session_state.messages.append(answer)
+    st.session_state.chat_phase = IDLE
+    # Follow-ups arrive in the sidebar once the background call finishes.
+    st.session_state.related_questions = []
+    st.session_state.related_future = submit_auxiliary(
+        st.session_state.analyzer.get_related_questions,
+        question,
+        [coin["name"] for coin in answer.prices or ()],
+    )
+    _autosave()
+
+
+def _answer_in_worker(question):
+    """Queue the question for an analysis worker; a fragment waits for the answer
+    so no script run is held while the worker answers."""
+    messages = st.session_state.messages
+    if st.session_state.pending_job is None:
+        try:
+            st.session_state.pending_job = enqueue_analysis(
+                st.session_state.user_id,
+                question,
+                # analyze only reads the last four messages of history.
+                job_payload(messages[:-1][-4:], last_quotes(messages)),
+            )
+        except UserThrottled as e:
+            messages.pop()
+            st.session_state.chat_phase = IDLE
+            st.toast(f"Not answered: {e}")
+            return
+        st.session_state.job_checked_at = 0.0
+        st.session_state.job_position = 0
+    with st.chat_message("assistant"):
+        st.fragment(_poll_job, run_every=JOB_POLL_SECONDS)()
+
+
+def _poll_job():
+    job_id = st.session_state.pending_job
+    if job_id is None:
+        return
+    watcher = get_job_watcher()
+    now = time.monotonic()
+    if (
+        watcher.finished(job_id)
+        or not watcher.listening
+        or now - st.session_state.job_checked_at >= JOB_RECHECK_SECONDS
+    ):
+        st.session_state.job_checked_at = now
+        job = get_job(job_id)
+        if job is None or job["status"] in (DONE, FAILED):
+            _finish_job(job)
+            # One full run to show the answer in the history and stop the timer.
+            rerun("answer ready")
+        st.session_state.job_position = job["position"]
+
+    position = st.session_state.job_position
+    if position > 1:
+        st.caption(f"Waiting for an analysis worker; number {position} in line.")
+    else:
+        st.caption("Analyzing market data and news...")
+
+
+def _finish_job(job):
+    st.session_state.pending_job = None
+    question = st.session_state.messages[-1].content
+    if job is None:
+        answer = ChatMessage("assistant", "Error: the analysis job was lost; please ask again.", [], [])
+    elif job["status"] == FAILED:
+        answer = ChatMessage("assistant", f"Error: {job['error']}", [], [])
+    else:
+        result = job["result"]
+        answer = ChatMessage("assistant", result["answer"], result["prices"], result["news"])
+    _record_answer(question, answer)
 
 
 def _render_messages():
     col1, col2, col3 = st.columns([1, 98, 1])
     with col2:
         for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                text = st.session_state.analyzer.clean_text(message["content"])
-                st.markdown(text)
-
-                if message["role"] == "assistant":
-                    # Prices expander
-                    if message.get("prices"):
-                        with st.expander("Market prices", expanded=False):
-                            for coin in message["prices"]:
-                                name = f"{coin['name']} ({coin['symbol']})"
-                                price = f"{coin['price']:,.2f}"
-                                change = f"{coin['change']:+.2f}%"
-                                st.markdown(f"**{name}**")
-                                st.markdown(f"Price: {price}  |  Change: {change}")
-                                st.divider()
-
-                    # News expander
-                    if message.get("news"):
-                        with st.expander("News used in analysis", expanded=False):
-                            for i, item in enumerate(message["news"][:6]):
-                                clean_title = st.session_state.analyzer.clean_text(
-                                    item["title"]
-                                )
-                                st.markdown(f"- {clean_title}")
-                                st.caption(
-                                    f"{item['source']}  |  Sentiment score: {item['sentiment']:+d}"
-                                )
-                                if item["url"] and item["url"] != "#":
-                                    st.markdown(f"[Open article]({item['url']})")
-                                if i < len(message["news"][:6]) - 1:
-                                    st.divider()
-
-        # Process last user message if needed
-        if st.session_state.messages:
-            last = st.session_state.messages[-1]
-            if last["role"] == "user" and "processed" not in last:
-                st.session_state.messages[-1]["processed"] = True
-
-                with st.chat_message("assistant"):
-                    history = []
-                    for msg in st.session_state.messages[:-1]:
-                        if msg["role"] == "user":
-                            history.append(HumanMessage(content=msg["content"]))
-                        elif msg["role"] == "assistant":
-                            history.append(AIMessage(content=msg["content"]))
-
-                    with st.spinner("Analyzing market data and news..."):
-                        response, prices, news, related_questions = (
-                            st.session_state.analyzer.analyze(
-                                last["content"], history
-                            )
-                        )
-
-                    st.markdown(response)
-
-                st.session_state.messages.append(
-                    {
-                        "role": "assistant",
-                        "content": response,
-                        "prices": prices,
-                        "news": news,
-                    }
-                )
-                st.session_state.related_questions = related_questions
-                st.rerun()
+            with st.chat_message(message.role):
+                _render_message_body(message)
+
+        _answer_pending()
 
 
 def _render_input():
-    prompt = st.chat_input(
-        "Ask about any cryptocurrency (for example: Bitcoin price analysis)"
+    st.chat_input(
+        "Ask about any cryptocurrency (for example: Bitcoin price analysis)",
+        key="chat_prompt",
+        on_submit=_on_chat_input,
     )
-    if prompt:
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        st.rerun()
 
 
 def _render_footer():
@@ -257,7 +673,8 @@ def render_chat_page():
     )
 
     _ensure_chat_state()
-    _render_sidebar()
+    # The sidebar goes after the answer so it shows the chat's new state.
     _render_messages()
+    _render_sidebar()
     _render_input()
     _render_footer()
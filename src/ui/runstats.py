@@ -0,0 +1,54 @@
+"""Script-execution counters for the Streamlit app.
+
+Every user action should cost one script execution. ``runs`` counts
+executions of the app script, ``actions`` counts widget callbacks and
+``reruns`` counts explicit ``st.rerun()`` calls (extra executions).
+Set ``SHOW_RUN_STATS=1`` to show them in the sidebar.
+"""
+import logging
+import os
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+SHOW_RUN_STATS = os.getenv("SHOW_RUN_STATS", "").lower() in ("1", "true", "yes")
+
+
+def _stats():
+    if "run_stats" not in st.session_state:
+        st.session_state.run_stats = {"runs": 0, "actions": 0, "reruns": 0}
+    return st.session_state.run_stats
+
+
+def count_run():
+    """Call once at the top of every script execution."""
+    stats = _stats()
+    stats["runs"] += 1
+    logger.debug("Script run %(runs)d (%(actions)d actions, %(reruns)d reruns)", stats)
+
+
+def count_action(name):
+    """Call from widget callbacks; each one is a user action."""
+    _stats()["actions"] += 1
+    logger.debug("User action: %s", name)
+
+
+def rerun(reason):
+    """``st.rerun()``, counted; each call costs an extra script execution."""
+    _stats()["reruns"] += 1
+    logger.debug("Rerun: %s", reason)
+    st.rerun()
+
+
+def run_stats():
+    return dict(_stats())
+
+
+def render_run_stats():
+    if SHOW_RUN_STATS:
+        stats = _stats()
+        st.caption(
+            f"Script runs: {stats['runs']}  |  Actions: {stats['actions']}  |  "
+            f"Extra reruns: {stats['reruns']}"
+        )
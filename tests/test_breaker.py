@@ -0,0 +1,204 @@
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from src.resilience import breaker as breaker_module
+from src.resilience import http as http_module
+from src.resilience.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from src.resilience.deadline import DeadlineExceeded, deadline_scope
+from src.resilience.http import ProviderThrottled, provider_get
+
+PROVIDER = "test-provider"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.headers = headers or {}
+        self._body = body
+
+    def json(self):
+        if isinstance(self._body, Exception):
+            raise self._body
+        return self._body
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+
+def fail():
+    raise ConnectionError("provider down")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(breaker_module, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", failure_threshold=3, reset_seconds=30)
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+
+
+def test_opens_after_consecutive_failures(breaker):
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.state == CLOSED
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.failures == 0
+
+    trip(breaker)
+    assert breaker.state == OPEN
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, "x")
+    assert calls == []
+
+
+def test_half_open_lets_a_single_probe_through(breaker, clock):
+    trip(breaker)
+    clock.advance(29)
+    assert breaker.rejecting()
+    assert not breaker.allow()
+
+    clock.advance(1)
+    assert not breaker.rejecting()
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # The probe is claimed: everyone else is refused until it settles.
+    assert breaker.rejecting()
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_for_another_period(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    assert breaker.opened_at == clock.now
+    clock.advance(29)
+    assert not breaker.allow()
+    clock.advance(1)
+    assert breaker.allow()
+
+
+@pytest.fixture
+def provider_breaker(breaker, monkeypatch):
+    monkeypatch.setattr(http_module, "get_breaker", lambda name: breaker)
+    return breaker
+
+
+@pytest.fixture
+def fake_get(monkeypatch):
+    """Make ``requests.get`` return, or raise, whatever ``fake_get.result`` is."""
+    fake = SimpleNamespace(result=FakeResponse(body={"ok": True}), calls=0)
+
+    def get(url, params=None, timeout=None):
+        fake.calls += 1
+        if isinstance(fake.result, Exception):
+            raise fake.result
+        return fake.result
+
+    monkeypatch.setattr(http_module.requests, "get", get)
+    return fake
+
+
+def half_open_probe(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+
+
+def test_provider_get_rejects_fast_while_open(provider_breaker, fake_get):
+    trip(provider_breaker)
+    with pytest.raises(CircuitOpenError):
+        provider_get(PROVIDER, "https://example.test")
+    assert fake_get.calls == 0
+
+
+def test_provider_get_probe_success_closes(provider_breaker, clock, fake_get):
+    half_open_probe(provider_breaker, clock)
+    assert provider_get(PROVIDER, "https://example.test") == {"ok": True}
+    assert provider_breaker.state == CLOSED
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        requests.Timeout("read timed out"),
+        FakeResponse(503),
+        FakeResponse(429),
+        FakeResponse(200, body=ValueError("not JSON")),
+    ],
+    ids=["timeout", "5xx", "429", "bad-json"],
+)
+def test_provider_get_failed_probe_reopens(provider_breaker, clock, fake_get, result):
+    half_open_probe(provider_breaker, clock)
+    fake_get.result = result
+    with pytest.raises(Exception):
+        provider_get(PROVIDER, "https://example.test")
+    assert provider_breaker.state == OPEN
+    assert provider_breaker.opened_at == clock.now
+
+
+def test_provider_get_out_of_deadline_settles_probe(provider_breaker, clock, fake_get):
+    half_open_probe(provider_breaker, clock)
+    with deadline_scope(0.0):
+        with pytest.raises(DeadlineExceeded):
+            provider_get(PROVIDER, "https://example.test")
+    assert fake_get.calls == 0
+    assert provider_breaker.state == OPEN
+    assert provider_breaker.opened_at == clock.now
+
+
+def test_provider_get_client_error_does_not_trip(provider_breaker, clock, fake_get):
+    half_open_probe(provider_breaker, clock)
+    fake_get.result = FakeResponse(404)
+    with pytest.raises(requests.HTTPError):
+        provider_get(PROVIDER, "https://example.test")
+    assert provider_breaker.state == CLOSED
+
+
+def test_provider_get_throttled_leaves_probe_unclaimed(provider_breaker, clock, fake_get, monkeypatch):
+    monkeypatch.setitem(http_module.PROVIDER_RATE_LIMITS, PROVIDER, (1.0, 1))
+    monkeypatch.setattr(http_module, "_limiters", {})
+    http_module.get_rate_limiter(PROVIDER).try_acquire()
+
+    half_open_probe(provider_breaker, clock)
+    with pytest.raises(ProviderThrottled):
+        provider_get(PROVIDER, "https://example.test", timeout=0.1)
+    assert fake_get.calls == 0
+    assert provider_breaker.state == OPEN
+    assert not provider_breaker.rejecting()
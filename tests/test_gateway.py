@@ -0,0 +1,128 @@
+import threading
+
+import pytest
+
+from src.ai import gateway as gateway_module
+from src.ai.gateway import ANALYSIS, FOLLOWUP, NAMING, LLMGateway, LLMOverloaded
+
+
+class Blocker:
+    """Fake model call that holds its worker until ``release``."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self._gate = threading.Event()
+
+    def __call__(self):
+        self.started.set()
+        self._gate.wait(5)
+        return "unblocked"
+
+    def release(self):
+        self._gate.set()
+
+
+@pytest.fixture
+def gateway():
+    return LLMGateway(concurrency=1, requests_per_minute=6000, burst=100)
+
+
+@pytest.fixture
+def blocked(gateway):
+    """The gateway's only worker is busy until the test releases it."""
+    blocker = Blocker()
+    future = gateway.submit(blocker)
+    assert blocker.started.wait(5)
+    yield blocker
+    blocker.release()
+    future.result(5)
+
+
+def test_queued_requests_run_in_priority_order(gateway, blocked):
+    calls = []
+    futures = [
+        gateway.submit(calls.append, name, priority=priority)
+        for name, priority in [("naming", NAMING), ("followup", FOLLOWUP), ("analysis", ANALYSIS)]
+    ]
+    assert gateway.stats()["queue_depth"] == {"analysis": 1, "followup": 1, "naming": 1}
+    blocked.release()
+    for future in futures:
+        future.result(5)
+    assert calls == ["analysis", "followup", "naming"]
+
+
+def test_low_priority_is_shed_when_queue_is_deep(gateway, blocked, monkeypatch):
+    monkeypatch.setitem(gateway_module.SHED_QUEUE_DEPTH, NAMING, 2)
+    futures = [gateway.submit(str, priority=ANALYSIS) for _ in range(2)]
+    with pytest.raises(LLMOverloaded):
+        gateway.submit(str, priority=NAMING)
+    # Analyses are never shed.
+    futures.append(gateway.submit(str, priority=ANALYSIS))
+    assert gateway.stats()["shed"] == 1
+    blocked.release()
+    for future in futures:
+        future.result(5)
+
+
+def test_low_priority_is_dropped_after_max_queue_wait(gateway, blocked, monkeypatch):
+    monkeypatch.setitem(gateway_module.MAX_QUEUE_WAIT, FOLLOWUP, 0.0)
+    calls = []
+    future = gateway.submit(calls.append, "followup", priority=FOLLOWUP)
+    blocked.release()
+    with pytest.raises(LLMOverloaded):
+        future.result(5)
+    assert calls == []
+    assert gateway.stats()["shed"] == 1
+
+
+def test_invoke_timeout_withdraws_queued_request(gateway, blocked):
+    calls = []
+    with pytest.raises(TimeoutError):
+        gateway.invoke(calls.append, "late", timeout=0.05)
+    stats = gateway.stats()
+    assert stats["queue_depth"]["analysis"] == 0
+    assert stats["abandoned"] == 0
+
+    blocked.release()
+    gateway.invoke(calls.append, "next", timeout=5)
+    assert calls == ["next"]
+
+
+def test_invoke_timeout_counts_abandoned_running_call(gateway):
+    blocker = Blocker()
+    with pytest.raises(TimeoutError):
+        gateway.invoke(blocker, timeout=0.2)
+    assert blocker.started.is_set()
+    stats = gateway.stats()
+    assert stats["abandoned"] == 1
+    assert stats["abandoned_running"] == 1
+
+    blocker.release()
+    gateway.invoke(str, timeout=5)
+    assert gateway.stats()["abandoned_running"] == 0
+
+
+def test_rate_limit_error_pauses_bucket_and_sheds_naming(gateway):
+    def quota_exceeded():
+        raise RuntimeError("429 Resource has been exhausted (e.g. check quota).")
+
+    with pytest.raises(RuntimeError):
+        gateway.invoke(quota_exceeded, timeout=5)
+    stats = gateway.stats()
+    assert stats["rate_limited"] == 1
+    assert stats["failed"] == 1
+    assert stats["throttled"]
+    assert gateway.bucket.wait_time() > gateway_module.RATE_LIMIT_BACKOFF_SECONDS - 1
+    with pytest.raises(LLMOverloaded):
+        gateway.submit(str, priority=NAMING)
+
+
+def test_other_errors_do_not_pause_bucket(gateway):
+    def broken():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        gateway.invoke(broken, timeout=5)
+    stats = gateway.stats()
+    assert stats["rate_limited"] == 0
+    assert not stats["throttled"]
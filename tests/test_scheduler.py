@@ -0,0 +1,115 @@
+import pytest
+
+from src.ai import scheduler as scheduler_module
+from src.ai.scheduler import DONE, QUEUED, RUNNING, AnalyzeScheduler, UserThrottled
+
+
+def make_scheduler(**kwargs):
+    options = {"concurrency": 1, "per_minute": 6000, "burst": 100, "max_active": 10}
+    options.update(kwargs)
+    return AnalyzeScheduler(**options)
+
+
+def queue_three_users(scheduler):
+    """a1 runs; a2, a3, b1, b2 and c1 wait for the single slot."""
+    a1, a2, a3 = (scheduler.join("a") for _ in range(3))
+    b1, b2 = scheduler.join("b"), scheduler.join("b")
+    c1 = scheduler.join("c")
+    return a1, [a2, b1, c1, a3, b2]
+
+
+def test_slots_are_handed_out_round_robin_across_users():
+    scheduler = make_scheduler()
+    running, queued = queue_three_users(scheduler)
+    assert running.state == RUNNING
+    assert all(ticket.state == QUEUED for ticket in queued)
+
+    started = []
+    for _ in queued:
+        scheduler.release(running)
+        (running,) = [t for t in queued if t.state == RUNNING]
+        started.append(running)
+    assert started == queued
+
+
+def test_rate_limited_user_does_not_hold_up_others():
+    scheduler = make_scheduler(concurrency=4, per_minute=1, burst=1)
+    first, second = scheduler.join("a"), scheduler.join("a")
+    other = scheduler.join("b")
+    assert first.state == RUNNING
+    assert second.state == QUEUED
+    assert other.state == RUNNING
+    position, seconds = scheduler.status(second)
+    assert position == 1
+    assert seconds > 0
+
+
+def test_status_reports_place_in_line():
+    scheduler = make_scheduler()
+    running, queued = queue_three_users(scheduler)
+    assert scheduler.status(running) == (0, 0.0)
+    assert [scheduler.status(ticket)[0] for ticket in queued] == [1, 2, 3, 4, 5]
+
+    scheduler.release(running)
+    assert scheduler.status(queued[0]) == (0, 0.0)
+    assert [scheduler.status(ticket)[0] for ticket in queued[1:]] == [1, 2, 3, 4]
+
+
+def test_join_refuses_past_max_active():
+    scheduler = make_scheduler(max_active=2)
+    scheduler.join("a")
+    scheduler.join("a")
+    with pytest.raises(UserThrottled) as excinfo:
+        scheduler.join("a")
+    assert excinfo.value.retry_after > 0
+    assert scheduler.stats()["refused"] == 1
+    scheduler.join("b")
+
+
+def test_turn_releases_slot_when_block_raises():
+    scheduler = make_scheduler(max_active=1)
+    with pytest.raises(ValueError):
+        with scheduler.turn("a") as ticket:
+            raise ValueError("analysis failed")
+    assert ticket.state == DONE
+    stats = scheduler.stats()
+    assert stats["running"] == 0
+    assert stats["queued"] == 0
+
+    # The slot and the user's quota are both free again.
+    with scheduler.turn("a") as again:
+        assert again.state == RUNNING
+
+
+def test_release_on_error_starts_next_waiter():
+    scheduler = make_scheduler()
+    running = scheduler.join("a")
+    waiting = scheduler.join("b")
+    with pytest.raises(RuntimeError):
+        try:
+            raise RuntimeError("provider down")
+        finally:
+            scheduler.release(running)
+    assert waiting.state == RUNNING
+    # Releasing twice is harmless.
+    scheduler.release(running)
+    assert scheduler.stats()["running"] == 1
+
+
+def test_queue_timeout_withdraws_ticket(monkeypatch):
+    monkeypatch.setattr(scheduler_module, "QUEUE_POLL_SECONDS", 0.01)
+    scheduler = make_scheduler(max_active=1)
+    blocker = scheduler.join("a")
+    positions = []
+    with pytest.raises(UserThrottled):
+        with scheduler.turn("b", timeout=0.05, on_wait=lambda *status: positions.append(status)):
+            pytest.fail("should not start while the slot is taken")
+    assert positions and positions[0][0] == 1
+    stats = scheduler.stats()
+    assert stats["queued"] == 0
+    assert stats["timed_out"] == 1
+
+    # b's quota was given back: it can queue again and starts once a releases.
+    ticket = scheduler.join("b")
+    scheduler.release(blocker)
+    assert ticket.state == RUNNING